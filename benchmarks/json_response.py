@@ -0,0 +1,68 @@
+"""Cost of building a JSON response body: JSONResponse vs ORJSONResponse.
+
+    python -m benchmarks.json_response --songs 50 --rounds 2000
+
+Renders a page of songs (the shape the list endpoints return) both ways:
+the old path converts datetimes with isoformat() in to_dict and encodes
+with the stdlib json module, the new path hands the raw column values to
+orjson. Both produce the same bytes.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import JSONResponse
+from data.models.music import Song
+from shared.responses import OK
+
+
+def old_to_dict(song: Song):
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in song.to_dict().items()}
+
+
+def page(songs: int):
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Song(
+            id=i, title=f"Bài hát số {i}", duration=180 + i % 120, file_url=f"https://res.cloudinary.com/demo/video/upload/{i}.mp3",
+            cover_url=f"https://res.cloudinary.com/demo/image/upload/{i}.jpg", like_count=i * 7, comment_count=i,
+            play_count=i * 131, artist_id=i % 40, album_id=i % 90, created_at=created + timedelta(minutes=i),
+        )
+        for i in range(songs)
+    ]
+
+
+def measure(render, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    songs = page(args.songs)
+
+    def old():
+        content = {"status": "success", "code": 200, "message": "OK", "metadata": {"songs": [old_to_dict(s) for s in songs]}}
+        return JSONResponse(status_code=200, content=content).body
+
+    def new():
+        return OK(metadata={"songs": [s.to_dict() for s in songs]}).send().body
+
+    assert old() == new()
+    size = len(new())
+    old_us, new_us = measure(old, args.rounds), measure(new, args.rounds)
+    print(f"{args.songs} songs, {size:,} bytes per body (median of {args.rounds})")
+    print(f"  JSONResponse + isoformat  {old_us:8.1f} us")
+    print(f"  ORJSONResponse            {new_us:8.1f} us   ({old_us / new_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
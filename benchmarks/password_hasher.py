@@ -0,0 +1,71 @@
+"""Event-loop stalls and throughput of bcrypt verification under concurrent logins.
+
+    python -m benchmarks.password_hasher --logins 64 --workers 4
+
+Runs the same burst of verify() calls three ways: inline on the event loop
+(what the auth service did before PasswordHasher), on the thread pool and
+on the process pool. A ticker coroutine sleeps 1 ms in a loop; the longest
+gap it sees is how long any other request on the same worker would have
+waited.
+"""
+import argparse
+import asyncio
+import time
+from business.utils.password_hasher import PasswordHasher, pwd_context
+
+
+class Inline:
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return pwd_context.verify(plain_password, hashed_password)
+
+    def shutdown(self):
+        pass
+
+
+async def burst(hasher, hashed: str, logins: int):
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(hasher.verify("s3cret", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    assert all(results)
+    return elapsed, max(stalls) * 1000
+
+
+async def run(args):
+    hashed = pwd_context.hash("s3cret")
+    print(f"{args.logins} concurrent verifies, bcrypt cost {hashed.split('$')[2]}, {args.workers} workers")
+    for label, hasher in (
+        ("inline", Inline()),
+        ("thread pool", PasswordHasher(max_workers=args.workers, max_pending=args.logins, executor_type="thread")),
+        ("process pool", PasswordHasher(max_workers=args.workers, max_pending=args.logins, executor_type="process")),
+    ):
+        # warm up (process pool: spawn the workers)
+        await asyncio.gather(*(hasher.verify("s3cret", hashed) for _ in range(args.workers)))
+        elapsed, stall = await burst(hasher, hashed, args.logins)
+        hasher.shutdown()
+        print(f"  {label:13} {args.logins / elapsed:6.1f} verifies/s   longest event-loop stall {stall:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
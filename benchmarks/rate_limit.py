@@ -0,0 +1,75 @@
+"""Per-request overhead of RateLimitMiddleware, driven as plain ASGI calls.
+
+    python -m benchmarks.rate_limit --requests 200000
+    python -m benchmarks.rate_limit --redis-url redis://localhost:6379/0
+
+Compares a bare ASGI app with the same app behind the middleware, for both
+algorithms, over many client keys so the store sees realistic churn. With
+--redis-url the Lua-script store is measured too (one round trip per hit).
+"""
+import argparse
+import asyncio
+import time
+from infrastructure.cache.redis_pool import RedisClient
+from presentation.middleware.rate_limit_middleware import (
+    TOKEN_BUCKET,
+    MemoryRateLimitStore,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RedisRateLimitStore,
+)
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def measure(asgi, requests: int, clients: int) -> float:
+    scopes = [
+        {"type": "http", "method": "GET", "path": "/api/v1/songs", "headers": [], "client": (f"10.0.{i // 256}.{i % 256}", 1)}
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for i in range(requests):
+        await asgi(scopes[i % clients], _receive, _send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def run(args):
+    policies = {
+        "sliding_window": RateLimitPolicy("bench", limit=1000, window=60),
+        "token_bucket": RateLimitPolicy("bench", limit=1000, window=60, algorithm=TOKEN_BUCKET),
+    }
+    stores = {"memory": MemoryRateLimitStore}
+    if args.redis_url:
+        redis = RedisClient(url=args.redis_url)
+        stores["redis"] = lambda: RedisRateLimitStore(redis=redis)
+
+    baseline = await measure(app, args.requests, args.clients)
+    print(f"bare app                      {baseline:6.2f} us/request")
+    for store_name, store in stores.items():
+        for policy_name, policy in policies.items():
+            middleware = RateLimitMiddleware(app, policies={}, default_policy=policy, store=store())
+            per_request = await measure(middleware, args.requests, args.clients)
+            print(f"{store_name:6} {policy_name:15}        {per_request:6.2f} us/request (+{per_request - baseline:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=10_000, help="distinct client IPs")
+    parser.add_argument("--redis-url", help="also measure the Redis store against this server")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
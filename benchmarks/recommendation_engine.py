@@ -0,0 +1,95 @@
+"""Fit time, incremental refresh and query latency of ItemSimilarityEngine.
+
+    python -m benchmarks.recommendation_engine --users 100000 --songs 1000000
+
+Likes are drawn with a fixed seed from a power-law song popularity (a few
+songs get most of the likes, like a real catalog), plus playlists of
+20-50 songs. "refresh" adds a batch of new likes and recomputes the
+dirty songs, which is what RecommendationService.refresh(full=False)
+does between full rebuilds.
+"""
+import argparse
+import resource
+import statistics
+import time
+import numpy as np
+from business.utils.recommendation_engine import ItemSimilarityEngine
+
+
+def interactions(users: int, songs: int, likes: int, playlists: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # rank r gets weight ~ 1/r^0.8; shuffled so popularity is not ordered by id
+    popularity = 1.0 / np.arange(1, songs + 1) ** 0.8
+    popularity /= popularity.sum()
+    song_ids = rng.permutation(songs) + 1
+
+    like_users = rng.integers(1, users + 1, likes)
+    like_songs = song_ids[rng.choice(songs, likes, p=popularity)]
+    sizes = rng.integers(20, 51, playlists)
+    playlist_ids = np.repeat(np.arange(1, playlists + 1), sizes)
+    playlist_songs = song_ids[rng.choice(songs, int(sizes.sum()), p=popularity)]
+    return (like_users, like_songs), (playlist_ids, playlist_songs)
+
+
+def _report(label: str, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label:18} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--songs", type=int, default=1_000_000)
+    parser.add_argument("--likes", type=int, default=5_000_000)
+    parser.add_argument("--playlists", type=int, default=20_000)
+    parser.add_argument("--top-n", type=int, default=100)
+    parser.add_argument("--new-likes", type=int, default=1000, help="likes per incremental refresh")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--materialize", action="store_true", help="also time materialize() for every user")
+    args = parser.parse_args()
+
+    likes, playlist_songs = interactions(args.users, args.songs, args.likes, args.playlists)
+    started = time.perf_counter()
+    engine = ItemSimilarityEngine(top_n=args.top_n).fit(likes, playlist_songs)
+    fit_seconds = time.perf_counter() - started
+    neighbor_mib = (engine.neighbors.nbytes + engine.scores.nbytes) / 2**20
+    print(
+        f"{args.users:,} users, {engine.n_songs:,} songs with interactions, {args.likes:,} likes, "
+        f"{len(playlist_songs[0]):,} playlist entries: fit in {fit_seconds:.1f}s, neighbors {neighbor_mib:,.0f} MiB"
+    )
+
+    rng = np.random.default_rng(7)
+    song_sample = rng.choice(engine.song_ids, args.queries)
+    user_sample = rng.choice(np.fromiter(engine.user_index, dtype=np.int64), args.queries)
+    for label, query, sample in (
+        ("similar_songs", engine.similar_songs, song_sample),
+        ("recommend_for_user", engine.recommend_for_user, user_sample),
+    ):
+        timings = []
+        for key in sample.tolist():
+            started = time.perf_counter()
+            query(key, 20)
+            timings.append((time.perf_counter() - started) * 1000)
+        _report(label, timings)
+
+    timings, dirty = [], []
+    for batch in range(5):
+        new_likes, _ = interactions(args.users, args.songs, args.new_likes, 0, seed=100 + batch)
+        started = time.perf_counter()
+        engine.add_likes(*new_likes)
+        dirty.append(engine.refresh_dirty())
+        timings.append((time.perf_counter() - started) * 1000)
+    _report(f"refresh {args.new_likes:,} likes", timings)
+    print(f"  {'':18} {statistics.median(dirty):,.0f} neighbor rows updated per refresh (median)")
+
+    if args.materialize:
+        started = time.perf_counter()
+        arrays = engine.materialize(args.top_n)
+        size = sum(array.nbytes for array in arrays.values()) / 2**20
+        print(f"  materialize        {time.perf_counter() - started:.1f}s, {size:,.0f} MiB of store arrays")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
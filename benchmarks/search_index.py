@@ -0,0 +1,91 @@
+"""Build time, memory and query latency of SearchIndex on a synthetic catalog.
+
+    python -m benchmarks.search_index --songs 1000000
+
+Titles, artist and album names are drawn from a fixed-seed vocabulary, so
+runs are comparable. Queries cover exact terms, prefixes of the last term,
+one- and two-typo terms and multi-term queries.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+import tracemalloc
+from business.utils.search_index import SearchIndex
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+
+def build_catalog(songs: int, seed: int = 42):
+    rng = random.Random(seed)
+    words = [_word(rng) for _ in range(max(1000, songs // 20))]
+    artists = [(i, " ".join(rng.sample(words, 2)).title()) for i in range(1, songs // 50 + 2)]
+    albums = [(i, " ".join(rng.sample(words, 2)).title()) for i in range(1, songs // 10 + 2)]
+    rows = [
+        {
+            "song_id": i,
+            "title": " ".join(rng.sample(words, rng.randint(1, 4))).title(),
+            "artist_id": rng.randint(1, len(artists)),
+            "album_id": rng.randint(1, len(albums)),
+        }
+        for i in range(1, songs + 1)
+    ]
+    return words, artists, albums, rows
+
+
+def _typo(rng: random.Random, word: str, edits: int) -> str:
+    chars = list(word)
+    for position in rng.sample(range(len(chars)), edits):
+        chars[position] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def queries(words, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    long_words = [w for w in words if len(w) >= 8]
+    mid_words = [w for w in words if 4 <= len(w) < 8]
+    return {
+        "exact": [rng.choice(words) for _ in range(count)],
+        "prefix": [rng.choice(words)[:3] for _ in range(count)],
+        "1 typo": [_typo(rng, rng.choice(mid_words), 1) for _ in range(count)],
+        "2 typos": [_typo(rng, rng.choice(long_words), 2) for _ in range(count)],
+        "3 terms": [" ".join(rng.sample(words, 2) + [rng.choice(words)[:4]]) for _ in range(count)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    parser.add_argument("--memory", action="store_true", help="trace allocations (makes the build several times slower)")
+    args = parser.parse_args()
+
+    words, artists, albums, rows = build_catalog(args.songs)
+    if args.memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    index = SearchIndex()
+    index.load(artists, albums, rows)
+    build_seconds = time.perf_counter() - started
+    summary = f"{args.songs:,} songs, {len(index.vocabulary):,} tokens: built in {build_seconds:.1f}s"
+    if args.memory:
+        summary += f", {tracemalloc.get_traced_memory()[0] / 2**20:,.0f} MiB"
+        tracemalloc.stop()
+    print(summary)
+
+    for kind, batch in queries(words, args.queries).items():
+        timings = []
+        for query in batch:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"  {kind:8} median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   max {timings[-1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
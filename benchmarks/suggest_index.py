@@ -0,0 +1,77 @@
+"""Build time and per-prefix-length latency of SuggestIndex on a synthetic catalog.
+
+    python -m benchmarks.suggest_index --songs 1000000
+    python -m benchmarks.suggest_index --max-scan 100000000   # no deep precompute
+
+Uses the same fixed-seed catalog as benchmarks.search_index. Prefixes are
+cut from randomly chosen index keys, so common prefixes come up as often
+as users would type them; "scan" is the longest key range a query had to
+rank on the fly. A share of titles (--skew) gets one of a few real-world
+common words, so some 4+ character prefixes ("love", "lovel") cover far
+more keys than the uniform vocabulary alone would produce.
+"""
+import argparse
+import bisect
+import random
+import statistics
+import time
+from benchmarks.search_index import build_catalog
+from business.utils.suggest_index import SuggestIndex
+
+
+COMMON_WORDS = ("Love", "Lovely", "Lover", "Night", "Nights", "Baby", "Heart", "Heartbeat", "Dance", "Dancing")
+
+
+def entries(artists, albums, rows, skew: float, seed: int = 3):
+    rng = random.Random(seed)
+    names = dict(artists)
+    for row in rows:
+        title = row["title"]
+        if rng.random() < skew:
+            title = f"{rng.choice(COMMON_WORDS)} {title}"
+        yield "song", row["song_id"], title, rng.randint(0, 1000), names[row["artist_id"]]
+    yield from (("artist", artist_id, name, rng.randint(0, 5000), None) for artist_id, name in artists)
+    yield from (("album", album_id, title, rng.randint(0, 2000), None) for album_id, title in albums)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500, help="queries per prefix length")
+    parser.add_argument("--precompute-depth", type=int, default=3)
+    parser.add_argument("--max-scan", type=int, default=1000)
+    parser.add_argument("--skew", type=float, default=0.3, help="share of titles with a common word")
+    args = parser.parse_args()
+
+    _, artists, albums, rows = build_catalog(args.songs)
+    index = SuggestIndex(precompute_depth=args.precompute_depth, max_scan=args.max_scan)
+    started = time.perf_counter()
+    index.build(entries(artists, albums, rows, args.skew))
+    stats = index.stats()
+    print(
+        f"{stats['entries']:,} entries, {stats['keys']:,} keys, {stats['precomputed_prefixes']:,} precomputed prefixes: "
+        f"built in {time.perf_counter() - started:.1f}s, ~{stats['approx_memory_bytes'] / 2**20:,.0f} MiB"
+    )
+
+    rng = random.Random(11)
+    for length in range(1, 7):
+        timings, widest = [], 0
+        for _ in range(args.queries):
+            prefix = rng.choice(index.keys)[:length]
+            if (prefix, None) not in index.top:
+                start = bisect.bisect_left(index.keys, prefix)
+                widest = max(widest, bisect.bisect_left(index.keys, prefix + "\uffff", start) - start)
+            started = time.perf_counter()
+            index.suggest(prefix)
+            index.suggest(prefix, kind="song")
+            timings.append((time.perf_counter() - started) * 500)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(
+            f"  {length} chars  median {statistics.median(timings):6.3f} ms   p95 {p95:6.3f} ms   "
+            f"max {timings[-1]:6.3f} ms   scan {widest:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
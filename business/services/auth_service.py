@@ -1,28 +1,30 @@
 import jwt
 import os
+import re
 import secrets
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from typing import Dict, Any
+from sqlalchemy.exc import IntegrityError
 from shared.exceptions import AuthFailureError, ConflictRequestError, NotFoundError
 from data.repositories.user_repository import UserRepository
-from infrastructure.external.email_servive import EmailService
+from infrastructure.external.email_servive import email_service
 from infrastructure.config.database import AsyncSession
+from business.utils.password_hasher import password_hasher
 
 class AuthService:
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        self.email_service = EmailService()
+        self.password_hasher = password_hasher
+        self.email_service = email_service
         self.SECRET_KEY = os.getenv("JWT_SECRET", "your-fallback-secret-key")
         self.ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
         self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
         self.RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("RESET_TOKEN_EXPIRE_MINUTES", "60"))
 
-    def hash_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def hash_password(self, password: str) -> str:
+        return await self.password_hasher.hash(password)
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
     def generate_secure_token(self) -> str:
         return secrets.token_urlsafe(32)
@@ -50,18 +52,22 @@ class AuthService:
         except jwt.JWTError:
             raise AuthFailureError("Invalid token")
 
+    def _conflict_message(self, error: IntegrityError) -> str:
+        message = str(error.orig)
+        # MySQL: "Duplicate entry '...' for key 'users.ix_users_email'", only look at the key name
+        match = re.search(r"for key '([^']+)'", message)
+        key = (match.group(1) if match else message).lower()
+        if "email" in key:
+            return "Email already registered"
+        if "username" in key:
+            return "Username already taken"
+        return "User already exists"
+
     async def register_user(self, db: AsyncSession, username: str, email: str, password: str, full_name: str = None) -> Dict[str, Any]:
         user_repo = UserRepository(db)
-        
-        existing_user = await user_repo.get_by_email(email)
-        if existing_user:
-            raise ConflictRequestError("Email already registered")
-
-        existing_username = await user_repo.get_by_username(username)
-        if existing_username:
-            raise ConflictRequestError("Username already taken")
 
-        hashed_password = self.hash_password(password)
+        # uniqueness is enforced by the email/username unique indexes, see _conflict_message
+        hashed_password = await self.hash_password(password)
 
         user_data = {
             "username": username,
@@ -72,7 +78,10 @@ class AuthService:
             "is_active": True
         }
 
-        user = await user_repo.create(user_data)
+        try:
+            user = await user_repo.create(user_data)
+        except IntegrityError as e:
+            raise ConflictRequestError(self._conflict_message(e))
 
         token_payload = {"user_id": user.id, "email": user.email, "username": user.username}
         access_token = self.create_access_token(token_payload)
@@ -87,8 +96,9 @@ class AuthService:
     async def login_user(self, db: AsyncSession, email: str, password: str) -> Dict[str, Any]:
         user_repo = UserRepository(db)
         user = await user_repo.get_by_email(email)
-        
-        if not user or not self.verify_password(password, user.password):
+        secrets = await user_repo.get_secrets(user.id) if user else None
+
+        if not secrets or not await self.verify_password(password, secrets["password"]):
             raise AuthFailureError("Invalid email or password")
         if not user.is_active:
             raise AuthFailureError("Account has been deactivated")
@@ -131,13 +141,18 @@ class AuthService:
 
             user_repo = UserRepository(db)
             user = await user_repo.get_by_id(user_id)
-            if not user:
+            secrets = await user_repo.get_secrets(user_id) if user else None
+            if not secrets:
                 raise AuthFailureError("Invalid reset token")
 
-            if user.reset_token != reset_token or not user.reset_expiration or user.reset_expiration < datetime.utcnow():
+            if (
+                secrets["reset_token"] != reset_token
+                or not secrets["reset_expiration"]
+                or secrets["reset_expiration"] < datetime.utcnow()
+            ):
                 raise AuthFailureError("Reset token has expired or is invalid")
 
-            hashed_password = self.hash_password(new_password)
+            hashed_password = await self.hash_password(new_password)
             await user_repo.update(user.id, {"password": hashed_password, "reset_token": None, "reset_expiration": None})
 
             try:
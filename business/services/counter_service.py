@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session, object_session
+from data.models.interaction import Comment, Like
+from data.models.music import Song
+from business.utils.counter_aggregator import CounterAggregator
+from infrastructure.cache.redis_pool import REDIS_ERRORS, redis_client
+from infrastructure.config.database import AsyncSession, AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_PENDING_COUNTS = "song_counter_deltas"
+_RECONCILE_LEASE_KEY = "music:counters:reconcile-lease"
+
+COUNTER_RECONCILE_INTERVAL = int(os.getenv("COUNTER_RECONCILE_INTERVAL", "86400"))
+COUNTER_RECONCILE_ENABLED = os.getenv("COUNTER_RECONCILE_ENABLED", "true").lower() == "true"
+# without Redis other workers never learn which batches were recounted and
+# double count their buffered deltas; only opt in when running one process
+COUNTER_RECONCILE_SINGLE_PROCESS = os.getenv("COUNTER_RECONCILE_SINGLE_PROCESS", "false").lower() == "true"
+
+song_counters = CounterAggregator(AsyncSessionLocal, redis=redis_client)
+
+
+# Likes and comments written through the ORM feed the aggregator once their
+# transaction commits. Bulk statements bypass these hooks; reconciliation
+# picks those up.
+
+def _record(target, field: str, delta: int):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_COUNTS, []).append((target.song_id, field, delta))
+
+
+@event.listens_for(Like, "after_insert")
+def _like_inserted(mapper, connection, target):
+    _record(target, "like_count", 1)
+
+
+@event.listens_for(Like, "after_delete")
+def _like_deleted(mapper, connection, target):
+    _record(target, "like_count", -1)
+
+
+@event.listens_for(Comment, "after_insert")
+def _comment_inserted(mapper, connection, target):
+    _record(target, "comment_count", 1)
+
+
+@event.listens_for(Comment, "after_delete")
+def _comment_deleted(mapper, connection, target):
+    _record(target, "comment_count", -1)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for song_id, field, delta in session.info.pop(_PENDING_COUNTS, ()):
+        song_counters.add(song_id, field, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_COUNTS, None)
+
+
+def record_play(song_id: int):
+    song_counters.add(song_id, "play_count")
+
+
+async def reconcile_counters(db: AsyncSession, batch_size: int = 5000, aggregator: CounterAggregator = song_counters) -> int:
+    """Recompute like_count and comment_count from the likes and comments tables.
+
+    Songs are recounted in id batches, one short transaction each. Counts
+    are overwritten, not adjusted, and like/comment deltas still buffered
+    for a batch when it is recounted are discarded by the aggregators, so
+    running it again leaves exact counts alone. A like committed in the
+    milliseconds while its own batch is being updated may still be counted
+    twice until the next run. play_count has no source of truth and is
+    left alone.
+
+    Aggregators in other processes learn the recount times through Redis
+    only; the run is skipped, or stops after the current batch, when a
+    configured Redis is down. A batch recounted right before that is
+    double counted by other workers' buffered deltas until the next run.
+    Run it from one process at a time, and without Redis only when there
+    is a single process (see `reconcile_counters_periodically`).
+    """
+    songs = Song.__table__
+    likes = select(func.count()).where(Like.song_id == songs.c.id).scalar_subquery()
+    comments = select(func.count()).where(Comment.song_id == songs.c.id).scalar_subquery()
+
+    min_id, max_id = (await db.execute(select(func.min(songs.c.id), func.max(songs.c.id)))).one()
+    if max_id is None:
+        return 0
+    if not await aggregator.begin_reconcile(batch_size):
+        logger.warning("Redis is down, skipping song counter reconciliation")
+        return 0
+    for start in range(min_id, max_id + 1, batch_size):
+        # no local flush can write this batch's old deltas in between
+        async with aggregator.lock:
+            started_at = time.time()
+            await db.execute(
+                update(songs)
+                .where(songs.c.id.between(start, start + batch_size - 1))
+                .values(like_count=likes, comment_count=comments)
+            )
+            await db.commit()
+            shared = await aggregator.batch_reconciled(start, started_at)
+        if not shared:
+            # other workers would add their buffered deltas for this batch on
+            # top of the recount; stop before doing the same to the next ones
+            logger.warning(f"Redis went down, song counter reconciliation stopped after song {start + batch_size - 1}")
+            return start + batch_size - 1
+    return max_id
+
+
+async def _acquire_reconcile_lease() -> bool:
+    """One reconciliation per interval across all workers, via SET NX on Redis.
+
+    The lease is left to expire rather than released, so workers waking up
+    later in the same interval skip their run. Without Redis a run would
+    make other processes double count their buffered deltas, so it only
+    happens with COUNTER_RECONCILE_SINGLE_PROCESS=true.
+    """
+    if not redis_client.enabled:
+        return COUNTER_RECONCILE_SINGLE_PROCESS
+    client = redis_client.get()
+    if client is None:
+        return False
+    try:
+        ttl = max(1, int(COUNTER_RECONCILE_INTERVAL * 0.9))
+        return bool(await client.set(_RECONCILE_LEASE_KEY, os.getpid(), nx=True, ex=ttl))
+    except REDIS_ERRORS as e:
+        redis_client.mark_down(e)
+        return False
+
+
+async def flush_counters_periodically():
+    await song_counters.run()
+
+
+async def reconcile_counters_periodically():
+    if not COUNTER_RECONCILE_ENABLED:
+        return
+    if not redis_client.enabled and not COUNTER_RECONCILE_SINGLE_PROCESS:
+        logger.warning(
+            "Song counter reconciliation is off: it needs Redis to share recount times between workers "
+            "(set COUNTER_RECONCILE_SINGLE_PROCESS=true when this is the only process)"
+        )
+        return
+    while True:
+        await asyncio.sleep(COUNTER_RECONCILE_INTERVAL)
+        try:
+            if not await _acquire_reconcile_lease():
+                continue
+            async with AsyncSessionLocal() as db:
+                scanned = await reconcile_counters(db)
+            logger.info(f"Song counters reconciled up to song {scanned}")
+        except Exception as e:
+            logger.error(f"Failed to reconcile song counters: {e}")
@@ -0,0 +1,130 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import httpx
+from business.utils.image_processor import FORMATS, image_processor
+from infrastructure.cache import DiskLRUCache, SingleFlight
+from infrastructure.external.http_client import http_client
+from shared.exceptions import BadRequestError, NotFoundError, ServiceUnavailableError
+
+MEDIA_ROOT = os.path.realpath(os.getenv("MEDIA_ROOT", "media"))
+IMAGE_ALLOWED_HOSTS = {h.strip() for h in os.getenv("IMAGE_ALLOWED_HOSTS", "res.cloudinary.com").split(",") if h.strip()}
+IMAGE_ALLOWED_SIZES = {int(s) for s in os.getenv("IMAGE_ALLOWED_SIZES", "32,48,64,96,128,192,256,384,512").split(",")}
+IMAGE_MAX_SOURCE_BYTES = int(os.getenv("IMAGE_MAX_SOURCE_BYTES", str(20 * 1024 * 1024)))
+
+image_cache = DiskLRUCache(
+    os.getenv("IMAGE_CACHE_DIR", os.path.join(MEDIA_ROOT, "cache", "images")),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))),
+)
+# rendered files live in image_cache; this only joins concurrent renders of one key
+_renders = SingleFlight()
+
+
+@dataclass
+class ResizedImage:
+    src: str
+    width: int
+    height: Optional[int]
+    format: str
+    key: str
+    etag: str
+    media_type: str
+    path: Optional[str] = None
+
+
+class ImageService:
+    def _validate(self, src: str, width: int, height: Optional[int], fmt: str):
+        if fmt not in FORMATS:
+            raise BadRequestError(f"Unsupported format, use one of: {', '.join(FORMATS)}")
+        if width not in IMAGE_ALLOWED_SIZES or (height is not None and height not in IMAGE_ALLOWED_SIZES):
+            # a fixed size set keeps the cache bounded and stops size-sweeping abuse
+            raise BadRequestError(f"Unsupported size, use one of: {', '.join(map(str, sorted(IMAGE_ALLOWED_SIZES)))}")
+
+        parsed = urlparse(src)
+        if parsed.scheme in ("http", "https"):
+            # only fetch from known image hosts: no internal addresses, ports or credentials
+            if parsed.scheme != "https" or parsed.hostname not in IMAGE_ALLOWED_HOSTS or parsed.port or parsed.username:
+                raise BadRequestError("Image source is not allowed")
+        elif parsed.scheme:
+            raise BadRequestError("Image source is not allowed")
+
+    def _local_path(self, src: str) -> str:
+        relative = src.lstrip("/")
+        if relative.startswith("media/"):
+            relative = relative[len("media/"):]
+        path = os.path.realpath(os.path.join(MEDIA_ROOT, relative))
+        if os.path.commonpath([path, MEDIA_ROOT]) != MEDIA_ROOT or not os.path.isfile(path):
+            raise NotFoundError("Image not found")
+        return path
+
+    async def _fetch(self, url: str) -> bytes:
+        client = http_client.get()
+        try:
+            # redirects could point anywhere, so they are not followed
+            async with client.stream("GET", url, follow_redirects=False) as response:
+                if response.status_code == 404:
+                    raise NotFoundError("Image not found")
+                if response.status_code != 200:
+                    raise ServiceUnavailableError("Image origin unavailable")
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > IMAGE_MAX_SOURCE_BYTES:
+                        raise BadRequestError("Image is too large")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except httpx.HTTPError:
+            raise ServiceUnavailableError("Image origin unavailable")
+
+    async def _render(self, image: ResizedImage) -> str:
+        if urlparse(image.src).scheme:
+            data = await self._fetch(image.src)
+        else:
+            path = self._local_path(image.src)
+            if os.path.getsize(path) > IMAGE_MAX_SOURCE_BYTES:
+                raise BadRequestError("Image is too large")
+            data = await asyncio.to_thread(_read_file, path)
+        output = await image_processor.resize(data, image.width, image.height, image.format)
+        return image_cache.set(image.key, output)
+
+    def describe(self, src: str, width: int, height: Optional[int] = None, fmt: str = "webp") -> ResizedImage:
+        """Validate the request and derive its cache key and strong ETag without rendering."""
+        self._validate(src, width, height, fmt)
+
+        # local files are versioned by mtime so replacing one is picked up;
+        # remote (CDN) URLs are treated as immutable
+        source_version = ""
+        if not urlparse(src).scheme:
+            source_version = str(os.stat(self._local_path(src)).st_mtime_ns)
+        key = f"{src}|{source_version}|{width}x{height or ''}|{fmt}"
+        return ResizedImage(
+            src=src,
+            width=width,
+            height=height,
+            format=fmt,
+            key=key,
+            etag=f'"{image_cache.digest(key)[:32]}"',
+            media_type=FORMATS[fmt][1],
+        )
+
+    async def render(self, image: ResizedImage) -> ResizedImage:
+        await image_cache.load()
+        image.path = image_cache.get(image.key)
+        if image.path is None:
+            # a burst of requests for a new thumbnail renders it once
+            image.path = await _renders.run(image.key, lambda: self._render(image))
+        return image
+
+    async def generate_variants(self, source_path: str, name: str) -> List[Dict[str, Any]]:
+        """Upload-time square WebP variants, written to MEDIA_ROOT/images/{name}/."""
+        variants = await image_processor.generate_variants(source_path, os.path.join(MEDIA_ROOT, "images", name))
+        for variant in variants:
+            variant["path"] = os.path.relpath(variant["path"], MEDIA_ROOT)
+        return variants
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,156 @@
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+import httpx
+from data.models.music import Song
+from data.repositories.music_repository import MusicRepository
+from business.utils.audio_processor import AudioJob, audio_processor, read_waveform
+from infrastructure.cache import LRUCache, cache
+from infrastructure.config.database import AsyncSession, AsyncSessionLocal
+from infrastructure.external.http_client import http_client
+from shared.exceptions import NotFoundError, ServiceUnavailableError
+
+MEDIA_ROOT = os.path.realpath(os.getenv("MEDIA_ROOT", "media"))
+SONG_FILE_CACHE_TTL = float(os.getenv("SONG_FILE_CACHE_TTL", "300"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+
+# segments and variant playlists live under a per-encode version directory and
+# never change; only the master playlist is rewritten when a song is re-encoded
+HLS_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HLS_MASTER_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+HLS_MEDIA_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+# decoded waveform levels are a few KB each; keyed by file mtime so a re-ingest
+# is picked up without explicit invalidation
+waveform_cache = LRUCache(maxsize=int(os.getenv("WAVEFORM_CACHE_SIZE", "5000")))
+
+# request headers forwarded to the origin when proxying, and response headers sent back
+PROXY_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+PROXY_RESPONSE_HEADERS = (
+    "content-type", "content-length", "content-range", "accept-ranges", "etag", "last-modified"
+)
+
+
+@dataclass
+class AudioSource:
+    media_type: str
+    path: Optional[str] = None
+    url: Optional[str] = None
+
+    @property
+    def is_local(self) -> bool:
+        return self.path is not None
+
+
+def resolve_media_path(file_url: str) -> Optional[str]:
+    """Map a stored file_url to a file under MEDIA_ROOT, or None if it is not local.
+
+    Accepts "file://..." URLs, "/media/..." style paths and bare relative paths;
+    anything resolving outside MEDIA_ROOT is rejected.
+    """
+    parsed = urlparse(file_url)
+    if parsed.scheme in ("http", "https"):
+        return None
+    relative = parsed.path if parsed.scheme == "file" else file_url
+    relative = relative.lstrip("/")
+    if relative.startswith("media/"):
+        relative = relative[len("media/"):]
+    path = os.path.realpath(os.path.join(MEDIA_ROOT, relative))
+    if os.path.commonpath([path, MEDIA_ROOT]) != MEDIA_ROOT:
+        return None
+    return path
+
+
+@dataclass
+class HlsFile:
+    path: str
+    media_type: str
+    cache_control: str
+
+
+class MusicService:
+    async def _get_file_url(self, db: AsyncSession, song_id: int) -> Optional[str]:
+        async def load():
+            rows = await MusicRepository(db).project([Song.file_url], Song.id == song_id, limit=1)
+            return rows[0]["file_url"] if rows else None
+
+        # every seek is a new Range request, don't hit the database for each one
+        return await cache.get_or_set(f"song:file:{song_id}", load, ttl=SONG_FILE_CACHE_TTL)
+
+    async def get_audio_source(self, db: AsyncSession, song_id: int) -> AudioSource:
+        file_url = await self._get_file_url(db, song_id)
+        if not file_url:
+            raise NotFoundError("Song not found")
+
+        media_type = mimetypes.guess_type(urlparse(file_url).path)[0] or "audio/mpeg"
+        if urlparse(file_url).scheme in ("http", "https"):
+            return AudioSource(media_type=media_type, url=file_url)
+
+        path = resolve_media_path(file_url)
+        if path is None or not os.path.isfile(path):
+            raise NotFoundError("Audio file not found")
+        return AudioSource(media_type=media_type, path=path)
+
+    def get_hls_file(self, song_id: int, name: str) -> HlsFile:
+        root = os.path.realpath(audio_processor.hls_dir(song_id))
+        path = os.path.realpath(os.path.join(root, name))
+        media_type = HLS_MEDIA_TYPES.get(os.path.splitext(path)[1])
+        if media_type is None or os.path.commonpath([path, root]) != root or not os.path.isfile(path):
+            raise NotFoundError("HLS file not found")
+        cache_control = HLS_MASTER_CACHE_CONTROL if path == os.path.join(root, "master.m3u8") else HLS_IMMUTABLE_CACHE_CONTROL
+        return HlsFile(path=path, media_type=media_type, cache_control=cache_control)
+
+    def get_waveform(self, song_id: int, zoom: int = 0) -> Dict[str, Any]:
+        path = audio_processor.waveform_path(song_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            raise NotFoundError("Waveform not available for this song")
+
+        key = (song_id, zoom)
+        cached = waveform_cache.get(key)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached
+        waveform = read_waveform(path, zoom)
+        waveform["mtime"] = mtime
+        waveform["etag"] = f'"{song_id}-{mtime:x}-{waveform["zoom"]}"'
+        waveform_cache.set(key, waveform)
+        return waveform
+
+    async def open_remote_stream(self, url: str, request_headers: Dict[str, str]) -> httpx.Response:
+        """Start a streamed GET to the origin; the caller must close the response."""
+        headers = {name: request_headers[name] for name in PROXY_REQUEST_HEADERS if name in request_headers}
+        client = http_client.get()
+        try:
+            response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+        except httpx.HTTPError:
+            raise ServiceUnavailableError("Audio origin unavailable")
+        if response.status_code >= 500 or response.status_code == 404:
+            await response.aclose()
+            if response.status_code == 404:
+                raise NotFoundError("Audio file not found")
+            raise ServiceUnavailableError("Audio origin unavailable")
+        return response
+
+    async def process_song(self, db: AsyncSession, song_id: int) -> Dict[str, Any]:
+        """Queue probing/transcoding/analysis; ffmpeg reads remote sources directly."""
+        source = await self.get_audio_source(db, song_id)
+        job = audio_processor.submit(song_id, source.path or source.url, on_complete=self._save_audio_metadata)
+        return job.to_dict()
+
+    async def _save_audio_metadata(self, job: AudioJob):
+        # fresh session: the request that queued the job is long gone
+        async with AsyncSessionLocal() as db:
+            song = await MusicRepository(db).get(job.song_id)
+            if song is None:
+                return
+            song.duration = round(job.result["duration"])
+            await db.commit()
+
+    def get_processing_job(self, job_id: str) -> Dict[str, Any]:
+        job = audio_processor.get_job(job_id)
+        if job is None:
+            raise NotFoundError("Processing job not found")
+        return job.to_dict()
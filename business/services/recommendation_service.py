@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from data.models.interaction import Like
+from data.models.playlist import playlist_song_table
+from data.repositories.music_repository import MusicRepository
+from business.utils.recommendation_engine import ItemSimilarityEngine, RecommendationStore
+from infrastructure.cache import cache
+from infrastructure.config.database import AsyncSession, ReadSessionLocal
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_STORE_DIR = os.getenv("RECOMMENDATION_STORE_DIR", "var/recommendations")
+RECOMMENDATION_TOP_N = int(os.getenv("RECOMMENDATION_TOP_N", "100"))
+RECOMMENDATION_REFRESH_INTERVAL = int(os.getenv("RECOMMENDATION_REFRESH_INTERVAL", "3600"))
+# refreshes in between only fold in new likes; unlikes and playlist edits wait for a full one
+RECOMMENDATION_FULL_REFRESH_INTERVAL = int(os.getenv("RECOMMENDATION_FULL_REFRESH_INTERVAL", "86400"))
+# until the first store is written, popular songs come from the like counters
+POPULAR_FALLBACK_CACHE_TTL = int(os.getenv("POPULAR_FALLBACK_CACHE_TTL", "300"))
+RECOMMENDATION_REFRESH_ENABLED = os.getenv("RECOMMENDATION_REFRESH_ENABLED", "true").lower() == "true"
+
+recommendation_store = RecommendationStore(RECOMMENDATION_STORE_DIR)
+
+
+async def _fetch_pairs(db: AsyncSession, query, batch_size: int = 50000) -> Tuple[np.ndarray, np.ndarray]:
+    """Stream two-column integer rows into a pair of numpy arrays."""
+    left: List[np.ndarray] = []
+    right: List[np.ndarray] = []
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions(batch_size):
+        rows = np.asarray(partition, dtype=np.int64).reshape(-1, 2)
+        left.append(rows[:, 0])
+        right.append(rows[:, 1])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def _update(engine: ItemSimilarityEngine, likes: Tuple[np.ndarray, np.ndarray]) -> int:
+    engine.add_likes(*likes)
+    return engine.refresh_dirty()
+
+
+def _build_store_arrays(engine: ItemSimilarityEngine, popular: np.ndarray, top_n: int) -> Dict[str, np.ndarray]:
+    arrays = engine.materialize(top_n)
+    arrays["popular"] = popular
+    return arrays
+
+
+class RecommendationService:
+    def __init__(self, store: RecommendationStore = recommendation_store):
+        self.store = store
+        # kept between refreshes so later ones only fold in new likes
+        self.engine: Optional[ItemSimilarityEngine] = None
+        # highest Like.id the engine has seen
+        self.like_watermark = 0
+
+    async def refresh(self, db: AsyncSession, top_n: int = RECOMMENDATION_TOP_N, full: bool = True) -> str:
+        """Rebuild the similarity engine and write a new store version.
+
+        With full=False, likes added since the previous refresh are folded
+        into the kept engine and only the songs they touch are recomputed.
+        Unlikes, playlist edits and likes committed after a higher like id
+        was already read are only seen by the next full refresh.
+        """
+        loop = asyncio.get_running_loop()
+        watermark = await db.scalar(select(func.max(Like.id))) or 0
+        # similarity + per-user scoring is pure numpy, keep it off the event loop
+        if full or self.engine is None or self.engine.top_n != top_n:
+            likes = await _fetch_pairs(db, select(Like.user_id, Like.song_id).where(Like.id <= watermark))
+            playlist_songs = await _fetch_pairs(db, select(playlist_song_table.c.playlist_id, playlist_song_table.c.song_id))
+            engine = ItemSimilarityEngine(top_n=top_n)
+            await loop.run_in_executor(None, engine.fit, likes, playlist_songs)
+            detail = f"{len(likes[0])} likes"
+        else:
+            engine = self.engine
+            likes = await _fetch_pairs(
+                db, select(Like.user_id, Like.song_id).where(Like.id > self.like_watermark, Like.id <= watermark)
+            )
+            # a failed write below leaves these in the engine; adding them again is a no-op
+            refreshed = await loop.run_in_executor(None, _update, engine, likes)
+            detail = f"{len(likes[0])} new likes, {refreshed} songs recomputed"
+
+        popular_rows = await db.execute(
+            select(Like.song_id).group_by(Like.song_id).order_by(func.count().desc(), Like.song_id).limit(top_n)
+        )
+        popular = np.asarray(popular_rows.scalars().all(), dtype=np.int32)
+        arrays = await loop.run_in_executor(None, _build_store_arrays, engine, popular, top_n)
+        version = await loop.run_in_executor(None, self.store.write, arrays)
+        self.engine, self.like_watermark = engine, watermark
+        logger.info(f"Recommendation store {version} written ({detail})")
+        return version
+
+    async def _hydrate(self, db: AsyncSession, scored: List[Tuple[int, Optional[float]]]) -> List[Dict[str, Any]]:
+        rows = await MusicRepository(db).get_song_rows([song_id for song_id, _ in scored])
+        scores = dict(scored)
+        for row in rows:
+            row["score"] = None if scores[row["id"]] is None else round(scores[row["id"]], 4)
+        return rows
+
+    async def _popular(self, db: AsyncSession, limit: int) -> List[int]:
+        popular = self.store.popular(limit)
+        if popular:
+            return popular
+
+        async def load():
+            return await MusicRepository(db).get_popular_song_ids(limit)
+
+        return await cache.get_or_set(f"recommendations:popular:{limit}", load, ttl=POPULAR_FALLBACK_CACHE_TTL)
+
+    async def get_recommendations(
+        self,
+        db: AsyncSession,
+        user_id: Optional[int] = None,
+        song_id: Optional[int] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        if song_id is not None:
+            scored, source = self.store.similar_songs(song_id, limit), "similar"
+        elif user_id is not None:
+            scored, source = self.store.for_user(user_id, limit), "personalized"
+        else:
+            scored, source = [], "popular"
+
+        if not scored:
+            # cold start (new user / unseen song / store not built yet)
+            scored, source = [(popular_id, None) for popular_id in await self._popular(db, limit)], "popular"
+
+        return {"items": await self._hydrate(db, scored), "source": source}
+
+
+async def refresh_recommendations_periodically():
+    """Rebuild the precomputed store on a schedule; readers keep serving the
+    previous version until the new one is switched in. Only the worker that
+    holds the store's writer lock rebuilds; the others retry for the lock
+    each interval, so one takes over if the writer exits. Every
+    RECOMMENDATION_FULL_REFRESH_INTERVAL the engine is rebuilt from scratch,
+    the refreshes in between only add new likes to it."""
+    if not RECOMMENDATION_REFRESH_ENABLED:
+        return
+    service = RecommendationService()
+    last_full = None
+    while True:
+        if recommendation_store.acquire_writer():
+            full = last_full is None or time.monotonic() - last_full >= RECOMMENDATION_FULL_REFRESH_INTERVAL
+            try:
+                async with ReadSessionLocal() as db:
+                    await service.refresh(db, full=full)
+                if full:
+                    last_full = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to refresh recommendation store: {e}")
+        await asyncio.sleep(RECOMMENDATION_REFRESH_INTERVAL)
@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session, object_session
+from data.models.music import Album, Artist, Song
+from data.models.interaction import Like
+from data.repositories.music_repository import MusicRepository
+from business.utils.search_index import SearchIndex, search_index, tokenize
+from business.utils.suggest_index import SuggestIndex, suggest_index
+from infrastructure.cache.redis_pool import REDIS_ERRORS, redis_client
+from infrastructure.config.database import AsyncSession, ReadSessionLocal
+from shared.constants import CATALOG_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+_PENDING_OPS = "search_index_ops"
+
+SUGGEST_REBUILD_INTERVAL = int(os.getenv("SUGGEST_REBUILD_INTERVAL", "600"))
+SEARCH_REBUILD_INTERVAL = int(os.getenv("SEARCH_REBUILD_INTERVAL", "3600"))
+# how often workers look at CATALOG_VERSION_KEY for imports
+SEARCH_TRIGGER_POLL_INTERVAL = int(os.getenv("SEARCH_TRIGGER_POLL_INTERVAL", "30"))
+
+
+# Keep the in-memory indexes in step with ORM writes. Changes are collected per
+# session during flush and only applied once the transaction commits.
+# Bulk UPDATE/DELETE statements bypass these hooks; the periodic rebuild_index
+# in warm_up_search_index covers them (sooner when CATALOG_VERSION_KEY moves).
+
+def _record(target, op: str, *args: Any):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_OPS, []).append((op, args))
+
+
+@event.listens_for(Song, "after_insert")
+@event.listens_for(Song, "after_update")
+def _song_written(mapper, connection, target):
+    _record(target, "song", target.id, target.title, target.artist_id, target.album_id, target.duration, target.cover_url)
+
+
+@event.listens_for(Song, "after_delete")
+def _song_deleted(mapper, connection, target):
+    _record(target, "remove_song", target.id)
+
+
+@event.listens_for(Artist, "after_insert")
+@event.listens_for(Artist, "after_update")
+def _artist_written(mapper, connection, target):
+    _record(target, "artist", target.id, target.name)
+
+
+@event.listens_for(Album, "after_insert")
+@event.listens_for(Album, "after_update")
+def _album_written(mapper, connection, target):
+    _record(target, "album", target.id, target.title)
+
+
+@event.listens_for(Like, "after_insert")
+def _like_written(mapper, connection, target):
+    _record(target, "like", target.song_id)
+
+
+def _apply_to_index(index: SearchIndex, op: str, args: Tuple[Any, ...]):
+    if op == "song":
+        song_id, title, artist_id, album_id, duration, cover_url = args
+        index.upsert_song(song_id, title, artist_id, album_id, duration=duration, cover_url=cover_url)
+    elif op == "remove_song":
+        index.remove_song(*args)
+    elif op == "artist":
+        index.upsert_artist(*args)
+    elif op == "album":
+        index.upsert_album(*args)
+
+
+def _apply_to_suggestions(index: SuggestIndex, op: str, args: Tuple[Any, ...]):
+    if op == "add":
+        index.add(*args)
+    elif op == "bump":
+        index.bump(*args)
+
+
+def _suggest(op: str, *args: Any):
+    _apply_to_suggestions(suggest_index, op, args)
+    if suggest_index.pending is not None:
+        suggest_index.pending.append((op, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    ops = session.info.pop(_PENDING_OPS, ())
+    for op, args in ops:
+        if op == "like":
+            continue
+        _apply_to_index(search_index, op, args)
+        if search_index.pending is not None:
+            search_index.pending.append((op, args))
+        if op == "song":
+            _suggest("add", "song", args[0], args[1], 0.0, search_index.artists.get(args[2]))
+        elif op in ("artist", "album"):
+            _suggest("add", op, *args)
+    # after the adds: the flush may insert a like before the song it refers to.
+    # Renames and deletes are picked up by the periodic suggest rebuild.
+    for op, args in ops:
+        if op != "like":
+            continue
+        song = search_index.songs.get(args[0], {})
+        _suggest("bump", "song", args[0])
+        if song.get("artist_id") is not None:
+            _suggest("bump", "artist", song["artist_id"])
+        if song.get("album_id") is not None:
+            _suggest("bump", "album", song["album_id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_OPS, None)
+
+
+class SearchService:
+    def __init__(self, index: SearchIndex = search_index, suggestions: SuggestIndex = suggest_index):
+        self.index = index
+        self.suggestions = suggestions
+
+    async def rebuild_index(self, db: AsyncSession, batch_size: int = 5000) -> int:
+        """Build a fresh index from the database and swap it in.
+
+        Writes committed while the build runs still reach the live index and
+        are also buffered; they are replayed onto the fresh index right before
+        the swap, so nothing committed after the snapshot was read is lost.
+        Replay and swap run without yielding to the event loop.
+        """
+        self.index.pending = []
+        try:
+            artists = (await db.execute(select(Artist.id, Artist.name))).all()
+            albums = (await db.execute(select(Album.id, Album.title))).all()
+
+            repo = MusicRepository(db)
+            query = select(Song.id, Song.title, Song.artist_id, Song.album_id, Song.duration, Song.cover_url)
+            songs: List[Dict[str, Any]] = []
+            after = None
+            while True:
+                rows, after = await repo.paginate_rows(query, after=after, limit=batch_size)
+                songs.extend(
+                    {
+                        "song_id": row["id"],
+                        "title": row["title"],
+                        "artist_id": row["artist_id"],
+                        "album_id": row["album_id"],
+                        "duration": row["duration"],
+                        "cover_url": row["cover_url"],
+                    }
+                    for row in rows
+                )
+                if after is None:
+                    break
+
+            fresh = SearchIndex()
+            # tokenizing the whole catalog is CPU bound, keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, fresh.load, artists, albums, songs)
+            # upserts and removals are idempotent, so replaying a write the
+            # snapshot already saw is harmless
+            for op, args in self.index.pending:
+                _apply_to_index(fresh, op, args)
+            replayed = len(self.index.pending)
+            fresh.ready = True
+            self.index.swap(fresh)
+        finally:
+            self.index.pending = None
+        logger.info(f"Search index built with {len(songs)} songs, {replayed} writes replayed")
+        return len(songs)
+
+    async def rebuild_suggestions(self, db: AsyncSession, batch_size: int = 5000) -> int:
+        """Rebuild the suggest index from like counts and swap it in.
+
+        Like rebuild_index, adds and bumps that hit the live index during the
+        build are buffered and replayed onto the fresh one before the swap.
+        A like whose counter flush lands before its song's row is read gets
+        counted twice until the next rebuild; weights only rank suggestions.
+        """
+        self.suggestions.pending = []
+        try:
+            # popularity = like count; artists and albums get the sum over their songs
+            artists = dict((await db.execute(select(Artist.id, Artist.name))).all())
+            albums = dict((await db.execute(select(Album.id, Album.title))).all())
+            artist_weights: Dict[int, float] = {}
+            album_weights: Dict[int, float] = {}
+
+            repo = MusicRepository(db)
+            query = select(Song.id, Song.title, Song.artist_id, Song.album_id, Song.like_count)
+            entries = []
+            after = None
+            while True:
+                rows, after = await repo.paginate_rows(query, after=after, limit=batch_size)
+                for row in rows:
+                    weight = row["like_count"]
+                    entries.append(("song", row["id"], row["title"], weight, artists.get(row["artist_id"])))
+                    if row["artist_id"] is not None:
+                        artist_weights[row["artist_id"]] = artist_weights.get(row["artist_id"], 0) + weight
+                    if row["album_id"] is not None:
+                        album_weights[row["album_id"]] = album_weights.get(row["album_id"], 0) + weight
+                if after is None:
+                    break
+
+            entries.extend(("artist", artist_id, name, artist_weights.get(artist_id, 0), None) for artist_id, name in artists.items())
+            entries.extend(("album", album_id, title, album_weights.get(album_id, 0), None) for album_id, title in albums.items())
+
+            fresh = SuggestIndex(
+                top_k=self.suggestions.top_k,
+                precompute_depth=self.suggestions.precompute_depth,
+                max_scan=self.suggestions.max_scan,
+            )
+            await asyncio.get_running_loop().run_in_executor(None, fresh.build, entries)
+            # adds are skipped for entries the snapshot already has
+            for op, args in self.suggestions.pending:
+                _apply_to_suggestions(fresh, op, args)
+            replayed = len(self.suggestions.pending)
+            self.suggestions.swap(fresh)
+        finally:
+            self.suggestions.pending = None
+        logger.info(f"Suggest index built with {len(entries)} entries, {replayed} writes replayed")
+        return len(entries)
+
+    def suggest(self, query: str, limit: int = 10, kind: Optional[str] = None) -> Dict[str, Any]:
+        return {"items": self.suggestions.suggest(query, limit=limit, kind=kind)}
+
+    async def _fulltext_search(self, db: AsyncSession, query: str, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        terms = " ".join(f"{token}*" for token in tokenize(query))
+        matches = (Song.title.match(terms), Artist.name.match(terms), Album.title.match(terms))
+        score = (
+            func.coalesce(matches[0], 0) * 3
+            + func.coalesce(matches[1], 0) * 2
+            + func.coalesce(matches[2], 0)
+        ).label("score")
+
+        base = (
+            select(
+                Song.id,
+                Song.title,
+                Song.artist_id,
+                Song.album_id,
+                Song.duration,
+                Song.cover_url,
+                Artist.name.label("artist_name"),
+                Album.title.label("album_title"),
+                score,
+            )
+            .outerjoin(Artist, Song.artist_id == Artist.id)
+            .outerjoin(Album, Song.album_id == Album.id)
+            .where(or_(*matches))
+        )
+        result = await db.execute(base.order_by(score.desc(), Song.id).offset(offset).limit(limit))
+        items = [dict(row) for row in result.mappings().all()]
+
+        total = await db.execute(select(func.count()).select_from(base.subquery()))
+        return items, total.scalar_one()
+
+    async def search(self, db: AsyncSession, query: str, page: int = 1, size: int = 20) -> Dict[str, Any]:
+        offset = (page - 1) * size
+        if not tokenize(query):
+            items, total = [], 0
+        elif self.index.ready:
+            items, total = self.index.search(query, offset=offset, limit=size)
+        else:
+            # index still warming up: let MySQL FULLTEXT answer
+            items, total = await self._fulltext_search(db, query, offset, size)
+
+        return {"items": items, "page": page, "size": size, "total": total}
+
+
+async def _catalog_version() -> Optional[bytes]:
+    client = redis_client.get()
+    if client is None:
+        return None
+    try:
+        return await client.get(CATALOG_VERSION_KEY)
+    except REDIS_ERRORS as e:
+        redis_client.mark_down(e)
+        return None
+
+
+async def warm_up_search_index():
+    """Build the indexes in the background at startup and keep them fresh.
+
+    Search uses FULLTEXT until its index is ready. The search index is
+    rebuilt every SEARCH_REBUILD_INTERVAL seconds, and within
+    SEARCH_TRIGGER_POLL_INTERVAL of a bulk import bumping CATALOG_VERSION_KEY
+    (Redis only); suggestions every SUGGEST_REBUILD_INTERVAL.
+
+    Both indexes live in this process. ORM writes reach the indexes of the
+    worker that committed them only; other uvicorn workers see them at
+    their next rebuild.
+    """
+    service = SearchService()
+    search_due = suggest_due = 0.0
+    version = None
+    while True:
+        now = time.monotonic()
+        current = await _catalog_version()
+        if now >= search_due or current != version:
+            try:
+                async with ReadSessionLocal() as db:
+                    await service.rebuild_index(db)
+                version = current
+            except Exception as e:
+                logger.error(f"Failed to build search index, falling back to FULLTEXT: {e}")
+            search_due = now + SEARCH_REBUILD_INTERVAL
+        if now >= suggest_due:
+            try:
+                async with ReadSessionLocal() as db:
+                    await service.rebuild_suggestions(db)
+            except Exception as e:
+                logger.error(f"Failed to rebuild suggest index: {e}")
+            suggest_due = now + SUGGEST_REBUILD_INTERVAL
+        await asyncio.sleep(SEARCH_TRIGGER_POLL_INTERVAL)
@@ -0,0 +1,532 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+import uuid
+import wave
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from shared.exceptions import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE = os.getenv("FFPROBE_BINARY", "ffprobe")
+DEFAULT_BITRATES = tuple(int(b) for b in os.getenv("AUDIO_BITRATES", "64,128,256").split(","))
+ANALYSIS_SAMPLE_RATE = 22050
+WAVEFORM_BASE_POINTS = 256
+WAVEFORM_LEVELS = 6
+WAVEFORM_BITS = int(os.getenv("WAVEFORM_BITS", "8"))
+WAVEFORM_MAGIC = b"WAVP"
+# magic, version, bits per value, level count, duration (ms)
+WAVEFORM_HEADER = struct.Struct("<4sBBHI")
+# per level: points, byte offset of its data
+WAVEFORM_LEVEL = struct.Struct("<II")
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+HLS_KEEP_VERSIONS = 2
+
+
+class AudioProcessingError(Exception):
+    pass
+
+
+# -- worker-side functions (run inside the process pool, must stay picklable) --
+
+def _run(command: Sequence[str], timeout: float = 600) -> bytes:
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=timeout, check=False)
+    except FileNotFoundError:
+        raise AudioProcessingError(f"{command[0]} is not installed")
+    except subprocess.TimeoutExpired:
+        raise AudioProcessingError(f"{command[0]} timed out")
+    if result.returncode != 0:
+        raise AudioProcessingError(result.stderr.decode(errors="replace").strip()[-500:])
+    return result.stdout
+
+
+def _is_wav(source: str) -> bool:
+    return source.lower().endswith(".wav") and os.path.isfile(source)
+
+
+def probe(source: str) -> Dict[str, Any]:
+    """Duration (seconds), bitrate (kbps) and stream format of a file or URL."""
+    if shutil.which(FFPROBE) is None and _is_wav(source):
+        # PCM WAV can be read without ffmpeg (handy for development machines)
+        with wave.open(source) as wav:
+            rate, channels, width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+            return {
+                "duration": wav.getnframes() / rate,
+                "bitrate": rate * channels * width * 8 // 1000,
+                "sample_rate": rate,
+                "channels": channels,
+                "codec": "pcm",
+                "format": "wav",
+            }
+
+    output = _run([
+        FFPROBE, "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", "-select_streams", "a:0", source,
+    ])
+    info = json.loads(output)
+    if not info.get("streams"):
+        raise AudioProcessingError("No audio stream found")
+    stream, fmt = info["streams"][0], info.get("format", {})
+    duration = float(stream.get("duration") or fmt.get("duration") or 0)
+    bitrate = int(stream.get("bit_rate") or fmt.get("bit_rate") or 0) // 1000
+    return {
+        "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": int(stream.get("sample_rate") or 0),
+        "channels": int(stream.get("channels") or 0),
+        "codec": stream.get("codec_name"),
+        "format": fmt.get("format_name"),
+    }
+
+
+def transcode(source: str, output_dir: str, bitrates: Sequence[int]) -> List[Dict[str, Any]]:
+    """Encode AAC renditions at every bitrate from a single decode of the source."""
+    if not bitrates:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=output_dir, prefix=".tmp-")
+    try:
+        command = [FFMPEG, "-nostdin", "-v", "error", "-y", "-i", source]
+        for bitrate in bitrates:
+            command += [
+                "-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", f"{bitrate}k", "-ac", "2",
+                "-movflags", "+faststart", os.path.join(staging, f"{bitrate}k.m4a"),
+            ]
+        _run(command)
+
+        renditions = []
+        for bitrate in bitrates:
+            name = f"{bitrate}k.m4a"
+            os.replace(os.path.join(staging, name), os.path.join(output_dir, name))
+            renditions.append({
+                "bitrate": bitrate,
+                "path": os.path.join(output_dir, name),
+                "size": os.path.getsize(os.path.join(output_dir, name)),
+            })
+        return renditions
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _hls_master(version: str, bitrates: Sequence[int]) -> str:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:6", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for bitrate in sorted(bitrates):
+        # BANDWIDTH is peak bits/s; leave room for MPEG-TS container overhead
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={int(bitrate * 1000 * 1.1)},CODECS="mp4a.40.2"')
+        lines.append(f"{version}/{bitrate}k/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def segment_hls(source: str, output_dir: str, bitrates: Sequence[int], segment_seconds: int = HLS_SEGMENT_SECONDS) -> Dict[str, Any]:
+    """Package the track as VOD HLS with one AAC variant per bitrate.
+
+    Segments go into a new version directory, so every segment/variant URL is
+    immutable and can be cached forever; only master.m3u8 is rewritten (via
+    an atomic rename) to point at the newest version.
+    """
+    if not bitrates:
+        return {}
+    version = f"v{int(time.time() * 1000)}"
+    os.makedirs(output_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=output_dir, prefix=".tmp-")
+    try:
+        command = [FFMPEG, "-nostdin", "-v", "error", "-y", "-i", source]
+        for _ in bitrates:
+            command += ["-map", "0:a:0"]
+        for index, bitrate in enumerate(bitrates):
+            command += [f"-c:a:{index}", "aac", f"-b:a:{index}", f"{bitrate}k"]
+        command += [
+            "-vn", "-ac", "2",
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_flags", "independent_segments",
+            "-hls_segment_filename", os.path.join(staging, "%v", "seg_%05d.ts"),
+            "-var_stream_map", " ".join(f"a:{index},name:{bitrate}k" for index, bitrate in enumerate(bitrates)),
+            os.path.join(staging, "%v", "index.m3u8"),
+        ]
+        _run(command)
+        os.replace(staging, os.path.join(output_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    master = os.path.join(output_dir, "master.m3u8")
+    with open(f"{master}.tmp", "w") as f:
+        f.write(_hls_master(version, bitrates))
+    os.replace(f"{master}.tmp", master)
+
+    # keep the previous version for players that are mid-song
+    versions = sorted(d for d in os.listdir(output_dir) if d.startswith("v"))
+    for old in versions[:-HLS_KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(output_dir, old), ignore_errors=True)
+    return {"version": version, "variants": [f"{bitrate}k" for bitrate in bitrates], "segment_seconds": segment_seconds}
+
+
+def decode(source: str, sample_rate: int = ANALYSIS_SAMPLE_RATE) -> np.ndarray:
+    """Decode to mono float32 samples in [-1, 1]."""
+    if shutil.which(FFMPEG) is None and _is_wav(source):
+        with wave.open(source) as wav:
+            width, channels = wav.getsampwidth(), wav.getnchannels()
+            if width not in (1, 2, 4):
+                raise AudioProcessingError(f"Unsupported WAV sample width {width}")
+            frames = wav.readframes(wav.getnframes())
+        if width == 1:
+            samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+        else:
+            dtype = np.int16 if width == 2 else np.int32
+            samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+        # analysis tolerates the source sample rate, no resampling needed
+        return samples.reshape(-1, channels).mean(axis=1)
+
+    output = _run([
+        FFMPEG, "-nostdin", "-v", "error", "-i", source,
+        "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-",
+    ])
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def _k_weighting(sample_rate: int):
+    """ITU-R BS.1770 K-weighting (high shelf + high-pass) as RBJ biquads for any rate."""
+    w0 = 2 * np.pi * 1500.0 / sample_rate
+    gain = 10 ** (4.0 / 40)
+    alpha = np.sin(w0) / (2 * (1 / np.sqrt(2)))
+    root = 2 * np.sqrt(gain) * alpha
+    shelf = (
+        [gain * ((gain + 1) + (gain - 1) * np.cos(w0) + root),
+         -2 * gain * ((gain - 1) + (gain + 1) * np.cos(w0)),
+         gain * ((gain + 1) + (gain - 1) * np.cos(w0) - root)],
+        [(gain + 1) - (gain - 1) * np.cos(w0) + root,
+         2 * ((gain - 1) - (gain + 1) * np.cos(w0)),
+         (gain + 1) - (gain - 1) * np.cos(w0) - root],
+    )
+
+    w0 = 2 * np.pi * 38.0 / sample_rate
+    alpha = np.sin(w0) / (2 * 0.5)
+    highpass = (
+        [(1 + np.cos(w0)) / 2, -(1 + np.cos(w0)), (1 + np.cos(w0)) / 2],
+        [1 + alpha, -2 * np.cos(w0), 1 - alpha],
+    )
+    return shelf, highpass
+
+
+def loudness(samples: np.ndarray, sample_rate: int) -> Dict[str, Optional[float]]:
+    """Gated integrated loudness (LUFS, mono approximation of BS.1770) and peak."""
+    from scipy.signal import lfilter
+
+    if samples.size == 0:
+        return {"integrated_lufs": None, "peak_dbfs": None}
+    peak = float(np.max(np.abs(samples)))
+    peak_dbfs = round(float(20 * np.log10(peak)), 2) if peak > 0 else None
+
+    (b1, a1), (b2, a2) = _k_weighting(sample_rate)
+    weighted = lfilter(b2, a2, lfilter(b1, a1, samples))
+
+    # 400 ms blocks with 75% overlap, via cumulative sums instead of a loop
+    block, step = int(0.4 * sample_rate), int(0.1 * sample_rate)
+    if weighted.size < block:
+        return {"integrated_lufs": None, "peak_dbfs": peak_dbfs}
+    energy = np.concatenate([[0.0], np.cumsum(weighted.astype(np.float64) ** 2)])
+    starts = np.arange(0, weighted.size - block + 1, step)
+    power = (energy[starts + block] - energy[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10 * np.log10(power)
+    gated = power[block_loudness > -70]
+    if gated.size == 0:
+        return {"integrated_lufs": None, "peak_dbfs": peak_dbfs}
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) - 10
+    gated = power[block_loudness > max(-70, relative_gate)]
+    integrated = -0.691 + 10 * np.log10(gated.mean())
+    return {"integrated_lufs": round(float(integrated), 2), "peak_dbfs": peak_dbfs}
+
+
+def peaks(samples: np.ndarray, points: int) -> np.ndarray:
+    """(points, 2) array of per-bucket min and max amplitude, float32 in [-1, 1]."""
+    if samples.size == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+    points = min(points, samples.size)
+    bucket = -(-samples.size // points)
+    # pad with the last sample so the tail bucket doesn't gain a fake zero
+    padded = np.pad(samples, (0, bucket * points - samples.size), mode="edge").reshape(points, bucket)
+    return np.clip(np.stack([padded.min(axis=1), padded.max(axis=1)], axis=1), -1.0, 1.0)
+
+
+def waveform_levels(samples: np.ndarray, base_points: int = WAVEFORM_BASE_POINTS, levels: int = WAVEFORM_LEVELS) -> List[np.ndarray]:
+    """Zoom levels 0..levels-1 with base_points * 2**level min/max pairs each.
+
+    Only the finest level is computed from the samples; every coarser level
+    folds adjacent pairs of the one above it.
+    """
+    finest = peaks(samples, base_points << (levels - 1))
+    result = [finest]
+    for _ in range(levels - 1):
+        current = result[-1]
+        if len(current) < 2:
+            break
+        even = current[: len(current) // 2 * 2].reshape(-1, 2, 2)
+        result.append(np.stack([even[:, :, 0].min(axis=1), even[:, :, 1].max(axis=1)], axis=1))
+    return result[::-1]
+
+
+def write_waveform(path: str, levels: Sequence[np.ndarray], duration: float, bits: int = WAVEFORM_BITS):
+    """Store the levels as interleaved (min, max) int8/int16 values behind a small index."""
+    if bits not in (8, 16):
+        raise ValueError("bits must be 8 or 16")
+    dtype, scale = (np.int8, 127) if bits == 8 else (np.int16, 32767)
+    blobs = [np.round(level * scale).astype(dtype).tobytes() for level in levels]
+
+    offset = WAVEFORM_HEADER.size + WAVEFORM_LEVEL.size * len(levels)
+    index = []
+    for level, blob in zip(levels, blobs):
+        index.append(WAVEFORM_LEVEL.pack(len(level), offset))
+        offset += len(blob)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(WAVEFORM_HEADER.pack(WAVEFORM_MAGIC, 1, bits, len(levels), int(duration * 1000)))
+        f.write(b"".join(index))
+        f.write(b"".join(blobs))
+    os.replace(f"{path}.tmp", path)
+
+
+def read_waveform(path: str, zoom: int) -> Dict[str, Any]:
+    """Read one zoom level (clamped to the available range) without loading the others."""
+    with open(path, "rb") as f:
+        magic, version, bits, level_count, duration_ms = WAVEFORM_HEADER.unpack(f.read(WAVEFORM_HEADER.size))
+        if magic != WAVEFORM_MAGIC or version != 1:
+            raise AudioProcessingError("Unrecognized waveform file")
+        zoom = max(0, min(zoom, level_count - 1))
+        f.seek(WAVEFORM_HEADER.size + WAVEFORM_LEVEL.size * zoom)
+        points, offset = WAVEFORM_LEVEL.unpack(f.read(WAVEFORM_LEVEL.size))
+        f.seek(offset)
+        data = f.read(points * 2 * bits // 8)
+    return {
+        "zoom": zoom,
+        "levels": level_count,
+        "bits": bits,
+        "points": points,
+        "duration": duration_ms / 1000,
+        "data": data,
+    }
+
+
+def process_audio(
+    source: str,
+    output_dir: str,
+    bitrates: Sequence[int] = DEFAULT_BITRATES,
+    hls_dir: Optional[str] = None,
+    waveform_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """Full ingest for one track: probe, transcode, segment for HLS, decode and analyze."""
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    info = probe(source)
+    timings["probe"] = time.perf_counter() - started
+
+    # never upscale: renditions above the source bitrate only waste space
+    targets = [b for b in bitrates if not info["bitrate"] or b <= max(info["bitrate"], min(bitrates))]
+    started = time.perf_counter()
+    renditions = transcode(source, output_dir, targets) if shutil.which(FFMPEG) else []
+    timings["transcode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hls = segment_hls(source, hls_dir, targets) if hls_dir and shutil.which(FFMPEG) else {}
+    timings["segment"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    samples = decode(source)
+    sample_rate = ANALYSIS_SAMPLE_RATE if shutil.which(FFMPEG) else info["sample_rate"]
+    analysis = loudness(samples, sample_rate)
+    if not info["duration"] and sample_rate:
+        info["duration"] = samples.size / sample_rate
+    if waveform_path:
+        write_waveform(waveform_path, waveform_levels(samples), info["duration"])
+    timings["analyze"] = time.perf_counter() - started
+
+    return {
+        **info,
+        **analysis,
+        "renditions": renditions,
+        "hls": hls,
+        "waveform": bool(waveform_path),
+        "timings": {step: round(seconds, 3) for step, seconds in timings.items()},
+    }
+
+
+# -- API side ------------------------------------------------------------------
+
+@dataclass
+class AudioJob:
+    id: str
+    song_id: int
+    source: str
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = None
+        if self.result is not None:
+            result = dict(self.result)
+            result["renditions"] = [
+                {k: v for k, v in rendition.items() if k != "path"} for rendition in result["renditions"]
+            ]
+        return {
+            "job_id": self.id,
+            "song_id": self.song_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": result,
+            "error": self.error,
+        }
+
+
+class AudioProcessor:
+    """Runs ingest jobs on a process pool and keeps their status in memory.
+
+    ffmpeg runs as a subprocess of the pool workers and the NumPy analysis
+    runs inside them, so nothing CPU bound touches the event loop. At most
+    `max_pending` jobs may be queued or running; beyond that submissions are
+    refused with a 503. A job is "queued" until one of the `max_workers`
+    pool slots is free and "running" once it is handed to a worker. Finished
+    jobs are kept for `history` entries.
+
+    Job state lives in this process only. With several API workers a status
+    poll that lands on a worker other than the one that accepted the job
+    gets a 404, so route polls back to the same worker (or run one).
+    """
+
+    def __init__(
+        self,
+        media_root: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        history: int = 1000
+    ):
+        self.media_root = media_root or os.path.realpath(os.getenv("MEDIA_ROOT", "media"))
+        self.max_workers = max_workers or int(os.getenv("AUDIO_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        self.max_pending = max_pending or int(os.getenv("AUDIO_MAX_PENDING", str(self.max_workers * 8)))
+        self.history = history
+        self.jobs: "OrderedDict[str, AudioJob]" = OrderedDict()
+        self._active_by_song: Dict[int, str] = {}
+        self._tasks: set = set()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # one per pool worker, so a job handed to the pool starts right away;
+        # created lazily so it binds to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def output_dir(self, song_id: int) -> str:
+        return os.path.join(self.media_root, "transcoded", str(song_id))
+
+    def hls_dir(self, song_id: int) -> str:
+        return os.path.join(self.media_root, "hls", str(song_id))
+
+    def waveform_path(self, song_id: int) -> str:
+        return os.path.join(self.media_root, "waveforms", f"{song_id}.bin")
+
+    @property
+    def pending(self) -> int:
+        return len(self._active_by_song)
+
+    def get_job(self, job_id: str) -> Optional[AudioJob]:
+        return self.jobs.get(job_id)
+
+    async def run_in_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+    def submit(
+        self,
+        song_id: int,
+        source: str,
+        on_complete: Optional[Callable[[AudioJob], Awaitable[None]]] = None
+    ) -> AudioJob:
+        active = self._active_by_song.get(song_id)
+        if active is not None:
+            return self.jobs[active]
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableError("Audio processing queue is full, please try again later")
+
+        job = AudioJob(id=uuid.uuid4().hex, song_id=song_id, source=source)
+        self.jobs[job.id] = job
+        self._active_by_song[song_id] = job.id
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.active:
+                break
+            self.jobs.popitem(last=False)
+
+        task = asyncio.create_task(self._execute(job, on_complete))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _execute(self, job: AudioJob, on_complete: Optional[Callable[[AudioJob], Awaitable[None]]]):
+        try:
+            async with self.slots:
+                job.status, job.started_at = "running", time.time()
+                job.result = await self.run_in_pool(
+                    process_audio,
+                    job.source,
+                    self.output_dir(job.song_id),
+                    DEFAULT_BITRATES,
+                    self.hls_dir(job.song_id),
+                    self.waveform_path(job.song_id),
+                )
+            if on_complete is not None:
+                await on_complete(job)
+            job.status = "done"
+        except Exception as e:
+            logger.error(f"Audio job {job.id} for song {job.song_id} failed: {e}")
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+            self._active_by_song.pop(job.song_id, None)
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+audio_processor = AudioProcessor()
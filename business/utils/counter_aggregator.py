@@ -0,0 +1,179 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+from sqlalchemy import bindparam, update
+from data.models.music import Song
+from infrastructure.cache.redis_pool import REDIS_ERRORS, RedisClient
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("like_count", "comment_count", "play_count")
+
+_RECONCILE_STATE_KEY = "music:counters:reconciled"
+
+_songs = Song.__table__
+# one statement for every counter; executemany sends a row per song
+_FLUSH_STATEMENT = (
+    update(_songs)
+    .where(_songs.c.id == bindparam("song"))
+    .values(
+        like_count=_songs.c.like_count + bindparam("likes"),
+        comment_count=_songs.c.comment_count + bindparam("comments"),
+        play_count=_songs.c.play_count + bindparam("plays"),
+    )
+)
+
+
+class CounterAggregator:
+    """Write-behind buffer for the denormalized song counters.
+
+    Increments are summed in memory per song and written by `flush` as one
+    batched `SET x = x + delta` UPDATE, so a burst of likes or plays on a
+    popular song costs one row update per interval instead of one per
+    event. Deltas of a failed flush are put back for the next one.
+
+    Like and comment deltas keep the time they were recorded. Reconciliation
+    overwrites those counters with exact counts one id batch at a time and
+    publishes each batch's first id and start time; a flush drops the
+    like/comment deltas recorded before the batch of their song was
+    recounted, since the recount already includes them. Other workers only
+    see those times through Redis: without it (or while it is down) their
+    buffered deltas are added on top of the recount, which is why the
+    periodic reconcile only runs without Redis when told this is the only
+    process. Times are wall-clock, so workers' clocks need to agree to
+    within a flush interval or so.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        batch_size: int = 1000,
+        redis: Optional[RedisClient] = None
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval or float(os.getenv("COUNTER_FLUSH_INTERVAL", "5"))
+        self.max_pending = max_pending or int(os.getenv("COUNTER_MAX_PENDING_SONGS", "10000"))
+        self.batch_size = batch_size
+        self.redis = redis
+        self.lock = asyncio.Lock()
+        self._plays: Dict[int, int] = {}
+        # song -> [(recorded_at, field index, delta)] for likes and comments
+        self._changes: Dict[int, List[Tuple[float, int, int]]] = {}
+        self._full = asyncio.Event()
+        # last reconciliation run: id batch size and [first id, start time] per
+        # recounted batch, in id order
+        self._reconciled: Dict[str, Any] = {"batch_size": 0, "batches": []}
+
+    def add(self, song_id: int, field: str, delta: int = 1):
+        if song_id not in self._plays and song_id not in self._changes and self._size() + 1 >= self.max_pending:
+            # don't wait for the timer once the buffer is large
+            self._full.set()
+        if field == "play_count":
+            self._plays[song_id] = self._plays.get(song_id, 0) + delta
+        else:
+            self._changes.setdefault(song_id, []).append((time.time(), COUNTER_FIELDS.index(field), delta))
+
+    def _size(self) -> int:
+        return len(self._plays) + len(self._changes)
+
+    # -- reconciliation bookkeeping ----------------------------------------------
+
+    async def _load_reconciled(self):
+        client = self.redis.get() if self.redis is not None else None
+        if client is None:
+            return
+        try:
+            data = await client.get(_RECONCILE_STATE_KEY)
+        except REDIS_ERRORS as e:
+            self.redis.mark_down(e)
+            return
+        if data is not None:
+            self._reconciled = orjson.loads(data)
+
+    async def begin_reconcile(self, batch_size: int) -> bool:
+        """Start a run; False when a configured Redis can't share it with other workers."""
+        self._reconciled = {"batch_size": batch_size, "batches": []}
+        return await self._publish_reconciled()
+
+    async def batch_reconciled(self, start: int, started_at: float) -> bool:
+        """Record that the batch from id `start` was recounted from a snapshot taken after `started_at`."""
+        self._reconciled["batches"].append([start, started_at])
+        return await self._publish_reconciled()
+
+    async def _publish_reconciled(self) -> bool:
+        if self.redis is None or not self.redis.enabled:
+            return True
+        client = self.redis.get()
+        if client is None:
+            return False
+        try:
+            await client.set(_RECONCILE_STATE_KEY, orjson.dumps(self._reconciled), ex=7 * 86400)
+            return True
+        except REDIS_ERRORS as e:
+            self.redis.mark_down(e)
+            return False
+
+    def _recounted_at(self, song_id: int) -> float:
+        batches = self._reconciled["batches"]
+        position = bisect.bisect_right(batches, [song_id, float("inf")]) - 1
+        if position < 0:
+            return 0.0
+        start, started_at = batches[position]
+        return started_at if song_id < start + self._reconciled["batch_size"] else 0.0
+
+    # -- flushing ----------------------------------------------------------------
+
+    async def flush(self) -> int:
+        # serialized, so deltas put back by a failed flush are never written twice;
+        # reconciliation holds the same lock while it recounts a batch
+        async with self.lock:
+            plays, self._plays = self._plays, {}
+            changes, self._changes = self._changes, {}
+            try:
+                await self._load_reconciled()
+                totals: Dict[int, List[int]] = {song_id: [0, 0, count] for song_id, count in plays.items()}
+                for song_id, events in changes.items():
+                    recounted_at = self._recounted_at(song_id)
+                    for recorded_at, index, delta in events:
+                        if recorded_at >= recounted_at:
+                            totals.setdefault(song_id, [0, 0, 0])[index] += delta
+                rows = [
+                    {"song": song_id, "likes": likes, "comments": comments, "plays": plays}
+                    # fixed row order keeps concurrent flushes from deadlocking
+                    for song_id, (likes, comments, plays) in sorted(totals.items())
+                    if likes or comments or plays
+                ]
+                if not rows:
+                    return 0
+                async with self.session_factory() as db:
+                    for start in range(0, len(rows), self.batch_size):
+                        await db.execute(_FLUSH_STATEMENT, rows[start:start + self.batch_size])
+                    await db.commit()
+                return len(rows)
+            except BaseException:
+                for song_id, count in plays.items():
+                    self._plays[song_id] = self._plays.get(song_id, 0) + count
+                for song_id, events in changes.items():
+                    self._changes.setdefault(song_id, []).extend(events)
+                raise
+
+    async def run(self):
+        """Flush every `flush_interval` seconds, or sooner when the buffer fills."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                flushed = await self.flush()
+                if flushed:
+                    logger.debug(f"Flushed counters for {flushed} songs")
+            except Exception as e:
+                logger.error(f"Failed to flush song counters, will retry: {e}")
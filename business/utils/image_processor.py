@@ -0,0 +1,142 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from PIL import Image, ImageOps
+from shared.exceptions import BadRequestError, ServiceUnavailableError
+
+VARIANT_SIZES = tuple(int(s) for s in os.getenv("IMAGE_VARIANT_SIZES", "48,96,192,512").split(","))
+VARIANT_FORMATS = ("webp",)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+
+
+class ImageProcessingError(Exception):
+    pass
+
+
+# Pillow only warns above MAX_IMAGE_PIXELS and raises DecompressionBombError
+# past twice that, so _open enforces the limit itself from the header size
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+
+
+# -- worker-side functions (run inside the process pool, must stay picklable) --
+
+def _open(data: bytes, width: int, height: Optional[int]) -> Image.Image:
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width * image.height > MAX_PIXELS:
+            raise ImageProcessingError(f"Image is too large: {image.width}x{image.height} pixels")
+        # JPEG can decode straight to a 1/2..1/8 scale, far cheaper than a full decode
+        image.draft("RGB", (width * 2, (height or width) * 2))
+        # open() only reads the header; decode here so truncated or corrupt
+        # pixel data fails as a bad image rather than later in resize/encode
+        image.load()
+        return ImageOps.exif_transpose(image)
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImageProcessingError(f"Unsupported or invalid image: {e}")
+
+
+def _resize(image: Image.Image, width: int, height: Optional[int]) -> Image.Image:
+    if height:
+        # fixed box: scale to cover and center-crop, the usual cover-art thumbnail
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, max(1, image.height * width // max(1, image.width))), Image.Resampling.LANCZOS)
+    return resized
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    pil_format, _, options = FORMATS[fmt]
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def resize_image(data: bytes, width: int, height: Optional[int], fmt: str) -> bytes:
+    return _encode(_resize(_open(data, width, height), width, height), fmt)
+
+
+def generate_variants(
+    source_path: str,
+    output_dir: str,
+    sizes: Sequence[int] = VARIANT_SIZES,
+    formats: Sequence[str] = VARIANT_FORMATS
+) -> List[Dict[str, Any]]:
+    """Square {size}.{format} variants of one image, decoded once."""
+    with open(source_path, "rb") as f:
+        image = _open(f.read(), max(sizes), max(sizes))
+    os.makedirs(output_dir, exist_ok=True)
+
+    variants = []
+    for size in sorted(sizes, reverse=True):
+        # each size is scaled from the previous (larger) one, not the original
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            path = os.path.join(output_dir, f"{size}.{fmt}")
+            data = _encode(image, fmt)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+            variants.append({"size": size, "format": fmt, "path": path, "bytes": len(data)})
+    return variants
+
+
+# -- API side ------------------------------------------------------------------
+
+class ImageProcessor:
+    """Runs Pillow work on a bounded process pool.
+
+    Resizing is pure CPU and holds the GIL, so it goes to worker processes;
+    past `max_pending` queued or running calls, callers get a 503.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("IMAGE_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        self.max_pending = max_pending or int(os.getenv("IMAGE_MAX_PENDING", str(self.max_workers * 16)))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableError("Server is busy, please try again later")
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        except ImageProcessingError as e:
+            raise BadRequestError(str(e))
+        finally:
+            self._pending -= 1
+
+    async def resize(self, data: bytes, width: int, height: Optional[int], fmt: str) -> bytes:
+        return await self._submit(resize_image, data, width, height, fmt)
+
+    async def generate_variants(self, source_path: str, output_dir: str) -> List[Dict[str, Any]]:
+        return await self._submit(generate_variants, source_path, output_dir)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_processor = ImageProcessor()
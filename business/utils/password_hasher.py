@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from passlib.context import CryptContext
+from shared.exceptions import ServiceUnavailableError
+
+# Module-level context so worker processes can rebuild it on import
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded worker pool.
+
+    `max_workers` caps how many hashes run at once, `max_pending` caps how many
+    calls may be queued or running; past that callers get a 503 instead of
+    piling up behind the pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        executor_type: Optional[str] = None
+    ):
+        self.max_workers = max_workers or int(os.getenv("HASH_MAX_WORKERS", str(os.cpu_count() or 2)))
+        self.max_pending = max_pending or int(os.getenv("HASH_MAX_PENDING", str(self.max_workers * 16)))
+        self.executor_type = (executor_type or os.getenv("HASH_EXECUTOR", "thread")).lower()
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                # fork would copy the event loop, sockets and the DB pool into workers
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                # bcrypt releases the GIL, so threads scale across cores too
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableError("Server is busy, please try again later")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
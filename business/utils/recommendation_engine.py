@@ -0,0 +1,471 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+
+class ItemSimilarityEngine:
+    """Item-item collaborative filtering over likes and playlist co-occurrence.
+
+    Interactions form a sparse matrix X whose rows are users (likes, weight 1)
+    and playlists (membership, weight `playlist_weight`) and whose columns are
+    songs. Song-song cosine similarity is X^T X scaled by column norms; it is
+    computed a batch of songs at a time so the full n_songs x n_songs matrix
+    is never materialized, and only the top `top_n` neighbors per song are
+    kept in two dense (n_songs, top_n) arrays.
+    """
+
+    def __init__(self, top_n: int = 50, playlist_weight: float = 0.5, batch_size: int = 1024):
+        self.top_n = top_n
+        self.playlist_weight = playlist_weight
+        self.batch_size = batch_size
+
+        self.song_ids = np.empty(0, dtype=np.int64)
+        self.song_index: Dict[int, int] = {}
+        self.user_index: Dict[int, int] = {}
+        self.playlist_index: Dict[int, int] = {}
+
+        self.user_items = sp.csr_matrix((0, 0), dtype=np.float32)
+        self.playlist_items = sp.csr_matrix((0, 0), dtype=np.float32)
+        self.neighbors = np.empty((0, top_n), dtype=np.int32)
+        self.scores = np.empty((0, top_n), dtype=np.float32)
+        self._dirty: Set[int] = set()
+
+    @property
+    def n_songs(self) -> int:
+        return len(self.song_ids)
+
+    # -- building -----------------------------------------------------------
+
+    @staticmethod
+    def _index(ids: np.ndarray, index: Dict[int, int]) -> np.ndarray:
+        """Map external ids to dense row/column numbers, growing `index` as needed."""
+        positions = np.empty(len(ids), dtype=np.int32)
+        for i, external_id in enumerate(ids.tolist()):
+            position = index.get(external_id)
+            if position is None:
+                position = index[external_id] = len(index)
+            positions[i] = position
+        return positions
+
+    def _matrix(self, rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int], weight: float) -> sp.csr_matrix:
+        data = np.full(len(rows), weight, dtype=np.float32)
+        matrix = sp.csr_matrix((data, (rows, cols)), shape=shape, dtype=np.float32)
+        # duplicate (row, song) pairs are summed by csr, keep interactions binary
+        matrix.data[:] = weight
+        return matrix
+
+    def fit(
+        self,
+        likes: Tuple[Sequence[int], Sequence[int]],
+        playlist_songs: Optional[Tuple[Sequence[int], Sequence[int]]] = None
+    ) -> "ItemSimilarityEngine":
+        """Build from (user_ids, song_ids) like pairs and optional (playlist_ids, song_ids)."""
+        like_users, like_songs = (np.asarray(a, dtype=np.int64) for a in likes)
+        playlist_ids, playlist_song_ids = (
+            (np.asarray(a, dtype=np.int64) for a in playlist_songs)
+            if playlist_songs is not None
+            else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        )
+
+        self.song_ids = np.unique(np.concatenate([like_songs, playlist_song_ids]))
+        self.song_index = {int(song_id): i for i, song_id in enumerate(self.song_ids)}
+        self.user_index, self.playlist_index = {}, {}
+
+        user_rows = self._index(like_users, self.user_index)
+        playlist_rows = self._index(playlist_ids, self.playlist_index)
+        like_cols = np.searchsorted(self.song_ids, like_songs).astype(np.int32)
+        playlist_cols = np.searchsorted(self.song_ids, playlist_song_ids).astype(np.int32)
+
+        self.user_items = self._matrix(user_rows, like_cols, (len(self.user_index), self.n_songs), 1.0)
+        self.playlist_items = self._matrix(playlist_rows, playlist_cols, (len(self.playlist_index), self.n_songs), self.playlist_weight)
+
+        self.neighbors = np.full((self.n_songs, self.top_n), -1, dtype=np.int32)
+        self.scores = np.zeros((self.n_songs, self.top_n), dtype=np.float32)
+        self._dirty = set()
+        self._compute_neighbors(np.arange(self.n_songs))
+        return self
+
+    def _interactions(self) -> sp.csr_matrix:
+        return sp.vstack([self.user_items, self.playlist_items], format="csr")
+
+    def _similarity_batches(self, songs: np.ndarray):
+        """Yield (batch, cosine similarity of the batch songs with every song) as sparse rows."""
+        X = self._interactions()
+        XT = X.T.tocsr()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel()).astype(np.float32)
+        inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+
+        for start in range(0, len(songs), self.batch_size):
+            batch = songs[start:start + self.batch_size]
+            # co-occurrence of the batch songs with every song: (batch, n_songs), sparse
+            similarity = (XT[batch] @ X).tocsr()
+            similarity = sp.diags(inv_norms[batch]) @ similarity @ sp.diags(inv_norms)
+            yield batch, similarity.tocsr()
+
+    def _compute_neighbors(self, songs: np.ndarray):
+        for batch, similarity in self._similarity_batches(songs):
+            self._keep_top(batch, similarity)
+
+    def _keep_top(self, batch: np.ndarray, similarity: sp.csr_matrix):
+        top_n = self.top_n
+        for row, song in enumerate(batch):
+            lo, hi = similarity.indptr[row], similarity.indptr[row + 1]
+            cols = similarity.indices[lo:hi]
+            values = similarity.data[lo:hi]
+            keep = cols != song
+            cols, values = cols[keep], values[keep]
+
+            self.neighbors[song].fill(-1)
+            self.scores[song].fill(0.0)
+            if len(cols) == 0:
+                continue
+            if len(cols) > top_n:
+                best = np.argpartition(-values, top_n - 1)[:top_n]
+                cols, values = cols[best], values[best]
+            order = np.argsort(-values, kind="stable")
+            self.neighbors[song, :len(order)] = cols[order]
+            self.scores[song, :len(order)] = values[order]
+
+    # -- incremental updates -------------------------------------------------
+
+    def _grow(self):
+        n_songs, n_users = self.n_songs, len(self.user_index)
+        extra = n_songs - self.neighbors.shape[0]
+        if extra > 0:
+            self.neighbors = np.vstack([self.neighbors, np.full((extra, self.top_n), -1, dtype=np.int32)])
+            self.scores = np.vstack([self.scores, np.zeros((extra, self.top_n), dtype=np.float32)])
+        self.playlist_items.resize((self.playlist_items.shape[0], n_songs))
+        self.user_items.resize((n_users, n_songs))
+
+    def add_likes(self, user_ids: Sequence[int], song_ids: Sequence[int]):
+        """Record new likes. Affected songs are marked dirty; call refresh_dirty()
+        (RecommendationService.refresh does) to recompute their neighbors."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        song_ids = np.asarray(song_ids, dtype=np.int64)
+        if not len(user_ids):
+            return
+
+        new_songs = [int(s) for s in np.unique(song_ids) if int(s) not in self.song_index]
+        if new_songs:
+            for song_id in new_songs:
+                self.song_index[song_id] = len(self.song_index)
+            self.song_ids = np.concatenate([self.song_ids, np.asarray(new_songs, dtype=np.int64)])
+
+        rows = self._index(user_ids, self.user_index)
+        cols = np.fromiter((self.song_index[int(s)] for s in song_ids), dtype=np.int32, count=len(song_ids))
+        self._grow()
+
+        delta = self._matrix(rows, cols, self.user_items.shape, 1.0)
+        self.user_items = self.user_items.maximum(delta).tocsr()
+
+        # only the liked songs' columns changed; refresh_dirty patches the rest
+        self._dirty.update(int(c) for c in cols)
+
+    def refresh_dirty(self) -> int:
+        """Bring neighbor lists up to date after add_likes; returns the rows updated.
+
+        A like changes the liked song's norm and co-occurrences, so its own row
+        is recomputed. Every other song's row only changes in its similarity to
+        the liked songs, which (being symmetric) the recomputed rows already
+        hold: those entries are patched in. A full list whose new last entry
+        falls below its old cut-off may be missing songs that were cut before,
+        so those rows are recomputed too.
+        """
+        if not self._dirty:
+            return 0
+        songs = np.fromiter(sorted(self._dirty), dtype=np.int32)
+        self._dirty = set()
+
+        refreshed = np.zeros(self.n_songs + 1, dtype=bool)
+        refreshed[songs] = True
+        full = self.neighbors[:, -1] >= 0
+        tails = self.scores[:, -1]
+
+        # keep (row, refreshed song, similarity) for rows outside `songs` where the
+        # refreshed song can enter the list; anything below a full list's cut-off
+        # is left out (see truncated below). Filtered per batch to bound memory.
+        rows, cols, values = [], [], []
+        for batch, similarity in self._similarity_batches(songs):
+            self._keep_top(batch, similarity)
+            coo = similarity.tocoo()
+            enters = ~refreshed[coo.col] & (~full[coo.col] | (coo.data >= tails[coo.col]))
+            rows.append(coo.col[enters])
+            cols.append(batch[coo.row[enters]])
+            values.append(coo.data[enters])
+        rows, cols, values = (np.concatenate(a) for a in (rows, cols, values))
+
+        # rows listing a refreshed song change too; -1 (no neighbor) looks up the
+        # spare last slot, which is never set
+        listing = np.flatnonzero(refreshed[self.neighbors].any(axis=1) & ~refreshed[:-1])
+        affected = np.union1d(np.unique(rows), listing)
+        if not len(affected):
+            return len(songs)
+        row_of = np.empty(self.n_songs, dtype=np.int64)
+        row_of[affected] = np.arange(len(affected))
+
+        old_neighbors, old_scores = self.neighbors[affected], self.scores[affected]
+        kept = (old_neighbors >= 0) & ~refreshed[old_neighbors]
+        kept_rows = np.nonzero(kept)[0]
+        neighbors, scores = self._top_per_group(
+            len(affected),
+            np.concatenate([kept_rows, row_of[rows]]),
+            np.concatenate([old_neighbors[kept], cols]),
+            np.concatenate([old_scores[kept], values]),
+        )
+        self.neighbors[affected], self.scores[affected] = neighbors, scores
+
+        truncated = (old_neighbors[:, -1] >= 0) & (scores[:, -1] < old_scores[:, -1])
+        self._compute_neighbors(affected[truncated])
+        return len(songs) + len(affected)
+
+    def _top_per_group(self, n_rows: int, rows: np.ndarray, cols: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Best `top_n` (col, value) per row from unordered triples, without a Python loop."""
+        # one float key sorts by row, then by value descending (cosines are in [0, 1]);
+        # several times faster than np.lexsort on millions of triples
+        order = np.argsort(rows * 2.0 + (1.0 - values), kind="stable")
+        rows, cols, values = rows[order], cols[order], values[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        keep = rank < self.top_n
+        neighbors = np.full((n_rows, self.top_n), -1, dtype=np.int32)
+        scores = np.zeros((n_rows, self.top_n), dtype=np.float32)
+        neighbors[rows[keep], rank[keep]] = cols[keep]
+        scores[rows[keep], rank[keep]] = values[keep]
+        return neighbors, scores
+
+    # -- queries -------------------------------------------------------------
+
+    def similar_songs(self, song_id: int, n: int = 20) -> List[Tuple[int, float]]:
+        col = self.song_index.get(song_id)
+        if col is None:
+            return []
+        neighbors = self.neighbors[col, :n]
+        valid = neighbors >= 0
+        return list(zip(self.song_ids[neighbors[valid]].tolist(), self.scores[col, :n][valid].tolist()))
+
+    def recommend_for_songs(self, liked_songs: Iterable[int], n: int = 20) -> List[Tuple[int, float]]:
+        cols = np.fromiter(
+            (self.song_index[s] for s in liked_songs if s in self.song_index), dtype=np.int32
+        )
+        if not len(cols):
+            return []
+
+        neighbors = self.neighbors[cols].ravel()
+        scores = self.scores[cols].ravel()
+        valid = neighbors >= 0
+        totals = np.zeros(self.n_songs, dtype=np.float32)
+        np.add.at(totals, neighbors[valid], scores[valid])
+        totals[cols] = 0.0
+
+        candidates = np.flatnonzero(totals)
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-totals[candidates], n - 1)[:n]]
+        candidates = candidates[np.argsort(-totals[candidates], kind="stable")]
+        return list(zip(self.song_ids[candidates].tolist(), totals[candidates].tolist()))
+
+    def recommend_for_user(self, user_id: int, n: int = 20) -> List[Tuple[int, float]]:
+        row = self.user_index.get(user_id)
+        if row is None or row >= self.user_items.shape[0]:
+            return []
+        liked = self.song_ids[self.user_items[row].indices]
+        return self.recommend_for_songs(liked.tolist(), n)
+
+    # -- materialization -------------------------------------------------------
+
+    def _similarity_matrix(self) -> sp.csr_matrix:
+        """The kept top-N neighbors as a sparse (n_songs, n_songs) matrix."""
+        rows = np.repeat(np.arange(self.n_songs, dtype=np.int32), self.top_n)
+        cols = self.neighbors.ravel()
+        valid = cols >= 0
+        return sp.csr_matrix(
+            (self.scores.ravel()[valid], (rows[valid], cols[valid])),
+            shape=(self.n_songs, self.n_songs),
+            dtype=np.float32
+        )
+
+    @staticmethod
+    def _top_per_row(matrix: sp.csr_matrix, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        top = np.full((matrix.shape[0], n), -1, dtype=np.int32)
+        top_scores = np.zeros((matrix.shape[0], n), dtype=np.float32)
+        for row in range(matrix.shape[0]):
+            lo, hi = matrix.indptr[row], matrix.indptr[row + 1]
+            if lo == hi:
+                continue
+            cols, values = matrix.indices[lo:hi], matrix.data[lo:hi]
+            if len(cols) > n:
+                best = np.argpartition(-values, n - 1)[:n]
+                cols, values = cols[best], values[best]
+            order = np.argsort(-values, kind="stable")
+            top[row, :len(order)] = cols[order]
+            top_scores[row, :len(order)] = values[order]
+        return top, top_scores
+
+    def materialize(self, n: int, user_batch_size: int = 4096) -> Dict[str, np.ndarray]:
+        """Top-n lists for every song and every user, as dense arrays indexed by
+        external id (row = id, -1 = no entry) so lookups need no id mapping."""
+        max_song_id = int(self.song_ids.max()) if self.n_songs else -1
+        song_neighbors = np.full((max_song_id + 1, n), -1, dtype=np.int32)
+        song_scores = np.zeros((max_song_id + 1, n), dtype=np.float32)
+        k = min(n, self.top_n)
+        valid = self.neighbors[:, :k] >= 0
+        song_neighbors[self.song_ids, :k] = np.where(valid, self.song_ids[np.maximum(self.neighbors[:, :k], 0)], -1)
+        song_scores[self.song_ids, :k] = self.scores[:, :k]
+
+        user_ids = np.fromiter(self.user_index.keys(), dtype=np.int64, count=len(self.user_index))
+        user_rows = np.fromiter(self.user_index.values(), dtype=np.int64, count=len(self.user_index))
+        max_user_id = int(user_ids.max()) if len(user_ids) else -1
+        user_recs = np.full((max_user_id + 1, n), -1, dtype=np.int32)
+        user_scores = np.zeros((max_user_id + 1, n), dtype=np.float32)
+
+        similarity_t = self._similarity_matrix().T.tocsr()
+        for start in range(0, len(user_rows), user_batch_size):
+            rows = user_rows[start:start + user_batch_size]
+            liked = self.user_items[rows]
+            # score(u, j) = sum over liked i of sim(i, j), liked songs removed
+            scores = (liked @ similarity_t.T).tocsr()
+            scores = (scores - scores.multiply(liked > 0)).tocsr()
+            scores.eliminate_zeros()
+            top, top_scores = self._top_per_row(scores, n)
+            user_recs[user_ids[start:start + user_batch_size]] = np.where(top >= 0, self.song_ids[np.maximum(top, 0)], -1)
+            user_scores[user_ids[start:start + user_batch_size]] = top_scores
+
+        return {
+            "song_neighbors": song_neighbors,
+            "song_scores": song_scores,
+            "user_recs": user_recs,
+            "user_scores": user_scores,
+        }
+
+
+class RecommendationStore:
+    """Precomputed top-N lists in memory-mapped .npy files.
+
+    Each refresh writes a new version directory and then atomically points
+    the CURRENT file at it, so readers (possibly other worker processes)
+    never see a half-written store. Lookups are a row read at offset = id.
+
+    Only the process holding the WRITER lock file writes and prunes, and
+    the newest `keep_versions` versions are kept, so a reader that has just
+    read CURRENT still finds its version. If a version cannot be opened,
+    readers keep serving the one they have mapped.
+    """
+
+    ARRAYS = ("song_neighbors", "song_scores", "user_recs", "user_scores", "popular")
+
+    def __init__(self, path: str, reload_interval: float = 30.0, keep_versions: int = 3):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.keep_versions = max(2, keep_versions)
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._writer_fd: Optional[int] = None
+
+    @property
+    def _current_file(self) -> str:
+        return os.path.join(self.path, "CURRENT")
+
+    def acquire_writer(self) -> bool:
+        """Try to become the single writer; held until the process exits."""
+        if self._writer_fd is not None:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        fd = os.open(os.path.join(self.path, "WRITER.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._writer_fd = fd
+        return True
+
+    def write(self, arrays: Dict[str, np.ndarray]) -> str:
+        if not self.acquire_writer():
+            raise RuntimeError(f"Another process is writing the recommendation store at {self.path}")
+        # strictly newer than CURRENT even for two writes in the same millisecond,
+        # so a version that readers may have mapped is never rewritten
+        try:
+            with open(self._current_file) as f:
+                last = int(f.read().strip()[1:])
+        except (FileNotFoundError, ValueError):
+            last = 0
+        version = f"v{max(int(time.time() * 1000), last + 1)}"
+        directory = os.path.join(self.path, version)
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"created_at": time.time(), "shapes": {k: list(arrays[k].shape) for k in self.ARRAYS}}, f)
+
+        tmp = f"{self._current_file}.tmp"
+        with open(tmp, "w") as f:
+            f.write(version)
+        os.replace(tmp, self._current_file)
+        self._prune(version)
+        self.reload(force=True)
+        return version
+
+    def _prune(self, current: str):
+        # only versions older than the current one; the newest keep_versions survive
+        versions = sorted(d for d in os.listdir(self.path) if d.startswith("v") and d < current)
+        for old in versions[:max(0, len(versions) - (self.keep_versions - 1))]:
+            shutil.rmtree(os.path.join(self.path, old), ignore_errors=True)
+
+    def reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            with open(self._current_file) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return
+        if version == self._version:
+            return
+        directory = os.path.join(self.path, version)
+        try:
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in self.ARRAYS
+            }
+        except (OSError, ValueError) as e:
+            # pruned or unreadable; keep serving what is already mapped
+            logger.warning(f"Cannot open recommendation store {version}, keeping {self._version}: {e}")
+            return
+        self._arrays = arrays
+        self._version = version
+
+    @property
+    def ready(self) -> bool:
+        self.reload()
+        return bool(self._arrays)
+
+    def _row(self, ids_name: str, scores_name: str, key: int, n: int) -> List[Tuple[int, float]]:
+        self.reload()
+        ids = self._arrays.get(ids_name)
+        if ids is None or key < 0 or key >= ids.shape[0]:
+            return []
+        row = np.asarray(ids[key, :n])
+        valid = row >= 0
+        scores = np.asarray(self._arrays[scores_name][key, :n])
+        return list(zip(row[valid].tolist(), scores[valid].tolist()))
+
+    def for_user(self, user_id: int, n: int = 20) -> List[Tuple[int, float]]:
+        return self._row("user_recs", "user_scores", user_id, n)
+
+    def similar_songs(self, song_id: int, n: int = 20) -> List[Tuple[int, float]]:
+        return self._row("song_neighbors", "song_scores", song_id, n)
+
+    def popular(self, n: int = 20) -> List[int]:
+        self.reload()
+        popular = self._arrays.get("popular")
+        return [] if popular is None else np.asarray(popular[:n]).tolist()
@@ -0,0 +1,263 @@
+import bisect
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from shared.text import normalize
+
+FIELD_WEIGHTS = {"title": 3.0, "artist": 2.0, "album": 1.0}
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+MAX_EXPANSIONS = 50
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return normalize(text).split()
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Edit distance, giving up early (returns max_distance + 1) once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            value = min(previous[j] + 1, current[j - 1] + 1, cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _max_typos(term: str) -> int:
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+class SearchIndex:
+    """In-memory inverted index over song title, artist name and album title.
+
+    Postings map a token to {song_id: field weight}. Query terms match
+    tokens exactly, by prefix (via a sorted vocabulary) or within a small
+    edit distance (candidates from a trigram index over the vocabulary, so
+    typo lookup never scans every document).
+    """
+
+    def __init__(self):
+        self.songs: Dict[int, Dict[str, Any]] = {}
+        self.artists: Dict[int, str] = {}
+        self.albums: Dict[int, str] = {}
+        self.artist_songs: Dict[int, Set[int]] = {}
+        self.album_songs: Dict[int, Set[int]] = {}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.song_tokens: Dict[int, Dict[str, float]] = {}
+        self.token_trigrams: Dict[str, Set[str]] = {}
+        self.vocabulary: List[str] = []
+        self.ready = False
+        # writes committed while a replacement index is being built, replayed
+        # onto it before the swap (see SearchService.rebuild_index)
+        self.pending: Optional[List[Tuple[str, Tuple[Any, ...]]]] = None
+        self._bulk_loading = False
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def swap(self, other: "SearchIndex"):
+        """Take over another (freshly built) index's state in one step.
+
+        Ends any rebuild buffering, since the fresh index has no `pending`.
+        """
+        self.__dict__.update(other.__dict__)
+
+    # -- writes -------------------------------------------------------------
+
+    def _add_token(self, token: str, song_id: int, weight: float):
+        postings = self.postings.get(token)
+        if postings is None:
+            postings = self.postings[token] = {}
+            if self._bulk_loading:
+                # sorted once at the end of load()
+                self.vocabulary.append(token)
+            else:
+                bisect.insort(self.vocabulary, token)
+            for gram in trigrams(token):
+                self.token_trigrams.setdefault(gram, set()).add(token)
+        postings[song_id] = weight
+
+    def _remove_token(self, token: str, song_id: int):
+        postings = self.postings.get(token)
+        if postings is None:
+            return
+        postings.pop(song_id, None)
+        if not postings:
+            del self.postings[token]
+            index = bisect.bisect_left(self.vocabulary, token)
+            if index < len(self.vocabulary) and self.vocabulary[index] == token:
+                del self.vocabulary[index]
+            for gram in trigrams(token):
+                tokens = self.token_trigrams.get(gram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.token_trigrams[gram]
+
+    def _index_song(self, song_id: int):
+        song = self.songs[song_id]
+        weights: Dict[str, float] = {}
+        fields = (
+            ("title", song.get("title")),
+            ("artist", self.artists.get(song.get("artist_id"))),
+            ("album", self.albums.get(song.get("album_id"))),
+        )
+        for field, text in fields:
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+
+        old = self.song_tokens.get(song_id, {})
+        for token in old.keys() - weights.keys():
+            self._remove_token(token, song_id)
+        for token, weight in weights.items():
+            if old.get(token) != weight:
+                self._add_token(token, song_id, weight)
+        self.song_tokens[song_id] = weights
+
+    def upsert_artist(self, artist_id: int, name: str):
+        if self.artists.get(artist_id) == name:
+            return
+        self.artists[artist_id] = name
+        for song_id in self.artist_songs.get(artist_id, ()):
+            self._index_song(song_id)
+
+    def upsert_album(self, album_id: int, title: str):
+        if self.albums.get(album_id) == title:
+            return
+        self.albums[album_id] = title
+        for song_id in self.album_songs.get(album_id, ()):
+            self._index_song(song_id)
+
+    def upsert_song(self, song_id: int, title: str, artist_id: Optional[int] = None, album_id: Optional[int] = None, **extra: Any):
+        previous = self.songs.get(song_id)
+        if previous is not None:
+            self.artist_songs.get(previous.get("artist_id"), set()).discard(song_id)
+            self.album_songs.get(previous.get("album_id"), set()).discard(song_id)
+
+        self.songs[song_id] = {"title": title, "artist_id": artist_id, "album_id": album_id, **extra}
+        if artist_id is not None:
+            self.artist_songs.setdefault(artist_id, set()).add(song_id)
+        if album_id is not None:
+            self.album_songs.setdefault(album_id, set()).add(song_id)
+        self._index_song(song_id)
+
+    def remove_song(self, song_id: int):
+        song = self.songs.pop(song_id, None)
+        if song is None:
+            return
+        self.artist_songs.get(song.get("artist_id"), set()).discard(song_id)
+        self.album_songs.get(song.get("album_id"), set()).discard(song_id)
+        for token in self.song_tokens.pop(song_id, {}):
+            self._remove_token(token, song_id)
+
+    # -- reads --------------------------------------------------------------
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        tokens = []
+        for token in self.vocabulary[start:start + MAX_EXPANSIONS * 4]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        # keep the expansions that occur in the most songs
+        tokens.sort(key=lambda t: len(self.postings[t]), reverse=True)
+        return tokens[:MAX_EXPANSIONS]
+
+    def _fuzzy_tokens(self, term: str) -> List[str]:
+        max_distance = _max_typos(term)
+        if not max_distance:
+            return []
+        grams = trigrams(term)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for token in self.token_trigrams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        # each edit destroys at most 3 trigrams
+        min_shared = max(1, len(grams) - 3 * max_distance)
+        candidates = [t for t, count in shared.items() if count >= min_shared and t != term]
+        matches = [t for t in candidates if bounded_levenshtein(term, t, max_distance) <= max_distance]
+        return matches[:MAX_EXPANSIONS]
+
+    def _expand(self, term: str, allow_prefix: bool) -> Dict[str, float]:
+        expansions: Dict[str, float] = {}
+        if term in self.postings:
+            expansions[term] = EXACT_WEIGHT
+        if allow_prefix:
+            for token in self._prefix_tokens(term):
+                expansions.setdefault(token, PREFIX_WEIGHT)
+        if not expansions or len(expansions) < 3:
+            for token in self._fuzzy_tokens(term):
+                expansions.setdefault(token, FUZZY_WEIGHT)
+        return expansions
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+
+        total_docs = max(1, len(self.songs))
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for position, term in enumerate(terms):
+            # only the term being typed is prefix-expanded
+            expansions = self._expand(term, allow_prefix=position == len(terms) - 1)
+            best: Dict[int, float] = {}
+            for token, match_weight in expansions.items():
+                postings = self.postings[token]
+                idf = 1.0 + math.log(total_docs / (1 + len(postings)))
+                for song_id, field_weight in postings.items():
+                    score = match_weight * field_weight * idf
+                    if score > best.get(song_id, 0.0):
+                        best[song_id] = score
+            for song_id, score in best.items():
+                scores[song_id] = scores.get(song_id, 0.0) + score
+                matched[song_id] = matched.get(song_id, 0) + 1
+
+        total = len(scores)
+        # documents matching more of the query terms always rank first
+        top = heapq.nlargest(offset + limit, scores, key=lambda song_id: (matched[song_id], scores[song_id]))
+        results = []
+        for song_id in top[offset:offset + limit]:
+            song = self.songs[song_id]
+            results.append({
+                **song,
+                "id": song_id,
+                "artist_name": self.artists.get(song.get("artist_id")),
+                "album_title": self.albums.get(song.get("album_id")),
+                "score": round(scores[song_id], 4),
+            })
+        return results, total
+
+    def load(self, artists: Iterable[Tuple[int, str]], albums: Iterable[Tuple[int, str]], songs: Iterable[Dict[str, Any]]):
+        self._bulk_loading = True
+        try:
+            for artist_id, name in artists:
+                self.artists[artist_id] = name
+            for album_id, title in albums:
+                self.albums[album_id] = title
+            for song in songs:
+                self.upsert_song(**song)
+        finally:
+            self._bulk_loading = False
+            self.vocabulary.sort()
+
+
+search_index = SearchIndex()
@@ -0,0 +1,173 @@
+import bisect
+import heapq
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from shared.text import normalize
+
+KINDS = ("song", "artist", "album")
+
+
+class SuggestIndex:
+    """Prefix index for as-you-type suggestions.
+
+    Every entry is reachable from its full normalized text and from each
+    word inside it ("hello world" is found by "hel" and by "wor"). Keys live
+    in one sorted list so a prefix is a contiguous range found by bisect.
+    The best candidates are precomputed at build time, once over all kinds
+    and once per kind, for every prefix of up to `precompute_depth`
+    characters and for every longer prefix whose range still holds more
+    than `max_scan` keys; any other prefix ranks its range, which is then
+    at most `max_scan` keys long. Weights are stored separately and can be
+    patched in place; candidate lists are re-ranked by current weight on
+    every query and carry extra headroom for that.
+    """
+
+    def __init__(self, top_k: int = 10, precompute_depth: int = 3, max_scan: int = 1000):
+        self.top_k = top_k
+        self.candidates_per_prefix = top_k * 3
+        self.precompute_depth = precompute_depth
+        self.max_scan = max_scan
+
+        self.kinds = array("b")
+        self.ids = array("q")
+        self.weights = array("d")
+        self.texts: List[str] = []
+        self.subtitles: List[Optional[str]] = []
+        self.lookup: Dict[Tuple[int, int], int] = {}
+
+        self.keys: List[str] = []
+        self.refs = array("i")
+        # (prefix, kind code or None for all kinds) -> best entries
+        self.top: Dict[Tuple[str, Optional[int]], List[int]] = {}
+        self.ready = False
+        # add/bump calls made while a replacement index is being built,
+        # replayed onto it before the swap (see SearchService.rebuild_suggestions)
+        self.pending: Optional[List[Tuple[str, Tuple[Any, ...]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def swap(self, other: "SuggestIndex"):
+        """Take over another (freshly built) index's state, ending any buffering."""
+        self.__dict__.update(other.__dict__)
+
+    @staticmethod
+    def _keys_for(text: str) -> List[str]:
+        words = normalize(text).split()
+        return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words))))
+
+    def _append_entry(self, kind: str, entity_id: int, text: str, weight: float, subtitle: Optional[str]) -> int:
+        index = len(self.texts)
+        self.kinds.append(KINDS.index(kind))
+        self.ids.append(entity_id)
+        self.weights.append(weight)
+        self.texts.append(text)
+        self.subtitles.append(subtitle)
+        self.lookup[(KINDS.index(kind), entity_id)] = index
+        return index
+
+    def _rank(self, refs: Iterable[int], k: int, kind: Optional[int] = None) -> List[int]:
+        weights = self.weights
+        unique = {ref for ref in refs if kind is None or self.kinds[ref] == kind}
+        return heapq.nlargest(k, unique, key=lambda ref: (weights[ref], -ref))
+
+    def build(self, entries: Iterable[Tuple[str, int, str, float, Optional[str]]]):
+        """Build from (kind, id, text, weight, subtitle) tuples."""
+        pairs = []
+        for kind, entity_id, text, weight, subtitle in entries:
+            index = self._append_entry(kind, entity_id, text, weight, subtitle)
+            pairs.extend((key, index) for key in self._keys_for(text))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.refs = array("i", (ref for _, ref in pairs))
+
+        # (start, end, depth): split a key range by its next prefix character
+        ranges = [(0, len(self.keys), 1)]
+        while ranges:
+            low, high, depth = ranges.pop()
+            start = low
+            while start < high:
+                prefix = self.keys[start][:depth]
+                if len(prefix) < depth:
+                    # a key shorter than the depth only covers itself here
+                    start = bisect.bisect_right(self.keys, prefix, start, high)
+                    continue
+                end = bisect.bisect_left(self.keys, prefix + "\uffff", start, high)
+                if depth <= self.precompute_depth or end - start > self.max_scan:
+                    self._precompute(prefix, self.refs[start:end])
+                    ranges.append((start, end, depth + 1))
+                start = end
+        self.ready = True
+
+    def _precompute(self, prefix: str, refs: Iterable[int]):
+        self.top[(prefix, None)] = self._rank(refs, self.candidates_per_prefix)
+        for kind_code in range(len(KINDS)):
+            ranked = self._rank(refs, self.candidates_per_prefix, kind_code)
+            if ranked:
+                self.top[(prefix, kind_code)] = ranked
+
+    def add(self, kind: str, entity_id: int, text: str, weight: float = 0.0, subtitle: Optional[str] = None):
+        """Incrementally insert an entry (new song/artist/album)."""
+        if (KINDS.index(kind), entity_id) in self.lookup:
+            return
+        index = self._append_entry(kind, entity_id, text, weight, subtitle)
+        for key in self._keys_for(text):
+            position = bisect.bisect_right(self.keys, key)
+            self.keys.insert(position, key)
+            self.refs.insert(position, index)
+            for depth in range(1, len(key) + 1):
+                if depth > self.precompute_depth and (key[:depth], None) not in self.top:
+                    break
+                for top_key in ((key[:depth], None), (key[:depth], KINDS.index(kind))):
+                    candidates = self.top.setdefault(top_key, [])
+                    if index not in candidates:
+                        candidates.append(index)
+                        self.top[top_key] = self._rank(candidates, self.candidates_per_prefix)
+
+    def bump(self, kind: str, entity_id: int, delta: float = 1.0):
+        index = self.lookup.get((KINDS.index(kind), entity_id))
+        if index is not None:
+            self.weights[index] += delta
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = normalize(prefix)
+        if not query:
+            return []
+        kind_code = KINDS.index(kind) if kind else None
+        limit = min(limit, self.top_k)
+
+        if len(query) <= self.precompute_depth or (query, None) in self.top:
+            # holds every match when there are fewer than candidates_per_prefix
+            ranked = self._rank(self.top.get((query, kind_code), ()), limit)
+        else:
+            # not precomputed, so the range holds at most max_scan keys (plus adds)
+            start = bisect.bisect_left(self.keys, query)
+            end = bisect.bisect_left(self.keys, query + "\uffff", start)
+            ranked = self._rank(self.refs[start:end], limit, kind_code)
+
+        return [
+            {
+                "type": KINDS[self.kinds[ref]],
+                "id": self.ids[ref],
+                "text": self.texts[ref],
+                "subtitle": self.subtitles[ref],
+                "score": self.weights[ref],
+            }
+            for ref in ranked
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        key_bytes = sum(sys.getsizeof(key) for key in self.keys) + sys.getsizeof(self.keys)
+        text_bytes = sum(sys.getsizeof(text) for text in self.texts) + sys.getsizeof(self.texts)
+        array_bytes = sum(a.itemsize * len(a) for a in (self.kinds, self.ids, self.weights, self.refs))
+        top_bytes = sum(sys.getsizeof(refs) for refs in self.top.values())
+        return {
+            "entries": len(self.texts),
+            "keys": len(self.keys),
+            "precomputed_prefixes": len({prefix for prefix, _ in self.top}),
+            "approx_memory_bytes": key_bytes + text_bytes + array_bytes + top_bytes,
+        }
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,309 @@
+"""Bulk import of songs, with their artists and albums, from CSV or JSONL.
+
+    python -m data.importers.catalog_importer catalog.csv --chunk-size 5000
+
+Each input record needs `title`, `artist` and `file_url`; `album`,
+`duration` and `cover_url` are optional. Progress is checkpointed after
+every committed chunk, so re-running the same command after a failure
+continues from the last committed record.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import orjson
+from sqlalchemy import insert, select, tuple_
+from data.models.music import Album, Artist, Song
+from infrastructure.cache.redis_pool import REDIS_ERRORS, redis_client
+from shared.constants import CATALOG_VERSION_KEY
+from shared.text import fold
+
+logger = logging.getLogger(__name__)
+
+AlbumKey = Tuple[int, str]
+
+
+def _insert_ignore(model):
+    """INSERT that skips rows hitting a unique key instead of failing the chunk."""
+    return (
+        insert(model.__table__)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+@dataclass
+class ImportStats:
+    records: int = 0
+    songs: int = 0
+    artists: int = 0
+    albums: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream records from a CSV (with header) or JSONL file, one at a time."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    if fmt == "jsonl":
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def _clean(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def text(name: str, limit: int) -> Optional[str]:
+        value = record.get(name)
+        value = str(value).strip() if value is not None else ""
+        return value[:limit] or None
+
+    title, artist, file_url = text("title", 100), text("artist", 100), text("file_url", 255)
+    if not (title and artist and file_url):
+        return None
+    duration = record.get("duration")
+    try:
+        duration = int(float(duration)) if duration not in (None, "") else None
+    except (TypeError, ValueError):
+        duration = None
+    return {
+        "title": title,
+        "artist": artist,
+        "album": text("album", 100),
+        "duration": duration,
+        "file_url": file_url,
+        "cover_url": text("cover_url", 255),
+    }
+
+
+class CatalogImporter:
+    """Streams a catalog into the database in fixed-size chunks.
+
+    Artists and albums are deduplicated through in-memory maps (folded
+    name -> id, (artist_id, folded title) -> id) preloaded from the
+    database, so only unseen ones are inserted and each song row is
+    resolved without a query. Every chunk is written with multi-row executemany INSERTs and
+    committed as one transaction. The ORM is bypassed entirely, so the
+    search index only sees the new songs after its next rebuild; `run`
+    bumps CATALOG_VERSION_KEY in Redis to have the API workers rebuild now.
+    """
+
+    def __init__(self, session_factory, chunk_size: int = 5000, checkpoint_path: Optional[str] = None):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.artist_ids: Dict[str, int] = {}
+        self.album_ids: Dict[AlbumKey, int] = {}
+        self.stats = ImportStats()
+
+    # -- checkpoint --------------------------------------------------------------
+
+    def _load_checkpoint(self, source: str) -> int:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") != os.path.realpath(source):
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to {checkpoint.get('source')}")
+        self.stats = ImportStats(**checkpoint["stats"])
+        return checkpoint["records"]
+
+    def _save_checkpoint(self, source: str):
+        if not self.checkpoint_path:
+            return
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": os.path.realpath(source), "records": self.stats.records, "stats": asdict(self.stats)}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # -- lookups -----------------------------------------------------------------
+
+    async def _preload(self, db):
+        result = await db.stream(select(Artist.id, Artist.name).execution_options(yield_per=50000))
+        async for artist_id, name in result:
+            self.artist_ids.setdefault(fold(name), artist_id)
+        result = await db.stream(select(Album.id, Album.artist_id, Album.title).execution_options(yield_per=50000))
+        async for album_id, artist_id, title in result:
+            self.album_ids.setdefault((artist_id, fold(title)), album_id)
+
+    async def _resolve_artists(self, db, records: List[Dict[str, Any]]):
+        new: Dict[str, str] = {}
+        for record in records:
+            key = fold(record["artist"])
+            if key not in self.artist_ids:
+                new.setdefault(key, record["artist"])
+        if not new:
+            return
+        # IGNORE: the name may already exist under a spelling the collation treats
+        # as equal ("Son Tung" vs "Sơn Tùng"), or a concurrent import just added it
+        result = await db.execute(_insert_ignore(Artist), [{"name": name} for name in new.values()])
+        self.stats.artists += max(result.rowcount, 0)
+
+        # the collation matches "Son Tung" to the stored "Sơn Tùng"; key every row
+        # the database returns by what we asked for, not by what it stored
+        rows = await db.execute(select(Artist.id, Artist.name).where(Artist.name.in_(list(new.values()))))
+        for artist_id, name in rows:
+            self.artist_ids.setdefault(fold(name), artist_id)
+        for key, name in new.items():
+            if key not in self.artist_ids:
+                self.artist_ids[key] = await self._lookup(db, select(Artist.id).where(Artist.name == name), name)
+
+    async def _resolve_albums(self, db, records: List[Dict[str, Any]]):
+        new: Dict[AlbumKey, Dict[str, Any]] = {}
+        for record in records:
+            if record["album"] is None:
+                continue
+            key = (self.artist_ids[fold(record["artist"])], fold(record["album"]))
+            if key not in self.album_ids:
+                new.setdefault(key, {"title": record["album"], "artist_id": key[0]})
+        if not new:
+            return
+        # unique (artist_id, title): a concurrent or re-run import can't duplicate albums
+        result = await db.execute(_insert_ignore(Album), list(new.values()))
+        self.stats.albums += max(result.rowcount, 0)
+
+        rows = await db.execute(
+            select(Album.id, Album.artist_id, Album.title).where(
+                # row-value IN: two separate INs would probe every artist x title pair
+                tuple_(Album.artist_id, Album.title).in_([(album["artist_id"], album["title"]) for album in new.values()])
+            )
+        )
+        for album_id, artist_id, title in rows:
+            self.album_ids.setdefault((artist_id, fold(title)), album_id)
+        for key, album in new.items():
+            if key not in self.album_ids:
+                query = select(Album.id).where(Album.artist_id == album["artist_id"], Album.title == album["title"])
+                self.album_ids[key] = await self._lookup(db, query, album["title"])
+
+    @staticmethod
+    async def _lookup(db, query, name: str) -> int:
+        # the collation folded the name differently from fold(); let the database decide
+        found = await db.scalar(query.limit(1))
+        if found is None:
+            raise ValueError(f"Could not insert or find {name!r}")
+        return found
+
+    # -- import ------------------------------------------------------------------
+
+    async def _write_chunk(self, records: List[Dict[str, Any]], resuming: bool):
+        async with self.session_factory() as db:
+            await self._resolve_artists(db, records)
+            await self._resolve_albums(db, records)
+
+            songs = []
+            for record in records:
+                artist_id = self.artist_ids[fold(record["artist"])]
+                songs.append({
+                    "title": record["title"],
+                    "duration": record["duration"],
+                    "file_url": record["file_url"],
+                    "cover_url": record["cover_url"],
+                    "artist_id": artist_id,
+                    "album_id": self.album_ids.get((artist_id, fold(record["album"]))) if record["album"] else None,
+                })
+
+            if resuming:
+                # the chunk after a crash may already be committed without its
+                # checkpoint; skip songs whose file is already in the catalog
+                existing = await db.execute(select(Song.file_url).where(Song.file_url.in_([s["file_url"] for s in songs])))
+                existing = set(existing.scalars())
+                self.stats.duplicates += sum(1 for s in songs if s["file_url"] in existing)
+                songs = [s for s in songs if s["file_url"] not in existing]
+
+            if songs:
+                await db.execute(insert(Song.__table__), songs)
+            await db.commit()
+        self.stats.songs += len(songs)
+
+    async def _announce(self):
+        client = redis_client.get()
+        if client is None:
+            logger.info("Redis not available: API workers pick up the import at their next search rebuild")
+            return
+        try:
+            await client.incr(CATALOG_VERSION_KEY)
+        except REDIS_ERRORS as e:
+            redis_client.mark_down(e)
+
+    async def run(self, source: str, fmt: Optional[str] = None) -> ImportStats:
+        skip = self._load_checkpoint(source)
+        async with self.session_factory() as db:
+            await self._preload(db)
+        logger.info(f"Loaded {len(self.artist_ids)} artists and {len(self.album_ids)} albums")
+        if skip:
+            logger.info(f"Resuming after record {skip}")
+
+        started = time.perf_counter()
+        imported_at_start = self.stats.records
+        chunk: List[Dict[str, Any]] = []
+        resuming = bool(skip)
+        position = 0
+
+        async def flush():
+            nonlocal chunk, resuming
+            chunk_started = time.perf_counter()
+            valid = [record for record in map(_clean, chunk) if record is not None]
+            self.stats.skipped += len(chunk) - len(valid)
+            if valid:
+                await self._write_chunk(valid, resuming)
+            self.stats.records += len(chunk)
+            self._save_checkpoint(source)
+            resuming = False
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"{self.stats.records} records, {self.stats.songs} songs | "
+                f"chunk {len(chunk) / (time.perf_counter() - chunk_started):,.0f} rows/s, "
+                f"overall {(self.stats.records - imported_at_start) / elapsed:,.0f} rows/s"
+            )
+            chunk = []
+
+        for record in read_records(source, fmt):
+            position += 1
+            if position <= skip:
+                continue
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                await flush()
+        if chunk:
+            await flush()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Import finished in {elapsed:.1f}s: {asdict(self.stats)}")
+        await self._announce()
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import songs, artists and albums from CSV or JSONL.")
+    parser.add_argument("source", help="path to a .csv or .jsonl file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=int(os.getenv("IMPORT_CHUNK_SIZE", "5000")))
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <source>.checkpoint)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    from infrastructure.config.database import AsyncSessionLocal, engine
+
+    async def run():
+        importer = CatalogImporter(AsyncSessionLocal, args.chunk_size, args.checkpoint or f"{args.source}.checkpoint")
+        try:
+            await importer.run(args.source, args.format)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
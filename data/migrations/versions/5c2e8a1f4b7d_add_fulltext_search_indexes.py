@@ -0,0 +1,32 @@
+"""add fulltext search indexes
+
+Revision ID: 5c2e8a1f4b7d
+Revises: 68636183c50c
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8a1f4b7d'
+down_revision: Union[str, Sequence[str], None] = '68636183c50c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ft_songs_title', 'songs', ['title'], unique=False, mysql_prefix='FULLTEXT')
+    op.create_index('ft_artists_name', 'artists', ['name'], unique=False, mysql_prefix='FULLTEXT')
+    op.create_index('ft_albums_title', 'albums', ['title'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ft_albums_title', table_name='albums')
+    op.drop_index('ft_artists_name', table_name='artists')
+    op.drop_index('ft_songs_title', table_name='songs')
@@ -0,0 +1,69 @@
+"""add interaction and catalog indexes
+
+Revision ID: 9b4d7e2a1c36
+Revises: 5c2e8a1f4b7d
+Create Date: 2026-10-18 10:04:27.512938
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4d7e2a1c36'
+down_revision: Union[str, Sequence[str], None] = '5c2e8a1f4b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEY_COLUMNS = (
+    ('likes', 'user_id'),
+    ('likes', 'song_id'),
+    ('comments', 'user_id'),
+    ('comments', 'song_id'),
+    ('songs', 'artist_id'),
+    ('songs', 'album_id'),
+    ('albums', 'artist_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # duplicate likes would block the unique constraint; keep the earliest of each pair
+    # (derived table because MySQL cannot select from the table it deletes from)
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM likes GROUP BY user_id, song_id) AS keep)"
+    )
+    op.create_unique_constraint('uq_likes_user_id_song_id', 'likes', ['user_id', 'song_id'])
+    op.create_index('ix_likes_song_id_created_at', 'likes', ['song_id', 'created_at'], unique=False)
+    op.create_index('ix_likes_user_id_created_at', 'likes', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_comments_song_id_created_at', 'comments', ['song_id', 'created_at'], unique=False)
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'], unique=False)
+    op.create_index('ix_songs_artist_id', 'songs', ['artist_id'], unique=False)
+    op.create_index('ix_songs_album_id', 'songs', ['album_id'], unique=False)
+    op.create_index('ix_songs_created_at', 'songs', ['created_at'], unique=False)
+    op.create_index('ix_albums_artist_id', 'albums', ['artist_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        # InnoDB may drop its implicit foreign key indexes once the ones above cover
+        # the same columns, and refuses to drop an index a foreign key still needs;
+        # put back any that are gone, under the names InnoDB gives them
+        inspector = sa.inspect(bind)
+        for table, column in FOREIGN_KEY_COLUMNS:
+            if column not in {index['name'] for index in inspector.get_indexes(table)}:
+                op.create_index(column, table, [column], unique=False)
+    op.drop_index('ix_albums_artist_id', table_name='albums')
+    op.drop_index('ix_songs_created_at', table_name='songs')
+    op.drop_index('ix_songs_album_id', table_name='songs')
+    op.drop_index('ix_songs_artist_id', table_name='songs')
+    op.drop_index('ix_comments_user_id', table_name='comments')
+    op.drop_index('ix_comments_song_id_created_at', table_name='comments')
+    op.drop_index('ix_likes_user_id_created_at', table_name='likes')
+    op.drop_index('ix_likes_song_id_created_at', table_name='likes')
+    op.drop_constraint('uq_likes_user_id_song_id', 'likes', type_='unique')
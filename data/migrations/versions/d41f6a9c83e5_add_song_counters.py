@@ -0,0 +1,38 @@
+"""add song counters
+
+Revision ID: d41f6a9c83e5
+Revises: 9b4d7e2a1c36
+Create Date: 2026-10-18 15:37:52.804116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f6a9c83e5'
+down_revision: Union[str, Sequence[str], None] = '9b4d7e2a1c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('songs', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('songs', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('songs', sa.Column('play_count', sa.Integer(), server_default='0', nullable=False))
+    # backfill; later drift is corrected by the reconciliation job
+    op.execute(
+        "UPDATE songs SET "
+        "like_count = (SELECT COUNT(*) FROM likes WHERE likes.song_id = songs.id), "
+        "comment_count = (SELECT COUNT(*) FROM comments WHERE comments.song_id = songs.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('songs', 'play_count')
+    op.drop_column('songs', 'comment_count')
+    op.drop_column('songs', 'like_count')
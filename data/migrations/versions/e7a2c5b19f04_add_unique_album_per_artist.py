@@ -0,0 +1,40 @@
+"""add unique album per artist
+
+Revision ID: e7a2c5b19f04
+Revises: d41f6a9c83e5
+Create Date: 2026-10-19 11:22:08.471395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5b19f04'
+down_revision: Union[str, Sequence[str], None] = 'd41f6a9c83e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # merge duplicate albums into the earliest one (same artist, title equal under
+    # the column collation), moving their songs over before deleting them
+    op.execute(
+        "UPDATE songs SET album_id = ("
+        "SELECT MIN(b.id) FROM albums a JOIN albums b ON b.artist_id = a.artist_id AND b.title = a.title "
+        "WHERE a.id = songs.album_id) "
+        "WHERE album_id IS NOT NULL"
+    )
+    op.execute(
+        "DELETE FROM albums WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM albums GROUP BY artist_id, title) AS keep)"
+    )
+    op.create_unique_constraint('uq_albums_artist_id_title', 'albums', ['artist_id', 'title'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_albums_artist_id_title', 'albums', type_='unique')
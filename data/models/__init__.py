@@ -1,3 +1,52 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+from sqlalchemy import inspect
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
+
+# (model, include, exclude) -> (field names, getter), tính một lần cho mỗi model/projection
+_serializers: Dict[Tuple[type, Optional[FrozenSet[str]], FrozenSet[str]], Tuple[Tuple[str, ...], Callable[[Any], tuple]]] = {}
+
+
+class BaseMixin:
+    # Các cột nhạy cảm, không bao giờ serialize trừ khi được include tường minh
+    __serialize_exclude__: Tuple[str, ...] = ()
+
+    @classmethod
+    def serializable_fields(cls, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        return cls._serializer(include, exclude)[0]
+
+    @classmethod
+    def public_columns(cls) -> list:
+        """Column attributes for load_only(), so excluded columns are never fetched."""
+        return [getattr(cls, name) for name in cls.serializable_fields()]
+
+    @classmethod
+    def _serializer(cls, include: Optional[Iterable[str]], exclude: Optional[Iterable[str]]):
+        include_key = frozenset(include) if include is not None else None
+        exclude_key = frozenset(exclude or ())
+        key = (cls, include_key, exclude_key)
+        serializer = _serializers.get(key)
+        if serializer is None:
+            names = [attr.key for attr in inspect(cls).column_attrs]
+            if include_key is not None:
+                names = [name for name in names if name in include_key]
+            else:
+                names = [name for name in names if name not in cls.__serialize_exclude__]
+            names = tuple(name for name in names if name not in exclude_key)
+
+            if len(names) == 1:
+                single = attrgetter(names[0])
+                getter = lambda obj: (single(obj),)
+            elif names:
+                getter = attrgetter(*names)
+            else:
+                getter = lambda obj: ()
+            serializer = _serializers[key] = (names, getter)
+        return serializer
+
+    def to_dict(self, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        # datetime được ORJSONResponse serialize trực tiếp, không cần isoformat()
+        names, getter = self._serializer(include, exclude)
+        return dict(zip(names, getter(self)))
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from . import Base
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        UniqueConstraint("user_id", "song_id", name="uq_likes_user_id_song_id"),
+        Index("ix_likes_song_id_created_at", "song_id", "created_at"),
+        Index("ix_likes_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -14,6 +19,10 @@ class Like(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_song_id_created_at", "song_id", "created_at"),
+        Index("ix_comments_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
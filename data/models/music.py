@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from . import Base
+from . import Base, BaseMixin
 
-class Artist(Base):
+class Artist(Base, BaseMixin):
     __tablename__ = "artists"
+    __table_args__ = (Index("ft_artists_name", "name", mysql_prefix="FULLTEXT"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), unique=True, nullable=False)
@@ -12,8 +13,13 @@ class Artist(Base):
     songs = relationship("Song", back_populates="artist")
 
 
-class Album(Base):
+class Album(Base, BaseMixin):
     __tablename__ = "albums"
+    __table_args__ = (
+        Index("ft_albums_title", "title", mysql_prefix="FULLTEXT"),
+        Index("ix_albums_artist_id", "artist_id"),
+        UniqueConstraint("artist_id", "title", name="uq_albums_artist_id_title"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(100), nullable=False)
@@ -22,8 +28,14 @@ class Album(Base):
     songs = relationship("Song", back_populates="album")
 
 
-class Song(Base):
+class Song(Base, BaseMixin):
     __tablename__ = "songs"
+    __table_args__ = (
+        Index("ft_songs_title", "title", mysql_prefix="FULLTEXT"),
+        Index("ix_songs_artist_id", "artist_id"),
+        Index("ix_songs_album_id", "album_id"),
+        Index("ix_songs_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(100), nullable=False)
@@ -31,6 +43,11 @@ class Song(Base):
     file_url = Column(String(255), nullable=False)
     cover_url = Column(String(255), nullable=True)
 
+    # denormalized, kept up to date by the counter aggregator (business/services/counter_service.py)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    play_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     artist_id = Column(Integer, ForeignKey("artists.id"))
     album_id = Column(Integer, ForeignKey("albums.id"))
 
@@ -1,20 +1,10 @@
 from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text
 from sqlalchemy.sql import func
-from datetime import datetime
-from . import Base
-
-class BaseMixin:
-    def to_dict(self):
-        result = {}
-        for c in self.__table__.columns:
-            value = getattr(self, c.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()  # hoặc value.strftime("%Y-%m-%d %H:%M:%S")
-            result[c.name] = value
-        return result
+from . import Base, BaseMixin
 
 class User(Base, BaseMixin):
     __tablename__ = "users"
+    __serialize_exclude__ = ("password", "reset_token", "reset_expiration")
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
@@ -0,0 +1,229 @@
+import base64
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+from sqlalchemy import and_, bindparam, func, insert, inspect, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from infrastructure.cache.serializers import JsonSerializer
+
+ModelType = TypeVar("ModelType")
+
+_cursor_serializer = JsonSerializer()
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(_cursor_serializer.dumps(list(values))).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        return _cursor_serializer.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+class BaseRepository(Generic[ModelType]):
+    """Common queries for a single model.
+
+    Subclasses set `model`; everything here issues at most one statement
+    (bulk writes: one per chunk) and never loads rows it does not return.
+    """
+
+    model: Type[ModelType]
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def pk(self):
+        return inspect(self.model).primary_key[0]
+
+    async def get(self, id: Any) -> Optional[ModelType]:
+        return await self.db.get(self.model, id)
+
+    async def get_many(self, ids: Iterable[Any], *criteria, options: Sequence[Any] = ()) -> List[ModelType]:
+        """Load many rows in one IN query, returned in the order of `ids`."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        result = await self.db.execute(
+            select(self.model).options(*options).where(self.pk.in_(ids), *criteria)
+        )
+        by_id = {getattr(row, self.pk.key): row for row in result.scalars().all()}
+        return [by_id[id] for id in ids if id in by_id]
+
+    async def exists(self, *criteria) -> bool:
+        result = await self.db.execute(select(self.pk).where(*criteria).limit(1))
+        return result.first() is not None
+
+    async def count(self, *criteria) -> int:
+        result = await self.db.execute(
+            select(func.count()).select_from(self.model).where(*criteria)
+        )
+        return result.scalar_one()
+
+    async def project(self, columns: Sequence[Any], *criteria, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch only `columns` as plain dicts, skipping ORM object construction."""
+        query = select(*columns).where(*criteria)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
+        return [dict(row) for row in result.mappings().all()]
+
+    def _keyset_query(
+        self,
+        query,
+        order_by: Any,
+        after: Optional[str],
+        limit: int,
+        descending: bool
+    ):
+        pk = self.pk
+        columns = [order_by] if order_by is pk else [order_by, pk]
+        if after:
+            values = decode_cursor(after)
+            if len(values) != len(columns):
+                raise ValueError("Invalid pagination cursor")
+            if len(columns) == 1:
+                query = query.where(pk < values[0] if descending else pk > values[0])
+            else:
+                # (col, pk) > (v, id) written out so MySQL can range-scan the index
+                col_cmp = order_by < values[0] if descending else order_by > values[0]
+                pk_cmp = pk < values[1] if descending else pk > values[1]
+                query = query.where(or_(col_cmp, and_(order_by == values[0], pk_cmp)))
+        ordering = [c.desc() if descending else c.asc() for c in columns]
+        return query.order_by(*ordering).limit(limit + 1), columns
+
+    async def paginate(
+        self,
+        *criteria,
+        order_by: Any = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+        descending: bool = False,
+        options: Sequence[Any] = ()
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Keyset pagination on an indexed column (ties broken by primary key).
+
+        Returns the page and an opaque cursor for the next one, or None on the
+        last page. Cost is independent of how deep the page is.
+        """
+        order_by = self.pk if order_by is None else order_by
+        query, columns = self._keyset_query(
+            select(self.model).options(*options).where(*criteria), order_by, after, limit, descending
+        )
+        result = await self.db.execute(query)
+        items = list(result.scalars().all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+        return items, next_cursor
+
+    async def paginate_rows(
+        self,
+        query,
+        *,
+        order_by: Any = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+        descending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Keyset pagination over a column projection; `query` must select the
+        ordering column and the primary key under their own names."""
+        order_by = self.pk if order_by is None else order_by
+        query, columns = self._keyset_query(query, order_by, after, limit, descending)
+        result = await self.db.execute(query)
+        rows = [dict(row) for row in result.mappings().all()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][c.key] for c in columns])
+        return rows, next_cursor
+
+    async def bulk_insert(self, rows: Sequence[Dict[str, Any]], chunk_size: int = 1000, commit: bool = True) -> int:
+        """Insert plain dicts with one executemany per chunk, no ORM objects."""
+        for start in range(0, len(rows), chunk_size):
+            await self.db.execute(insert(self.model), list(rows[start:start + chunk_size]))
+        if commit:
+            await self.db.commit()
+        return len(rows)
+
+    async def upsert(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        update_columns: Sequence[str],
+        conflict_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 1000,
+        commit: bool = True
+    ) -> int:
+        """Insert rows, updating `update_columns` when a unique key already exists.
+
+        `conflict_columns` is needed on PostgreSQL/SQLite (defaults to the
+        primary key); MySQL resolves the conflict from any unique index.
+        Other dialects fall back to a select of the existing keys followed
+        by an executemany UPDATE and INSERT per chunk. That is not atomic, so
+        a concurrent insert of the same key can still fail there.
+        """
+        if not rows:
+            return 0
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        table = self.model.__table__
+        conflict_columns = conflict_columns or [c.name for c in table.primary_key.columns]
+        for start in range(0, len(rows), chunk_size):
+            chunk = list(rows[start:start + chunk_size])
+            if dialect_insert is None:
+                await self._update_or_insert(chunk, update_columns, conflict_columns)
+                continue
+            stmt = dialect_insert(table).values(chunk)
+            if dialect == "mysql":
+                stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+            else:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=conflict_columns,
+                    set_={c: stmt.excluded[c] for c in update_columns}
+                )
+            await self.db.execute(stmt)
+        if commit:
+            await self.db.commit()
+        return len(rows)
+
+    async def _update_or_insert(
+        self,
+        rows: List[Dict[str, Any]],
+        update_columns: Sequence[str],
+        conflict_columns: Sequence[str]
+    ):
+        table = self.model.__table__
+        keys = [table.c[c] for c in conflict_columns]
+        # the last row wins when a chunk repeats a key
+        by_key = {tuple(row[c] for c in conflict_columns): row for row in rows}
+        result = await self.db.execute(
+            select(*keys).where(or_(*(and_(*(k == v for k, v in zip(keys, key))) for key in by_key)))
+        )
+        existing = {tuple(row) for row in result}
+
+        updates = [row for key, row in by_key.items() if key in existing]
+        inserts = [row for key, row in by_key.items() if key not in existing]
+        if updates and update_columns:
+            stmt = (
+                update(table)
+                .where(and_(*(k == bindparam(f"_key_{k.key}") for k in keys)))
+                .values({c: bindparam(f"_set_{c}") for c in update_columns})
+            )
+            await self.db.execute(stmt, [
+                {**{f"_key_{c}": row[c] for c in conflict_columns}, **{f"_set_{c}": row[c] for c in update_columns}}
+                for row in updates
+            ])
+        if inserts:
+            await self.db.execute(insert(table), inserts)
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from data.models.music import Album, Artist, Song
+from data.repositories.base_repository import BaseRepository
+
+# many-to-one: một LEFT JOIN trong cùng query, không lazy load từng dòng
+SONG_DETAIL_OPTIONS = (joinedload(Song.artist), joinedload(Song.album))
+
+
+class MusicRepository(BaseRepository[Song]):
+    model = Song
+
+    def _song_rows_query(self):
+        """Flat projection for list views: no ORM objects, no relationship loading."""
+        return (
+            select(
+                Song.id,
+                Song.title,
+                Song.duration,
+                Song.file_url,
+                Song.cover_url,
+                Song.created_at,
+                Song.like_count,
+                Song.comment_count,
+                Song.play_count,
+                Song.artist_id,
+                Artist.name.label("artist_name"),
+                Song.album_id,
+                Album.title.label("album_title"),
+            )
+            .outerjoin(Artist, Song.artist_id == Artist.id)
+            .outerjoin(Album, Song.album_id == Album.id)
+        )
+
+    async def get_song(self, song_id: int) -> Optional[Song]:
+        result = await self.db.execute(
+            select(Song).options(*SONG_DETAIL_OPTIONS).where(Song.id == song_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_songs(self, song_ids: List[int]) -> List[Song]:
+        return await self.get_many(song_ids, options=SONG_DETAIL_OPTIONS)
+
+    async def get_song_rows(self, song_ids: List[int]) -> List[Dict[str, Any]]:
+        """Flat rows for the given ids, in the order the ids were given."""
+        if not song_ids:
+            return []
+        result = await self.db.execute(self._song_rows_query().where(Song.id.in_(song_ids)))
+        rows = {row["id"]: dict(row) for row in result.mappings().all()}
+        return [rows[song_id] for song_id in song_ids if song_id in rows]
+
+    async def get_popular_song_ids(self, limit: int = 20) -> List[int]:
+        result = await self.db.execute(select(Song.id).order_by(Song.like_count.desc(), Song.id).limit(limit))
+        return list(result.scalars().all())
+
+    async def list_songs(self, after: Optional[str] = None, limit: int = 50) -> Tuple[List[Song], Optional[str]]:
+        return await self.paginate(after=after, limit=limit, options=SONG_DETAIL_OPTIONS)
+
+    async def list_song_rows(
+        self,
+        after: Optional[str] = None,
+        limit: int = 50,
+        artist_id: Optional[int] = None,
+        album_id: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query = self._song_rows_query()
+        if artist_id is not None:
+            query = query.where(Song.artist_id == artist_id)
+        if album_id is not None:
+            query = query.where(Song.album_id == album_id)
+        return await self.paginate_rows(query, after=after, limit=limit)
+
+    async def get_songs_by_artist(self, artist_id: int, after: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.list_song_rows(after=after, limit=limit, artist_id=artist_id)
+
+    async def get_songs_by_album(self, album_id: int, after: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.list_song_rows(after=after, limit=limit, album_id=album_id)
+
+    async def get_artist(self, artist_id: int, with_songs: bool = False) -> Optional[Artist]:
+        query = select(Artist).where(Artist.id == artist_id)
+        if with_songs:
+            # one-to-many: một query IN thứ hai cho toàn bộ songs
+            query = query.options(selectinload(Artist.songs))
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_album(self, album_id: int, with_songs: bool = False) -> Optional[Album]:
+        query = select(Album).where(Album.id == album_id)
+        if with_songs:
+            query = query.options(selectinload(Album.songs).joinedload(Song.artist))
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_artist_by_name(self, name: str) -> Optional[Artist]:
+        result = await self.db.execute(select(Artist).where(Artist.name == name))
+        return result.scalar_one_or_none()
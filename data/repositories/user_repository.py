@@ -1,31 +1,118 @@
+import os
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached, load_only
 from sqlalchemy import update
-from typing import Optional, List, Dict, Any
+from sqlalchemy.exc import IntegrityError
+from typing import Optional, List, Dict, Any, Tuple
 from data.models.user import User
+from data.repositories.base_repository import BaseRepository
+from infrastructure.cache import cache
 
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
 
-class UserRepository:
-    def __init__(self, db: AsyncSession):
-        self.db = db
+
+def _id_key(user_id: int) -> str:
+    return f"user:id:{user_id}"
+
+# email/username keys only point at the id; the row itself lives under the id key
+def _email_key(email: str) -> str:
+    return f"user:email:{email.lower()}"
+
+def _username_key(username: str) -> str:
+    return f"user:username:{username.lower()}"
+
+
+class UserRepository(BaseRepository[User]):
+    model = User
+
+    def _to_row(self, user: User) -> Dict[str, Any]:
+        # never cache the password hash or reset token; see get_secrets()
+        return user.to_dict()
+
+    async def _from_row(self, row: Dict[str, Any]) -> User:
+        # attach the cached row to this session without emitting a SELECT;
+        # the secret columns stay unloaded
+        user = User(**row)
+        make_transient_to_detached(user)
+        return await self.db.merge(user, load=False)
+
+    async def _cache_user(self, user: User):
+        await cache.set(_id_key(user.id), self._to_row(user), ttl=USER_CACHE_TTL)
+        await cache.set(_email_key(user.email), user.id, ttl=USER_CACHE_TTL)
+        await cache.set(_username_key(user.username), user.id, ttl=USER_CACHE_TTL)
+
+    async def _invalidate(self, user_id: int):
+        await cache.delete(_id_key(user_id))
+
+    def _supports_update_returning(self) -> bool:
+        # AsyncSession has no .bind; get_bind() also resolves per-model binds
+        return bool(getattr(self.db.get_bind(self.model).dialect, "update_returning", False))
 
     async def get_by_id(self, user_id: int) -> Optional[User]:
-        result = await self.db.execute(
-            select(User).where(User.id == user_id, User.is_active == True)
+        loaded = {}
+
+        async def load():
+            result = await self.db.execute(
+                select(User).where(User.id == user_id, User.is_active == True)
+            )
+            user = loaded["user"] = result.scalar_one_or_none()
+            return self._to_row(user) if user else None
+
+        row = await cache.get_or_set(_id_key(user_id), load, ttl=USER_CACHE_TTL)
+        if "user" in loaded:
+            return loaded["user"]
+        if not row or not row.get("is_active"):
+            return None
+        return await self._from_row(row)
+
+    async def get_secrets(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Password hash and reset token, always read from the database."""
+        rows = await self.project(
+            [User.password, User.reset_token, User.reset_expiration],
+            User.id == user_id,
+            User.is_active == True,
+            limit=1
         )
-        return result.scalar_one_or_none()
+        return rows[0] if rows else None
+
+    async def _get_by_cached_id(self, key: str, field: str, value: str) -> Optional[User]:
+        user_id = await cache.get(key)
+        if user_id is None:
+            return None
+        user = await self.get_by_id(user_id)
+        # the pointer is stale if the user changed email/username since
+        if user is None or getattr(user, field).lower() != value.lower():
+            await cache.delete(key)
+            return None
+        return user
 
     async def get_by_email(self, email: str) -> Optional[User]:
+        user = await self._get_by_cached_id(_email_key(email), "email", email)
+        if user:
+            return user
+
         result = await self.db.execute(
             select(User).where(User.email == email, User.is_active == True)
         )
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user:
+            await self._cache_user(user)
+        return user
 
     async def get_by_username(self, username: str) -> Optional[User]:
+        user = await self._get_by_cached_id(_username_key(username), "username", username)
+        if user:
+            return user
+
         result = await self.db.execute(
             select(User).where(User.username == username, User.is_active == True)
         )
-        return result.scalars().first()
+        user = result.scalars().first()
+        if user:
+            await self._cache_user(user)
+        return user
 
     async def create(self, user_data: Dict[str, Any]) -> User:
         user = User(
@@ -36,21 +123,41 @@ class UserRepository:
             bio=user_data.get("bio"),
             image_url=user_data.get("image_url"),
             role=user_data.get("role", "user"),
-            is_active=user_data.get("is_active", True)
+            is_active=user_data.get("is_active", True),
+            # set client-side so the row is complete after the INSERT and needs no refresh
+            created_at=datetime.utcnow()
         )
         self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        await self._cache_user(user)
         return user
 
     async def update(self, user_id: int, update_data: Dict[str, Any]) -> Optional[User]:
-        await self.db.execute(
-            update(User)
-            .where(User.id == user_id)
-            .values(**update_data)
-        )
-        await self.db.commit()
-        return await self.get_by_id(user_id)
+        values = dict(update_data)
+        # set explicitly so the ORM can sync it onto loaded objects instead of expiring it
+        values.setdefault("updated_at", datetime.utcnow())
+        stmt = update(User).where(User.id == user_id).values(**values)
+
+        await self._invalidate(user_id)
+        if self._supports_update_returning():
+            result = await self.db.execute(stmt.returning(User))
+            user = result.scalar_one_or_none()
+            await self.db.commit()
+        else:
+            # the UPDATE synchronizes the row already in the identity map,
+            # so get() only hits the database if this session never loaded it
+            await self.db.execute(stmt)
+            await self.db.commit()
+            user = await self.db.get(User, user_id)
+
+        if not user or not user.is_active:
+            return None
+        await self._cache_user(user)
+        return user
 
     async def delete(self, user_id: int) -> bool:
         result = await self.db.execute(
@@ -59,13 +166,13 @@ class UserRepository:
             .values(is_active=False)
         )
         await self.db.commit()
+        await self._invalidate(user_id)
         return result.rowcount > 0
 
-    async def get_all(self, limit: int = 100, offset: int = 0) -> List[User]:
-        result = await self.db.execute(
-            select(User)
-            .where(User.is_active == True)
-            .offset(offset)
-            .limit(limit)
+    async def get_all(self, limit: int = 100, after: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+        return await self.paginate(
+            User.is_active == True,
+            after=after,
+            limit=limit,
+            options=[load_only(*User.public_columns())]
         )
-        return result.scalars().all()
\ No newline at end of file
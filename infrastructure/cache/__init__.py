@@ -0,0 +1,5 @@
+from infrastructure.cache.tiered import Cache, cache
+from infrastructure.cache.disk import DiskLRUCache
+from infrastructure.cache.memory import ExpiringSet, LRUCache
+from infrastructure.cache.redis_pool import RedisClient, redis_client
+from infrastructure.cache.single_flight import SingleFlight
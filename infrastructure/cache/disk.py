@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class DiskLRUCache:
+    """Size-bounded cache of files on local disk.
+
+    Entries are addressed by the SHA-256 of their key, so the digest doubles
+    as a stable content identifier (e.g. for strong ETags). Recency is
+    tracked in memory; `load()` rebuilds the index from the files already on
+    disk, oldest access first. Not thread-safe; meant to be used from the
+    event loop only.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if len(name) != 64:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, name, stat.st_size))
+        entries.sort()
+        return entries
+
+    def _index_entries(self, entries: List[Tuple[float, str, int]]):
+        self._loaded = True
+        for _, digest, size in entries:
+            if digest not in self._index:
+                self._index[digest] = size
+                self._size += size
+
+    async def load(self):
+        """Rebuild the index from the files on disk, walking them in a worker thread.
+
+        Call before get()/set() on the event loop; concurrent callers share one walk.
+        """
+        if self._loaded:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self._scan))
+        try:
+            entries = await asyncio.shield(self._loading)
+        except Exception:
+            self._loading = None
+            raise
+        if not self._loaded:
+            self._index_entries(entries)
+
+    def _load(self):
+        # synchronous fallback for callers that did not await load()
+        if not self._loaded:
+            self._index_entries(self._scan())
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached file for `key`, or None."""
+        self._load()
+        digest = self.digest(key)
+        if digest in self._index and os.path.exists(self._path(digest)):
+            self._index.move_to_end(digest)
+            self.hits += 1
+            return self._path(digest)
+        if digest in self._index:
+            self._size -= self._index.pop(digest)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, data: bytes) -> str:
+        self._load()
+        digest = self.digest(key)
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        self._size += len(data) - self._index.pop(digest, 0)
+        self._index[digest] = len(data)
+        while self._size > self.max_bytes and len(self._index) > 1:
+            old, size = self._index.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._index),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
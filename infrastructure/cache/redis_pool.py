@@ -0,0 +1,61 @@
+import logging
+import os
+import time
+from typing import Optional
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+except ImportError:  # cache falls back to in-process only
+    aioredis = None
+    RedisConnectionError = RedisTimeoutError = OSError
+
+logger = logging.getLogger(__name__)
+
+REDIS_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+
+class RedisClient:
+    """Lazily created pooled Redis connection with a circuit breaker.
+
+    After a connection failure Redis is considered down for `retry_after`
+    seconds and callers get None, so they can serve from local memory.
+    """
+
+    def __init__(self, url: Optional[str] = None, max_connections: Optional[int] = None, retry_after: float = 30.0):
+        self.url = url if url is not None else os.getenv("REDIS_URL")
+        self.max_connections = max_connections or int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        self.socket_timeout = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+        self.retry_after = retry_after
+        self._client = None
+        self._down_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return aioredis is not None and bool(self.url)
+
+    def get(self):
+        if not self.enabled or time.monotonic() < self._down_until:
+            return None
+        if self._client is None:
+            self._client = aioredis.from_url(
+                self.url,
+                max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+                health_check_interval=30,
+            )
+        return self._client
+
+    def mark_down(self, exc: Exception):
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Redis unavailable, using local cache only: {exc}")
+        self._down_until = time.monotonic() + self.retry_after
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+redis_client = RedisClient()
@@ -0,0 +1,165 @@
+import inspect
+import os
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+from infrastructure.cache.memory import LRUCache
+from infrastructure.cache.redis_pool import REDIS_ERRORS, RedisClient, redis_client
+from infrastructure.cache.serializers import get_serializer
+from infrastructure.cache.single_flight import SingleFlight
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class Cache:
+    """Two-tier async cache: an in-process LRU in front of Redis.
+
+    Local entries live at most `local_ttl` seconds while Redis is reachable,
+    which bounds how stale other workers can be after an invalidation. When
+    Redis is down the local tier alone serves reads with the full TTL.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "music",
+        default_ttl: float = 300,
+        local_maxsize: int = 10000,
+        local_ttl: float = 5,
+        serializer: Optional[str] = None,
+        redis: Optional[RedisClient] = None
+    ):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.local_ttl = local_ttl
+        self.local = LRUCache(maxsize=local_maxsize)
+        self.serializer = get_serializer(serializer or os.getenv("CACHE_SERIALIZER", "json"))
+        self.redis = redis or redis_client
+        self._flights = SingleFlight()
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str, default: Optional[T] = None) -> Optional[T]:
+        full_key = self._key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        client = self.redis.get()
+        if client is None:
+            return default
+        try:
+            data = await client.get(full_key)
+            if data is None:
+                return default
+            ttl = await client.pttl(full_key)
+        except REDIS_ERRORS as e:
+            self.redis.mark_down(e)
+            return default
+
+        value = self.serializer.loads(data)
+        local_ttl = self.local_ttl if ttl is None or ttl < 0 else min(self.local_ttl, ttl / 1000)
+        self.local.set(full_key, value, ttl=local_ttl)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        full_key = self._key(key)
+        ttl = self.default_ttl if ttl is None else ttl
+
+        client = self.redis.get()
+        if client is not None:
+            try:
+                await client.set(full_key, self.serializer.dumps(value), px=int(ttl * 1000))
+                self.local.set(full_key, value, ttl=min(ttl, self.local_ttl))
+                return
+            except REDIS_ERRORS as e:
+                self.redis.mark_down(e)
+        self.local.set(full_key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        full_keys = [self._key(key) for key in keys]
+        for full_key in full_keys:
+            self.local.delete(full_key)
+
+        client = self.redis.get()
+        if client is not None and full_keys:
+            try:
+                await client.delete(*full_keys)
+            except REDIS_ERRORS as e:
+                self.redis.mark_down(e)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl: Optional[float] = None,
+        cache_none: bool = False
+    ) -> T:
+        value = await self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        async def load() -> T:
+            value = await loader()
+            if value is not None or cache_none:
+                await self.set(key, value, ttl)
+            return value
+
+        # single-flight: concurrent misses on the same key share one load
+        return await self._flights.run(key, load)
+
+    def cached(
+        self,
+        key: Union[str, Callable[..., str]],
+        ttl: Optional[float] = None,
+        cache_none: bool = False
+    ):
+        """Cache an async function's result.
+
+        `key` is either a format string over the function's argument names,
+        e.g. "user:id:{user_id}", or a callable receiving the same arguments.
+        """
+        def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+            signature = inspect.signature(func)
+
+            def build_key(*args, **kwargs) -> str:
+                if callable(key):
+                    return key(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return key.format(**bound.arguments)
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await self.get_or_set(
+                    build_key(*args, **kwargs),
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    cache_none=cache_none
+                )
+
+            async def invalidate(*args, **kwargs):
+                await self.delete(build_key(*args, **kwargs))
+
+            wrapper.invalidate = invalidate
+            wrapper.cache_key = build_key
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "redis_enabled": self.redis.enabled,
+            "redis_available": self.redis.get() is not None,
+            "serializer": self.serializer.name,
+        }
+
+
+cache = Cache(
+    namespace=os.getenv("CACHE_NAMESPACE", "music"),
+    default_ttl=float(os.getenv("CACHE_DEFAULT_TTL", "300")),
+    local_maxsize=int(os.getenv("CACHE_LOCAL_MAXSIZE", "10000")),
+    local_ttl=float(os.getenv("CACHE_LOCAL_TTL", "5")),
+)
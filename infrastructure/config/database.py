@@ -1,18 +1,135 @@
 import os
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 
 # Load biến môi trường
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Read replica cho các session chỉ SELECT (không bắt buộc)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Engine profiles, mọi giá trị đều có thể override bằng biến môi trường DB_*
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "statement_timeout_ms": 0,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "statement_timeout_ms": 5000,
+    },
+}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def get_engine_settings() -> Dict[str, Any]:
+    profile = os.getenv("DB_PROFILE", os.getenv("APP_ENV", "dev")).lower()
+    settings = dict(ENGINE_PROFILES.get(profile, ENGINE_PROFILES["dev"]))
+    settings["echo"] = _env_bool("DB_ECHO", settings["echo"])
+    for name in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "statement_timeout_ms"):
+        settings[name] = int(os.getenv(f"DB_{name.upper()}", settings[name]))
+    return settings
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.wait_count += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": (self.wait_total / self.wait_count * 1000) if self.wait_count else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_engine_from_settings(url: str, settings: Dict[str, Any]):
+    new_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=True,
+        echo=settings["echo"],
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+    )
+
+    @event.listens_for(new_engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        new_engine.sync_engine.pool.metrics.checkouts += 1
+
+    timeout_ms = settings["statement_timeout_ms"]
+    if timeout_ms and new_engine.dialect.name == "mysql":
+        # max_execution_time chỉ áp dụng cho SELECT trên MySQL
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET SESSION max_execution_time = {int(timeout_ms)}")
+            cursor.close()
+
+    return new_engine
+
+
+engine_settings = get_engine_settings()
+
 # Tạo async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    echo=True
-)
+engine = create_engine_from_settings(DATABASE_URL, engine_settings)
+read_engine = create_engine_from_settings(DATABASE_REPLICA_URL, engine_settings) if DATABASE_REPLICA_URL else engine
 
 # Tạo async session
 AsyncSessionLocal = sessionmaker(
@@ -23,6 +140,14 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class cho models
 Base = declarative_base()
 
@@ -30,3 +155,29 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+# Dependency cho các endpoint chỉ đọc, dùng replica nếu có cấu hình
+async def get_read_db():
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+def _pool_stats(target_engine) -> Dict[str, Any]:
+    pool = target_engine.sync_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    metrics: Optional[PoolMetrics] = getattr(pool, "metrics", None)
+    if metrics:
+        stats.update(metrics.to_dict())
+    return stats
+
+
+def get_pool_metrics() -> Dict[str, Any]:
+    metrics = {"primary": _pool_stats(engine)}
+    if read_engine is not engine:
+        metrics["replica"] = _pool_stats(read_engine)
+    return metrics
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+import httpx
+import infrastructure.config.cloudinary  # noqa: F401  (applies cloudinary.config from env)
+from infrastructure.external.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary requires every chunk except the last to be at least 5 MB
+MIN_CHUNK_SIZE = 5 * 1024 * 1024
+
+
+class CloudinaryUploadError(Exception):
+    pass
+
+
+def _snippet(response: httpx.Response, limit: int = 200) -> str:
+    text = " ".join(response.text.split())
+    return text[:limit] + ("..." if len(text) > limit else "")
+
+
+@dataclass
+class UploadItem:
+    path: str
+    public_id: Optional[str] = None
+    folder: Optional[str] = None
+    resource_type: str = "auto"
+
+
+class CloudinaryService:
+    """Async uploads to Cloudinary's REST API.
+
+    Files are sent in fixed-size chunks read one at a time, so memory stays
+    at one chunk per upload no matter how large the file is. Chunks of one
+    upload share an X-Unique-Upload-Id; after each accepted chunk the offset
+    is checkpointed to `state_dir`, so a retried or restarted upload of the
+    same file continues where it stopped. A semaphore bounds how many
+    uploads (and blocking SDK calls) run at once.
+
+    `base_url` points at the API root and can be swapped for a local
+    stand-in in development and tests.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        state_dir: Optional[str] = None
+    ):
+        self.base_url = (base_url or os.getenv("CLOUDINARY_API_BASE_URL", "https://api.cloudinary.com/v1_1")).rstrip("/")
+        self.chunk_size = max(MIN_CHUNK_SIZE, chunk_size or int(os.getenv("CLOUDINARY_CHUNK_SIZE", str(20 * 1024 * 1024))))
+        self.max_concurrency = max_concurrency or int(os.getenv("CLOUDINARY_MAX_CONCURRENCY", "4"))
+        self.max_attempts = max_attempts or int(os.getenv("CLOUDINARY_MAX_ATTEMPTS", "4"))
+        self.retry_base_delay = float(os.getenv("CLOUDINARY_RETRY_BASE_DELAY", "1"))
+        self.timeout = float(os.getenv("CLOUDINARY_TIMEOUT", "120"))
+        self.state_dir = state_dir or os.getenv("CLOUDINARY_UPLOAD_STATE_DIR", os.path.join("var", "uploads"))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _signed_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        config = cloudinary.config()
+        if not config.api_key or not config.api_secret:
+            raise CloudinaryUploadError("Cloudinary credentials are not configured")
+        params = {key: value for key, value in params.items() if value is not None}
+        params["timestamp"] = int(time.time())
+        params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params["api_key"] = config.api_key
+        return params
+
+    # -- resumable state ---------------------------------------------------------
+
+    def _state_path(self, item: UploadItem, size: int, mtime_ns: int) -> str:
+        identity = f"{os.path.realpath(item.path)}|{size}|{mtime_ns}|{item.public_id}|{item.folder}"
+        return os.path.join(self.state_dir, hashlib.sha256(identity.encode()).hexdigest() + ".json")
+
+    def _load_state(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"upload_id": uuid.uuid4().hex, "offset": 0}
+
+    def _save_state(self, path: str, state: Dict[str, Any]):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
+
+    # -- uploads -----------------------------------------------------------------
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Dict[str, Any]:
+        # proxies and size limits answer with HTML (413, 403 pages), not JSON
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            raise CloudinaryUploadError(f"Cloudinary returned {response.status_code} with a non-JSON body: {_snippet(response)}")
+        return body
+
+    async def _post_chunk(self, url: str, params: Dict[str, Any], chunk: bytes, filename: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        client = http_client.get()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await client.post(
+                    url,
+                    data=self._signed_params(params),
+                    files={"file": (filename, chunk)},
+                    headers=headers,
+                    timeout=self.timeout,
+                )
+                if response.status_code < 500 and response.status_code != 429:
+                    body = self._decode(response)
+                    if response.status_code >= 400:
+                        # 4xx other than throttling will not succeed on retry
+                        error = body.get("error")
+                        message = error.get("message") if isinstance(error, dict) else None
+                        raise CloudinaryUploadError(f"Cloudinary returned {response.status_code}: {message or _snippet(response)}")
+                    return body
+                error = CloudinaryUploadError(f"Cloudinary returned {response.status_code}: {_snippet(response)}")
+            except httpx.HTTPError as e:
+                error = CloudinaryUploadError(f"Request to Cloudinary failed: {e!r}")
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+        raise error
+
+    async def upload_file(
+        self,
+        path: str,
+        public_id: Optional[str] = None,
+        folder: Optional[str] = None,
+        resource_type: str = "auto"
+    ) -> Dict[str, Any]:
+        """Upload a local file, chunked when it is larger than one chunk."""
+        item = UploadItem(path=path, public_id=public_id, folder=folder, resource_type=resource_type)
+        async with self.semaphore:
+            return await self._upload(item)
+
+    async def _upload(self, item: UploadItem) -> Dict[str, Any]:
+        stat = os.stat(item.path)
+        size = stat.st_size
+        url = f"{self.base_url}/{cloudinary.config().cloud_name}/{item.resource_type}/upload"
+        params = {"public_id": item.public_id, "folder": item.folder}
+        filename = os.path.basename(item.path)
+
+        state_path = self._state_path(item, size, stat.st_mtime_ns)
+        state = self._load_state(state_path)
+        started = time.perf_counter()
+
+        with open(item.path, "rb") as f:
+            if size <= self.chunk_size:
+                result = await self._post_chunk(url, params, await asyncio.to_thread(f.read), filename, {})
+            else:
+                offset = state["offset"]
+                if offset:
+                    logger.info(f"Resuming upload of {item.path} at byte {offset}/{size}")
+                result = {}
+                while offset < size:
+                    f.seek(offset)
+                    chunk = await asyncio.to_thread(f.read, self.chunk_size)
+                    end = offset + len(chunk) - 1
+                    result = await self._post_chunk(url, params, chunk, filename, {
+                        "X-Unique-Upload-Id": state["upload_id"],
+                        "Content-Range": f"bytes {offset}-{end}/{size}",
+                    })
+                    offset = end + 1
+                    state["offset"] = offset
+                    if offset < size:
+                        self._save_state(state_path, state)
+
+        try:
+            os.remove(state_path)
+        except FileNotFoundError:
+            pass
+        elapsed = time.perf_counter() - started
+        logger.info(f"Uploaded {item.path} ({size} bytes) in {elapsed:.2f}s")
+        return result
+
+    async def upload_many(self, items: Iterable[UploadItem], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Bulk mode: upload many files concurrently, one result per item in order.
+
+        A failed item does not stop the batch; its result carries an "error".
+        """
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else self.semaphore
+
+        async def run(item: UploadItem) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return {"path": item.path, "result": await self._upload(item)}
+                except (CloudinaryUploadError, httpx.HTTPError, OSError, ValueError) as e:
+                    logger.error(f"Upload of {item.path} failed: {e}")
+                    return {"path": item.path, "error": str(e)}
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    async def destroy(self, public_id: str, resource_type: str = "image") -> Dict[str, Any]:
+        # the SDK is synchronous (urllib3); keep it off the event loop
+        async with self.semaphore:
+            return await asyncio.to_thread(cloudinary.uploader.destroy, public_id, resource_type=resource_type)
+
+
+cloudinary_service = CloudinaryService()
@@ -1,29 +1,204 @@
-import smtplib
+import asyncio
+import logging
+import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
+from typing import Any, Dict, List, Optional
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
 
 class EmailService:
+    """Queues outgoing mail and delivers it from a background task.
+
+    Callers only enqueue, so request handlers never wait on SMTP. The worker
+    keeps one SMTP connection open while there is traffic, sends queued mail
+    in batches over it and retries failed messages with exponential backoff.
+    On shutdown, mail waiting on a backoff gets one last immediate attempt;
+    whatever still can't be sent is logged by recipient.
+    """
+
     def __init__(self):
         self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", 587))
         self.smtp_user = os.getenv("SMTP_USER")
         self.smtp_pass = os.getenv("SMTP_PASS")
+        self.smtp_use_tls = os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+        self.smtp_timeout = float(os.getenv("SMTP_TIMEOUT", "10"))
+        self.frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+        self.outbox_size = int(os.getenv("EMAIL_OUTBOX_SIZE", "1000"))
+        self.batch_size = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+        self.max_attempts = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+        self.retry_base_delay = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "2"))
+        self.idle_timeout = float(os.getenv("EMAIL_IDLE_TIMEOUT", "30"))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        # mail waiting on a backoff, by its timer
+        self._retries: Dict[asyncio.TimerHandle, Dict[str, Any]] = {}
+        self._closing = False
 
-    def send_mail(self, to_email: str, subject: str, body: str):
+    def _build_message(self, to_email: str, subject: str, body: str) -> MIMEMultipart:
         msg = MIMEMultipart()
         msg["From"] = self.smtp_user
         msg["To"] = to_email
         msg["Subject"] = subject
 
         msg.attach(MIMEText(body, "plain"))
+        return msg
 
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.outbox_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def _enqueue(self, item: Dict[str, Any]) -> bool:
+        self._ensure_worker()
         try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_pass)
-                server.sendmail(self.smtp_user, to_email, msg.as_string())
+            self._queue.put_nowait(item)
             return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
+        except asyncio.QueueFull:
+            logger.error(f"Email outbox full, dropping mail to {item['message']['To']}")
             return False
+
+    async def send_mail(self, to_email: str, subject: str, body: str) -> bool:
+        return self._enqueue({"message": self._build_message(to_email, subject, body), "attempts": 0})
+
+    async def send_reset_password_email(self, to_email: str, reset_token: str, name: str) -> bool:
+        reset_link = f"{self.frontend_url}/reset-password?token={reset_token}"
+        body = (
+            f"Hi {name},\n\n"
+            f"We received a request to reset your password. Use the link below to choose a new one:\n\n"
+            f"{reset_link}\n\n"
+            f"If you did not request this, you can ignore this email."
+        )
+        return await self.send_mail(to_email, "Reset your password", body)
+
+    async def send_password_changed_notification(self, to_email: str, name: str) -> bool:
+        body = (
+            f"Hi {name},\n\n"
+            f"Your password has just been changed. If this wasn't you, please reset your password immediately."
+        )
+        return await self.send_mail(to_email, "Your password has been changed", body)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+
+        smtp = aiosmtplib.SMTP(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            use_tls=self.smtp_use_tls,
+            timeout=self.smtp_timeout
+        )
+        # STARTTLS is negotiated automatically when the server offers it
+        await smtp.connect()
+        if self.smtp_user and self.smtp_pass:
+            await smtp.login(self.smtp_user, self.smtp_pass)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
+
+    def _schedule_retry(self, item: Dict[str, Any], error: Exception):
+        item["attempts"] += 1
+        to_email = item["message"]["To"]
+        if item["attempts"] >= self.max_attempts:
+            logger.error(f"Giving up on mail to {to_email} after {item['attempts']} attempts: {error}")
+            return
+        if self._closing:
+            logger.error(f"Dropping mail to {to_email} on shutdown: {error}")
+            return
+
+        delay = self.retry_base_delay * (2 ** (item["attempts"] - 1))
+        logger.warning(f"Mail to {to_email} failed ({error}), retrying in {delay:.0f}s")
+
+        def requeue():
+            self._retries.pop(handle, None)
+            self._enqueue(item)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries[handle] = item
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]):
+        for item in batch:
+            try:
+                smtp = await self._connect()
+                await smtp.send_message(item["message"])
+            except (aiosmtplib.SMTPException, OSError) as e:
+                # the connection state is unknown after a failure, start fresh
+                await self._disconnect()
+                self._schedule_retry(item, e)
+            except Exception as e:
+                # don't let one bad message take the rest of the batch down
+                logger.exception(f"Unexpected error sending mail to {item['message']['To']}")
+                await self._disconnect()
+                self._schedule_retry(item, e)
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                await self._disconnect()
+                continue
+
+            batch = [item]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error in email worker: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def close(self, timeout: float = 10):
+        """Send what is queued or waiting on a backoff, then stop the worker."""
+        self._closing = True
+        retries = list(self._retries.values())
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        # skip the backoff: this is the last chance to send them
+        for item in retries:
+            self._enqueue(item)
+
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                dropped = []
+                while not self._queue.empty():
+                    dropped.append(self._queue.get_nowait()["message"]["To"])
+                    self._queue.task_done()
+                if dropped:
+                    logger.error(f"Email outbox not drained on shutdown, dropped {len(dropped)} mails to: {', '.join(dropped)}")
+
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self._disconnect()
+        self._closing = False
+
+
+email_service = EmailService()
@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+import httpx
+
+
+class HttpClient:
+    """Lazily created, pooled httpx client shared by everything that talks to
+    remote HTTP services, so connections (and TLS sessions) are reused."""
+
+    def __init__(self, max_connections: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_connections = max_connections or int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.timeout = timeout or float(os.getenv("HTTP_TIMEOUT", "10"))
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, read=None),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections // 2),
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = HttpClient()
@@ -1,4 +1,7 @@
+import asyncio
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
@@ -9,15 +12,36 @@ load_dotenv()
 
 # Import auth router
 from presentation.controllers.auth_controller import router as auth_router
+from presentation.controllers.music_controller import router as music_router
+from presentation.controllers.image_controller import router as image_router
+from presentation.controllers.search_controller import router as search_router
+from presentation.controllers.recommendation_controller import router as recommendation_router
+from business.services.search_service import warm_up_search_index
+from business.services.recommendation_service import refresh_recommendations_periodically
+from business.services.counter_service import song_counters, flush_counters_periodically, reconcile_counters_periodically
+from presentation.middleware.rate_limit_middleware import RateLimitMiddleware
+from business.utils.password_hasher import password_hasher
+from business.utils.audio_processor import audio_processor
+from business.utils.image_processor import image_processor
+from infrastructure.cache import redis_client
+from infrastructure.external.email_servive import email_service
+from infrastructure.external.http_client import http_client
+from infrastructure.config.database import engine, read_engine, get_pool_metrics
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Music Streaming API",
     description="A modern music streaming backend built with FastAPI",
     version="1.0.0",
     docs_url="/docs",        # Swagger UI
-    redoc_url="/redoc"       # ReDoc
+    redoc_url="/redoc",      # ReDoc
+    default_response_class=ORJSONResponse
 )
 
+# Rate limiting, added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +53,40 @@ app.add_middleware(
 
 # Include auth router
 app.include_router(auth_router, prefix="/api/v1", tags=["Authentication"])
+app.include_router(music_router, prefix="/api/v1", tags=["Music"])
+app.include_router(image_router, prefix="/api/v1", tags=["Images"])
+app.include_router(search_router, prefix="/api/v1", tags=["Search"])
+app.include_router(recommendation_router, prefix="/api/v1", tags=["Recommendations"])
+
+background_tasks = set()
+
+@app.on_event("startup")
+async def startup():
+    for job in (
+        warm_up_search_index,
+        refresh_recommendations_periodically,
+        flush_counters_periodically,
+        reconcile_counters_periodically,
+    ):
+        task = asyncio.create_task(job())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await email_service.close()
+    await http_client.close()
+    password_hasher.shutdown()
+    audio_processor.shutdown()
+    image_processor.shutdown()
+    try:
+        await song_counters.flush()
+    except Exception as e:
+        logger.error(f"Failed to flush song counters on shutdown: {e}")
+    await redis_client.close()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 @app.get("/")
 async def root():
@@ -43,6 +101,10 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "Service is up and running"}
 
+@app.get("/api/v1/metrics/db")
+async def db_metrics():
+    return {"status": "success", "metadata": {"pools": get_pool_metrics()}}
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -3,7 +3,8 @@ from shared.decorators import async_handler
 from shared.responses import OK, CREATED
 from business.services.auth_service import AuthService
 from presentation.validator.auth_validator import RegisterRequest, LoginRequest, ForgotPasswordRequest, ResetPasswordRequest
-from presentation.middleware.auth_middleware import get_current_user
+from presentation.middleware.auth_middleware import get_current_user, invalidate_token, security
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import datetime
 from infrastructure.config.database import get_db, AsyncSession
 
@@ -74,7 +75,11 @@ async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depen
 
 @router.post("/logout")
 @async_handler
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    await invalidate_token(credentials.credentials, current_user)
     return OK(
         message="Logout successful",
         metadata={"message": "Please remove token from client storage"}
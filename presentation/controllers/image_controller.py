@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Query, Request
+from typing import Optional
+from shared.decorators import async_handler
+from shared.helpers import file_response, not_modified
+from business.services.image_service import ImageService
+
+router = APIRouter(prefix="/images", tags=["Images"])
+image_service = ImageService()
+
+IMAGE_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+@router.get("/resize")
+@async_handler
+async def resize_image(
+    request: Request,
+    src: str = Query(..., max_length=512, description="Media path or allowed-host HTTPS URL"),
+    w: int = Query(..., ge=1, description="Target width"),
+    h: Optional[int] = Query(None, ge=1, description="Target height; crops to fill when given"),
+    format: str = Query("webp", pattern="^(webp|jpeg|png)$")
+):
+    image = image_service.describe(src, w, h, format)
+    cached = not_modified(request, image.etag, IMAGE_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    image = await image_service.render(image)
+    return file_response(request, image.path, image.media_type, IMAGE_CACHE_CONTROL, etag=image.etag)
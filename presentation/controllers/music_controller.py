@@ -0,0 +1,103 @@
+import numpy as np
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from shared.decorators import async_handler
+from shared.helpers import file_response, not_modified
+from shared.responses import OK, ACCEPTED
+from business.services.music_service import MusicService, PROXY_RESPONSE_HEADERS, STREAM_CHUNK_SIZE
+from business.services.counter_service import record_play
+from infrastructure.config.database import get_db, get_read_db, AsyncSession
+from presentation.middleware.auth_middleware import get_current_user
+
+router = APIRouter(prefix="/songs", tags=["Music"])
+music_service = MusicService()
+
+STREAM_CACHE_CONTROL = "private, max-age=3600"
+WAVEFORM_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+WAVEFORM_HEADERS = ("Zoom", "Levels", "Bits", "Points", "Duration")
+
+
+@router.api_route("/{song_id}/stream", methods=["GET", "HEAD"])
+@async_handler
+async def stream_song(song_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    source = await music_service.get_audio_source(db, song_id)
+    # a seek is another Range request; only the first request of a playback counts
+    first_request = request.method == "GET" and request.headers.get("range", "bytes=0-") == "bytes=0-"
+
+    if source.is_local:
+        # FileResponse answers Range/If-Range with 206 (or 416) itself and uses
+        # the server's zero-copy path send when it offers one
+        response = file_response(request, source.path, source.media_type, STREAM_CACHE_CONTROL)
+        # a 304 revalidation sends no audio
+        if first_request and response.status_code != 304:
+            record_play(song_id)
+        return response
+
+    upstream = await music_service.open_remote_stream(source.url, dict(request.headers))
+    if first_request and upstream.status_code in (200, 206):
+        record_play(song_id)
+    headers = {name: upstream.headers[name] for name in PROXY_RESPONSE_HEADERS if name in upstream.headers}
+    headers.setdefault("accept-ranges", "bytes")
+    headers["cache-control"] = STREAM_CACHE_CONTROL
+    if request.method == "HEAD" or upstream.status_code == 304:
+        await upstream.aclose()
+        return Response(status_code=upstream.status_code, headers=headers)
+    return StreamingResponse(
+        upstream.aiter_raw(STREAM_CHUNK_SIZE),
+        status_code=upstream.status_code,
+        headers=headers,
+        media_type=headers.get("content-type", source.media_type),
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
+@router.api_route("/{song_id}/hls/{name:path}", methods=["GET", "HEAD"])
+@async_handler
+async def get_hls_file(song_id: int, name: str, request: Request):
+    hls_file = music_service.get_hls_file(song_id, name)
+    response = file_response(request, hls_file.path, hls_file.media_type, hls_file.cache_control)
+    # players load the master playlist once per playback
+    if request.method == "GET" and name == "master.m3u8" and response.status_code != 304:
+        record_play(song_id)
+    return response
+
+@router.get("/{song_id}/waveform")
+@async_handler
+async def get_waveform(
+    song_id: int,
+    request: Request,
+    zoom: int = Query(0, ge=0, le=10, description="0 is the coarsest level; each level doubles the points"),
+    format: str = Query("binary", pattern="^(binary|json)$")
+):
+    waveform = music_service.get_waveform(song_id, zoom)
+    headers = {"ETag": waveform["etag"], "Cache-Control": WAVEFORM_CACHE_CONTROL}
+    cached = not_modified(request, waveform["etag"], WAVEFORM_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    if format == "json":
+        dtype = np.int8 if waveform["bits"] == 8 else np.int16
+        body = {name.lower(): waveform[name.lower()] for name in WAVEFORM_HEADERS}
+        body["data"] = np.frombuffer(waveform["data"], dtype=dtype).tolist()
+        response = OK(message="Waveform retrieved successfully", metadata=body).send()
+        response.headers.update(headers)
+        return response
+
+    # raw little-endian (min, max) pairs; the layout is described in headers
+    for name in WAVEFORM_HEADERS:
+        headers[f"X-Waveform-{name}"] = str(waveform[name.lower()])
+    headers["Access-Control-Expose-Headers"] = ", ".join(["ETag"] + [f"X-Waveform-{name}" for name in WAVEFORM_HEADERS])
+    return Response(content=waveform["data"], media_type="application/octet-stream", headers=headers)
+
+@router.post("/{song_id}/process")
+@async_handler
+async def process_song(song_id: int, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    job = await music_service.process_song(db, song_id)
+    return ACCEPTED(message="Audio processing queued", metadata={"job": job}).send()
+
+@router.get("/jobs/{job_id}")
+@async_handler
+async def get_processing_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = music_service.get_processing_job(job_id)
+    return OK(message="Processing job retrieved successfully", metadata={"job": job}).send()
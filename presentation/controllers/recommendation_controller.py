@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from shared.decorators import async_handler
+from shared.responses import OK
+from business.services.recommendation_service import RecommendationService
+from infrastructure.config.database import get_read_db, AsyncSession
+from presentation.middleware.auth_middleware import get_current_user_optional
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+recommendation_service = RecommendationService()
+
+@router.get("")
+@async_handler
+async def get_recommendations(
+    song_id: Optional[int] = Query(None, ge=1, description="Return songs similar to this one"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_read_db)
+):
+    user_id = current_user.get("user_id") if current_user else None
+    result = await recommendation_service.get_recommendations(db, user_id=user_id, song_id=song_id, limit=limit)
+    return OK(message="Recommendations retrieved successfully", metadata=result).send()
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from shared.decorators import async_handler
+from shared.responses import OK
+from business.services.search_service import SearchService
+from infrastructure.config.database import get_read_db, AsyncSession
+
+router = APIRouter(prefix="/search", tags=["Search"])
+search_service = SearchService()
+
+@router.get("")
+@async_handler
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="Search query"),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await search_service.search(db, q, page=page, size=size)
+    return OK(message="Search results retrieved successfully", metadata=result).send()
+
+@router.get("/suggest")
+@async_handler
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix being typed"),
+    limit: int = Query(10, ge=1, le=10),
+    type: Optional[str] = Query(None, pattern="^(song|artist|album)$")
+):
+    result = search_service.suggest(q, limit=limit, kind=type)
+    return OK(message="Suggestions retrieved successfully", metadata=result).send()
@@ -1,17 +1,104 @@
+import hashlib
+import math
+import os
+import time
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from business.services.auth_service import AuthService
+from infrastructure.cache.memory import ExpiringSet, LRUCache
+from infrastructure.cache.redis_pool import REDIS_ERRORS, redis_client
 from shared.exceptions import AuthFailureError
 
 security = HTTPBearer()
 auth_service = AuthService()
 
+# Decoded access tokens keyed by token digest, kept until the token's own exp
+# (at most REVOCATION_CHECK_INTERVAL with Redis, so logouts elsewhere are seen)
+token_cache = LRUCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+# Tokens invalidated by logout, kept until they would have expired anyway;
+# never evicted early, so a revoked token cannot become valid again
+revoked_tokens = ExpiringSet()
+_REVOKED_KEY = "auth:revoked:{}"
+REVOCATION_CHECK_INTERVAL = float(os.getenv("TOKEN_REVOCATION_CHECK_INTERVAL", "60"))
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _seconds_until_exp(payload: dict) -> float:
+    exp = payload.get("exp")
+    if exp is None:
+        return 0
+    return float(exp) - time.time()
+
+def _cached_payload(digest: str) -> Optional[dict]:
+    # revocation first: a cached payload must never outlive a logout
+    if digest in revoked_tokens:
+        raise AuthFailureError("Token has been revoked")
+    return token_cache.get(digest)
+
+async def _revoked_elsewhere(digest: str) -> bool:
+    """Whether another worker revoked the token. Fails open while Redis is
+    down; revocations made by this process are still enforced locally."""
+    client = redis_client.get()
+    if client is None:
+        return False
+    try:
+        return bool(await client.exists(_REVOKED_KEY.format(digest)))
+    except REDIS_ERRORS as e:
+        redis_client.mark_down(e)
+        return False
+
+def verify_access_token(token: str) -> dict:
+    """Decode a token against this process's state only, without I/O.
+
+    For callers that cannot await (rate limit keys). It does not fill
+    `token_cache`, which only holds tokens checked against Redis.
+    """
+    payload = _cached_payload(_token_digest(token))
+    if payload is not None:
+        return payload
+    return auth_service.verify_token(token)
+
+async def authenticate(token: str) -> dict:
+    digest = _token_digest(token)
+    payload = _cached_payload(digest)
+    if payload is not None:
+        return payload
+
+    payload = auth_service.verify_token(token)
+    ttl = _seconds_until_exp(payload)
+    if await _revoked_elsewhere(digest):
+        revoked_tokens.add(digest, ttl)
+        raise AuthFailureError("Token has been revoked")
+    if redis_client.enabled:
+        ttl = min(ttl, REVOCATION_CHECK_INTERVAL)
+    if ttl > 0:
+        token_cache.set(digest, payload, ttl=ttl)
+    return payload
+
+# invalidation hook for logout
+async def invalidate_token(token: str, payload: Optional[dict] = None):
+    digest = _token_digest(token)
+    payload = payload or token_cache.get(digest, count=False)
+    token_cache.delete(digest)
+    ttl = _seconds_until_exp(payload) if payload else auth_service.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if ttl <= 0:
+        return
+    revoked_tokens.add(digest, ttl)
+    client = redis_client.get()
+    if client is None:
+        return
+    try:
+        await client.set(_REVOKED_KEY.format(digest), 1, ex=math.ceil(ttl))
+    except REDIS_ERRORS as e:
+        redis_client.mark_down(e)
+
 # verify token middleware
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        payload = auth_service.verify_token(token)
+        payload = await authenticate(token)
         return payload
     except Exception:
         raise AuthFailureError("Invalid authentication credentials")
@@ -22,9 +109,9 @@ async def get_current_user_optional(request: Request) -> Optional[dict]:
         auth_header = request.headers.get("authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             return None
-        
+
         token = auth_header.split(" ")[1]
-        payload = auth_service.verify_token(token)
+        payload = await authenticate(token)
         return payload
     except Exception:
-        return None
\ No newline at end of file
+        return None
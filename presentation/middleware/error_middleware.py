@@ -1,5 +1,5 @@
 from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import logging
 
@@ -12,7 +12,7 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
             return response
         except HTTPException as exc:
             # Handle custom HTTP exceptions
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=exc.status_code,
                 content={
                     "status": "error",
@@ -23,7 +23,7 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
         except Exception as exc:
             # Handle unexpected exceptions
             logger.error(f"Unexpected error: {str(exc)}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "status": "error", 
@@ -0,0 +1,301 @@
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+import orjson
+from infrastructure.cache.memory import LRUCache
+from infrastructure.cache.redis_pool import REDIS_ERRORS, RedisClient, redis_client
+from presentation.middleware.auth_middleware import verify_access_token
+
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+
+
+class RateLimitPolicy:
+    """`limit` requests per `window` seconds for one route (or the default).
+
+    sliding_window weights the previous fixed window by how much of it still
+    overlaps the sliding one; token_bucket refills at limit/window per second
+    up to `burst` tokens. `key` is "ip" or "user" (falls back to ip when the
+    request carries no valid access token).
+    """
+
+    def __init__(self, name: str, limit: int, window: float, algorithm: str = SLIDING_WINDOW, key: str = "ip", burst: Optional[int] = None):
+        if algorithm not in (SLIDING_WINDOW, TOKEN_BUCKET):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+        self.key = key
+        self.burst = burst or limit
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window
+
+
+class RateLimitResult:
+    __slots__ = ("allowed", "limit", "remaining", "reset_after", "retry_after")
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset_after: float, retry_after: float = 0.0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+
+def _sliding_window_result(policy: RateLimitPolicy, allowed: bool, count: float, prev: float, curr: float, elapsed: float) -> RateLimitResult:
+    reset_after = policy.window - elapsed
+    retry_after = 0.0
+    if not allowed:
+        if curr + 1 > policy.limit or prev <= 0:
+            retry_after = reset_after
+        else:
+            # when the previous window's weight has decayed enough for one more request
+            retry_after = max(0.0, reset_after - (policy.limit - curr - 1) * policy.window / prev)
+    remaining = max(0, math.floor(policy.limit - count))
+    return RateLimitResult(allowed, policy.limit, remaining, reset_after, retry_after)
+
+
+def _token_bucket_result(policy: RateLimitPolicy, allowed: bool, tokens: float) -> RateLimitResult:
+    retry_after = 0.0 if allowed else (1 - tokens) / policy.rate
+    reset_after = (policy.burst - tokens) / policy.rate
+    return RateLimitResult(allowed, policy.burst, max(0, math.floor(tokens)), reset_after, retry_after)
+
+
+class MemoryRateLimitStore:
+    """Single-node store; state is evicted LRU and expires after two windows."""
+
+    def __init__(self, maxsize: int = 100000):
+        self.state = LRUCache(maxsize=maxsize)
+
+    async def hit(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        if policy.algorithm == TOKEN_BUCKET:
+            return self._token_bucket(key, policy, now)
+        return self._sliding_window(key, policy, now)
+
+    def _sliding_window(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        index = int(now // policy.window)
+        elapsed = now - index * policy.window
+        state = self.state.get(key)
+        if state is None or state[0] < index - 1:
+            prev, curr = 0, 0
+        elif state[0] == index - 1:
+            prev, curr = state[2], 0
+        else:
+            prev, curr = state[1], state[2]
+
+        count = prev * (policy.window - elapsed) / policy.window + curr
+        allowed = count + 1 <= policy.limit
+        if allowed:
+            curr += 1
+            count += 1
+        self.state.set(key, (index, prev, curr), ttl=policy.window * 2)
+        return _sliding_window_result(policy, allowed, count, prev, curr, elapsed)
+
+    def _token_bucket(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        tokens, last = self.state.get(key, (policy.burst, now))
+        tokens = min(policy.burst, tokens + max(0.0, now - last) * policy.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.state.set(key, (tokens, now), ttl=policy.burst / policy.rate)
+        return _token_bucket_result(policy, allowed, tokens)
+
+
+SLIDING_WINDOW_LUA = """
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local count = prev * (window - elapsed) / window + curr
+if count + 1 > limit then
+    return {0, tostring(count), prev, curr}
+end
+curr = redis.call('INCR', KEYS[1])
+if curr == 1 then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, tostring(count + 1), prev, curr}
+"""
+
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore:
+    """Multi-node store; each hit is one atomic Lua call. Falls back to a
+    local MemoryRateLimitStore while Redis is unreachable."""
+
+    def __init__(self, redis: Optional[RedisClient] = None, fallback: Optional[MemoryRateLimitStore] = None):
+        self.redis = redis or redis_client
+        self.fallback = fallback or MemoryRateLimitStore()
+        self._scripts: Dict[int, Tuple[object, object]] = {}
+
+    def _get_scripts(self, client):
+        scripts = self._scripts.get(id(client))
+        if scripts is None:
+            scripts = self._scripts[id(client)] = (
+                client.register_script(SLIDING_WINDOW_LUA),
+                client.register_script(TOKEN_BUCKET_LUA),
+            )
+        return scripts
+
+    async def hit(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        client = self.redis.get()
+        if client is None:
+            return await self.fallback.hit(key, policy, now)
+        sliding_script, bucket_script = self._get_scripts(client)
+        try:
+            if policy.algorithm == TOKEN_BUCKET:
+                allowed, tokens = await bucket_script(
+                    keys=[key],
+                    args=[policy.burst, policy.rate / 1000, int(now * 1000)]
+                )
+                return _token_bucket_result(policy, bool(allowed), float(tokens))
+
+            index = int(now // policy.window)
+            elapsed = now - index * policy.window
+            # hash tag keeps both windows of a key on the same cluster slot
+            allowed, count, prev, curr = await sliding_script(
+                keys=[f"{{{key}}}:{index}", f"{{{key}}}:{index - 1}"],
+                args=[policy.limit, int(policy.window * 1000), int(elapsed * 1000)]
+            )
+            return _sliding_window_result(policy, bool(allowed), float(count), float(prev), float(curr), elapsed)
+        except REDIS_ERRORS as e:
+            self.redis.mark_down(e)
+            return await self.fallback.hit(key, policy, now)
+
+
+DEFAULT_POLICIES: Dict[Tuple[str, str], RateLimitPolicy] = {
+    ("POST", "/api/v1/auth/login"): RateLimitPolicy("login", limit=5, window=60),
+    ("POST", "/api/v1/auth/register"): RateLimitPolicy("register", limit=10, window=3600),
+    ("POST", "/api/v1/auth/forgot-password"): RateLimitPolicy("forgot-password", limit=3, window=900),
+    ("POST", "/api/v1/auth/reset-password"): RateLimitPolicy("reset-password", limit=5, window=900),
+}
+
+DEFAULT_POLICY = RateLimitPolicy(
+    "default",
+    limit=int(os.getenv("RATE_LIMIT_DEFAULT_LIMIT", "120")),
+    window=float(os.getenv("RATE_LIMIT_DEFAULT_WINDOW", "60")),
+    algorithm=TOKEN_BUCKET,
+    key="user",
+    burst=int(os.getenv("RATE_LIMIT_DEFAULT_BURST", "60")),
+)
+
+
+class RateLimitMiddleware:
+    """Pure ASGI rate limiter, answers 429 before the request reaches FastAPI."""
+
+    def __init__(
+        self,
+        app,
+        policies: Optional[Dict[Tuple[str, str], RateLimitPolicy]] = None,
+        default_policy: Optional[RateLimitPolicy] = DEFAULT_POLICY,
+        store=None,
+        trusted_proxies: Optional[int] = None
+    ):
+        self.app = app
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.default_policy = default_policy
+        self.store = store or (RedisRateLimitStore() if redis_client.enabled else MemoryRateLimitStore())
+        if trusted_proxies is None:
+            # RATE_LIMIT_TRUST_PROXY=true is the single reverse proxy case
+            default = "1" if os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true" else "0"
+            trusted_proxies = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", default))
+        self.trusted_proxies = trusted_proxies
+
+    def _client_ip(self, scope) -> str:
+        """The peer address, or with `trusted_proxies` hops in front of the app,
+        the X-Forwarded-For entry that many hops from the right.
+
+        Each proxy appends the address it received the request from, so only
+        the rightmost entries are trustworthy; anything further left was sent
+        by the client and can be forged.
+        """
+        if self.trusted_proxies:
+            forwarded = [
+                address.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for address in value.decode("latin-1").split(",")
+            ]
+            forwarded = [address for address in forwarded if address]
+            if forwarded:
+                return forwarded[-min(self.trusted_proxies, len(forwarded))]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _identity(self, scope, policy: RateLimitPolicy) -> str:
+        if policy.key == "user":
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    auth_header = value.decode("latin-1")
+                    if auth_header.startswith("Bearer "):
+                        try:
+                            return f"user:{verify_access_token(auth_header[7:])['user_id']}"
+                        except Exception:
+                            pass
+                    break
+        return f"ip:{self._client_ip(scope)}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policies.get((scope["method"], scope["path"]), self.default_policy)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"rl:{policy.name}:{self._identity(scope, policy)}"
+        result = await self.store.hit(key, policy, time.time())
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+        ]
+
+        if not result.allowed:
+            body = orjson.dumps({
+                "status": "error",
+                "code": 429,
+                "message": "Too many requests, please try again later",
+            })
+            headers += [
+                (b"retry-after", str(max(1, math.ceil(result.retry_after))).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            await send({"type": "http.response.start", "status": 429, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,3 @@
+# Redis counter bumped by writers that bypass the ORM hooks (bulk imports);
+# every API worker rebuilds its in-memory search index when it changes
+CATALOG_VERSION_KEY = "music:catalog:version"
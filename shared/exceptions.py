@@ -31,3 +31,7 @@ class ForbiddenError(ErrorResponse):
 class InternalServerError(ErrorResponse):
     def __init__(self, message: str = "Internal Server Error"):
         super().__init__(message=message, status_code=500)
+
+class ServiceUnavailableError(ErrorResponse):
+    def __init__(self, message: str = "Service Unavailable"):
+        super().__init__(message=message, status_code=503)
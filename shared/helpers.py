@@ -0,0 +1,26 @@
+import os
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """A 304 response when the client's If-None-Match covers `etag`, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def file_response(request: Request, path: str, media_type: str, cache_control: str, etag: Optional[str] = None) -> Response:
+    """Serve a local file with conditional GET and Range support."""
+    headers = {"Cache-Control": cache_control}
+    if etag is not None:
+        headers["ETag"] = etag
+    response = FileResponse(path, media_type=media_type, headers=headers, stat_result=os.stat(path))
+    return not_modified(request, response.headers["etag"], cache_control) or response
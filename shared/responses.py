@@ -1,5 +1,5 @@
 from fastapi import Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional
 
 class SuccessResponse:
@@ -15,8 +15,9 @@ class SuccessResponse:
         self.status = status
         self.metadata = metadata or {}
 
-    def send(self) -> JSONResponse:
-        return JSONResponse(
+    # orjson encodes datetimes natively, so models don't need to pre-format them
+    def send(self) -> ORJSONResponse:
+        return ORJSONResponse(
             status_code=self.status_code,
             content={
                 "status": self.status,
@@ -38,4 +39,8 @@ class CREATED(SuccessResponse):
         options: Optional[Dict[str, Any]] = None
     ):
         super().__init__(message=message, status_code=201, metadata=metadata)
-        self.options = options or {}
\ No newline at end of file
+        self.options = options or {}
+
+class ACCEPTED(SuccessResponse):
+    def __init__(self, message: str = "Accepted", metadata: Optional[Dict[str, Any]] = None):
+        super().__init__(message=message, status_code=202, metadata=metadata)
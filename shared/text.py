@@ -0,0 +1,19 @@
+import re
+import unicodedata
+from typing import Optional
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase and strip accents, roughly what MySQL's *_ai_ci collations compare."""
+    if not text:
+        return ""
+    text = text.lower().replace("đ", "d")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).strip()
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase and strip accents so "Sơn Tùng" matches "son tung"."""
+    return _NON_WORD.sub(" ", fold(text)).strip()
@@ -0,0 +1,62 @@
+import os
+
+# infrastructure.config.database builds its engines at import time
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import data.models.interaction  # noqa: F401  (register every table on Base.metadata)
+import data.models.music  # noqa: F401
+import data.models.playlist  # noqa: F401
+import data.models.user  # noqa: F401
+from data.models import Base
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Context manager collecting every SQL statement sent on `engine`."""
+
+    @contextmanager
+    def counter() -> Iterator[List[str]]:
+        statements: List[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from business.utils.audio_processor import AudioProcessor
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    processor = AudioProcessor(media_root=str(tmp_path), max_workers=1, max_pending=4)
+    releases = {}
+
+    async def run_in_pool(func, source, *args):
+        releases[source] = asyncio.Event()
+        await releases[source].wait()
+        return {"duration": 1.0, "renditions": []}
+
+    monkeypatch.setattr(processor, "run_in_pool", run_in_pool)
+    processor.releases = releases
+    yield processor
+    processor.shutdown()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_jobs_wait_queued_until_a_worker_is_free(processor):
+    first = processor.submit(1, "a.wav")
+    second = processor.submit(2, "b.wav")
+    assert first.status == second.status == "queued"
+
+    await _settle()
+    assert first.status == "running" and first.started_at is not None
+    assert second.status == "queued" and second.started_at is None
+
+    processor.releases["a.wav"].set()
+    await _settle()
+    assert first.status == "done"
+    assert second.status == "running"
+
+    processor.releases["b.wav"].set()
+    await _settle()
+    assert second.to_dict()["status"] == "done"
+    assert processor.pending == 0
+
+
+async def test_resubmitting_an_active_song_returns_its_job(processor):
+    job = processor.submit(1, "a.wav")
+    assert processor.submit(1, "a.wav") is job
+    await _settle()
+    processor.releases["a.wav"].set()
+    await _settle()
+    assert processor.get_job(job.id).status == "done"
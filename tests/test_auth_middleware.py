@@ -0,0 +1,105 @@
+import pytest
+import infrastructure.cache.memory as memory
+import infrastructure.cache.redis_pool as redis_pool
+import presentation.middleware.auth_middleware as auth
+from infrastructure.cache.memory import ExpiringSet
+from infrastructure.cache.redis_pool import redis_client
+from shared.exceptions import AuthFailureError
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+
+@pytest.fixture(autouse=True)
+def local_state(monkeypatch):
+    monkeypatch.setattr(auth, "token_cache", memory.LRUCache(maxsize=2))
+    monkeypatch.setattr(auth, "revoked_tokens", ExpiringSet())
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_pool, "aioredis", object())
+    monkeypatch.setattr(redis_client, "url", "redis://test")
+    monkeypatch.setattr(redis_client, "get", lambda: fake)
+    return fake
+
+
+def _token(user_id: int) -> str:
+    return auth.auth_service.create_access_token({"user_id": user_id})
+
+
+async def test_revoked_token_is_rejected_even_when_cached():
+    token = _token(1)
+    payload = await auth.authenticate(token)
+    assert payload["user_id"] == 1
+
+    await auth.invalidate_token(token, payload)
+
+    with pytest.raises(AuthFailureError):
+        await auth.authenticate(token)
+    with pytest.raises(AuthFailureError):
+        auth.verify_access_token(token)
+
+
+async def test_revocations_are_not_evicted_by_later_logouts():
+    first = _token(1)
+    await auth.invalidate_token(first)
+    # far more logouts than the token cache holds
+    for user_id in range(2, 200):
+        await auth.invalidate_token(_token(user_id))
+
+    with pytest.raises(AuthFailureError):
+        await auth.authenticate(first)
+
+
+async def test_logout_on_another_worker_is_seen(shared_redis, monkeypatch):
+    token = _token(1)
+    await auth.invalidate_token(token)
+    assert list(shared_redis.data.values())[0][1] > 0
+
+    # a second worker has neither the local revocation nor a cached payload
+    monkeypatch.setattr(auth, "revoked_tokens", ExpiringSet())
+    monkeypatch.setattr(auth, "token_cache", memory.LRUCache(maxsize=2))
+
+    with pytest.raises(AuthFailureError):
+        await auth.authenticate(token)
+    assert auth._token_digest(token) in auth.revoked_tokens
+
+
+async def test_cached_payloads_are_rechecked_with_redis(shared_redis, monkeypatch):
+    token = _token(1)
+    await auth.authenticate(token)
+    digest = auth._token_digest(token)
+    assert auth.token_cache.get(digest) is not None
+
+    now = memory.time.monotonic()
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now + auth.REVOCATION_CHECK_INTERVAL + 1)
+    assert auth.token_cache.get(digest) is None
+
+
+def test_expiring_set_keeps_members_until_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now[0])
+    revoked = ExpiringSet()
+    revoked.add("a", ttl=10)
+    revoked.add("b", ttl=60)
+    revoked.add("a", ttl=30)
+
+    now[0] += 20
+    revoked.add("c", ttl=0)
+    assert "a" in revoked and "b" in revoked and "c" not in revoked
+
+    now[0] += 15
+    revoked.add("d", ttl=5)
+    assert "a" not in revoked and "b" in revoked and len(revoked) == 2
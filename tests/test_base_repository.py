@@ -0,0 +1,154 @@
+import pytest
+from sqlalchemy import insert, select
+from data.models.music import Album, Artist
+from data.repositories.base_repository import BaseRepository
+
+pytestmark = pytest.mark.anyio
+
+
+class ArtistRepository(BaseRepository[Artist]):
+    model = Artist
+
+
+class AlbumRepository(BaseRepository[Album]):
+    model = Album
+
+
+@pytest.fixture(params=["sqlite", "fallback"])
+def dialect(request, engine, monkeypatch):
+    """Run each test with SQLite's ON CONFLICT and with the select-then-update fallback."""
+    if request.param == "fallback":
+        monkeypatch.setattr(engine.sync_engine.dialect, "name", "oracle")
+    return request.param
+
+
+@pytest.fixture
+async def artists(db):
+    await db.execute(insert(Artist), [{"id": 1, "name": "Old 1"}, {"id": 2, "name": "Old 2"}])
+    await db.commit()
+
+
+async def test_upsert_on_primary_key(dialect, db, artists):
+    count = await ArtistRepository(db).upsert(
+        [{"id": 2, "name": "New 2"}, {"id": 3, "name": "New 3"}],
+        update_columns=["name"],
+    )
+
+    assert count == 2
+    rows = (await db.execute(select(Artist.id, Artist.name).order_by(Artist.id))).all()
+    assert [tuple(row) for row in rows] == [(1, "Old 1"), (2, "New 2"), (3, "New 3")]
+
+
+async def test_upsert_on_unique_columns(dialect, db, artists):
+    await db.execute(insert(Album), [{"id": 10, "artist_id": 1, "title": "First"}])
+    await db.commit()
+
+    await AlbumRepository(db).upsert(
+        [{"id": 10, "artist_id": 1, "title": "First"}, {"id": 11, "artist_id": 2, "title": "First"}],
+        update_columns=["title"],
+        conflict_columns=["artist_id", "title"],
+    )
+
+    rows = (await db.execute(select(Album.id, Album.artist_id, Album.title).order_by(Album.id))).all()
+    assert [tuple(row) for row in rows] == [(10, 1, "First"), (11, 2, "First")]
+
+
+async def test_upsert_in_chunks(dialect, db, artists, count_queries):
+    rows = [{"id": i, "name": f"Artist {i}"} for i in range(1, 11)]
+
+    with count_queries() as statements:
+        await ArtistRepository(db).upsert(rows, update_columns=["name"], chunk_size=4, commit=False)
+
+    # one statement per chunk natively; otherwise a select per chunk, then an
+    # update where keys exist (only the first chunk) and an insert for the rest
+    assert len(statements) == (3 if dialect == "sqlite" else 7)
+    names = (await db.execute(select(Artist.name).order_by(Artist.id))).scalars().all()
+    assert names == [f"Artist {i}" for i in range(1, 11)]
+
+
+@pytest.fixture
+async def albums(db):
+    # 12 albums over 4 artists, so ordering by artist_id has ties
+    await db.execute(insert(Artist), [{"id": i, "name": f"Artist {i}"} for i in range(1, 5)])
+    await db.execute(insert(Album), [{"id": i, "artist_id": (i * 7) % 4 + 1, "title": f"Album {i}"} for i in range(1, 13)])
+    await db.commit()
+    db.expunge_all()
+
+
+async def _walk(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = await fetch(after=cursor, limit=limit)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("descending", [False, True])
+async def test_paginate_walks_every_row_once_by_primary_key(db, albums, descending):
+    pages = await _walk(lambda **kwargs: AlbumRepository(db).paginate(descending=descending, **kwargs), 5)
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    ids = [album.id for page in pages for album in page]
+    assert ids == sorted(range(1, 13), reverse=descending)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+async def test_paginate_breaks_ties_on_the_sort_key_by_primary_key(db, albums, descending):
+    repository = AlbumRepository(db)
+    # page boundaries fall inside runs of equal artist_id
+    pages = await _walk(lambda **kwargs: repository.paginate(order_by=Album.artist_id, descending=descending, **kwargs), 2)
+
+    keys = [(album.artist_id, album.id) for page in pages for album in page]
+    assert keys == sorted(keys, reverse=descending)
+    assert sorted(album_id for _, album_id in keys) == list(range(1, 13))
+
+
+async def test_paginate_filters_and_stops_on_an_exact_last_page(db, albums):
+    page, cursor = await AlbumRepository(db).paginate(Album.artist_id == 1, limit=3)
+    assert len(page) == 3 and cursor is None
+    assert {album.artist_id for album in page} == {1}
+
+
+@pytest.mark.parametrize("descending", [False, True])
+async def test_paginate_rows_matches_paginate(db, albums, descending):
+    repository = AlbumRepository(db)
+    query = select(Album.id, Album.artist_id, Album.title)
+    pages = await _walk(
+        lambda **kwargs: repository.paginate_rows(query, order_by=Album.artist_id, descending=descending, **kwargs), 5
+    )
+    models = await _walk(lambda **kwargs: repository.paginate(order_by=Album.artist_id, descending=descending, **kwargs), 5)
+
+    assert [[row["id"] for row in page] for page in pages] == [[album.id for album in page] for page in models]
+    assert all(isinstance(row, dict) and set(row) == {"id", "artist_id", "title"} for page in pages for row in page)
+
+
+async def test_paginate_rejects_bad_cursors(db, albums):
+    repository = AlbumRepository(db)
+    _, cursor = await repository.paginate(limit=2)
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        # a cursor from an id-ordered walk has no artist_id value
+        await repository.paginate(order_by=Album.artist_id, after=cursor)
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        await repository.paginate(after="not a cursor")
+
+
+async def test_get_many_keeps_the_requested_order_and_skips_missing_ids(db, albums, count_queries):
+    repository = AlbumRepository(db)
+    with count_queries() as statements:
+        found = await repository.get_many([7, 99, 2, 7, 11])
+        assert await repository.get_many([]) == []
+    assert [album.id for album in found] == [7, 2, 11]
+    assert len(statements) == 1
+
+    filtered = await repository.get_many([7, 2, 11], Album.artist_id != found[0].artist_id)
+    assert [album.id for album in filtered] == [album.id for album in found[1:] if album.artist_id != found[0].artist_id]
+
+
+async def test_exists_and_count(db, albums):
+    repository = AlbumRepository(db)
+    assert await repository.count() == 12
+    assert await repository.count(Album.artist_id == 1) == 3
+    assert await repository.count(Album.title == "Missing") == 0
+    assert await repository.exists(Album.title == "Album 5")
+    assert not await repository.exists(Album.artist_id == 99)
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import threading
+import pytest
+import infrastructure.cache.disk as disk
+import infrastructure.cache.memory as memory
+import infrastructure.cache.redis_pool as redis_pool
+from infrastructure.cache import Cache, DiskLRUCache, RedisClient, SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class StubRedis:
+    """The few redis.asyncio calls Cache makes, over a dict."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+        self.down = False
+
+    def _call(self, name):
+        self.calls.append(name)
+        if self.down:
+            raise ConnectionError("connection refused")
+
+    async def get(self, key):
+        self._call("get")
+        return self.data.get(key, (None,))[0]
+
+    async def pttl(self, key):
+        self._call("pttl")
+        return self.data[key][1] if key in self.data else -2
+
+    async def set(self, key, value, px=None):
+        self._call("set")
+        self.data[key] = (value, px)
+
+    async def delete(self, *keys):
+        self._call("delete")
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(redis_pool, "aioredis", object())
+    return StubRedis()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(redis_pool.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _cache(stub, **kwargs):
+    redis = RedisClient(url="redis://stub", retry_after=30)
+    redis._client = stub
+    return Cache(namespace="t", serializer="json", redis=redis, **kwargs)
+
+
+async def test_writes_reach_both_tiers_and_reads_refill_local(stub, clock):
+    cache = _cache(stub, default_ttl=60, local_ttl=5)
+    await cache.set("a", {"x": 1})
+    assert stub.data["t:a"] == (b'{"x":1}', 60000)
+
+    assert await cache.get("a") == {"x": 1}
+    assert "get" not in stub.calls
+
+    # past local_ttl the value comes back from Redis and is cached locally again
+    clock[0] += 6
+    assert await cache.get("a") == {"x": 1}
+    assert stub.calls.count("get") == 1
+    assert await cache.get("a") == {"x": 1}
+    assert stub.calls.count("get") == 1
+
+    await cache.delete("a")
+    assert "t:a" not in stub.data and await cache.get("a", "gone") == "gone"
+
+
+async def test_local_copy_never_outlives_the_redis_ttl(stub, clock):
+    cache = _cache(stub, local_ttl=5)
+    stub.data["t:a"] = (b"1", 2000)
+    assert await cache.get("a") == 1
+    clock[0] += 2.5
+    del stub.data["t:a"]
+    assert await cache.get("a") is None
+
+
+async def test_get_or_set_shares_one_load_between_concurrent_misses(stub):
+    cache = _cache(stub)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_set("k", load) for _ in range(5)))
+    assert results == ["value"] * 5 and len(calls) == 1
+    assert stub.calls.count("set") == 1
+    assert not cache._flights
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise LookupError("missing")
+
+    results = await asyncio.gather(*(cache.get_or_set("bad", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, LookupError) for result in results)
+    assert not cache._flights
+
+
+async def test_falls_back_to_local_after_mark_down(stub, clock):
+    cache = _cache(stub, default_ttl=60, local_ttl=5)
+    stub.down = True
+
+    # the failed write marks Redis down and keeps the value locally for the full TTL
+    await cache.set("a", 1)
+    assert cache.redis.get() is None
+    calls = len(stub.calls)
+    clock[0] += 20
+    assert await cache.get("a") == 1
+    assert len(stub.calls) == calls
+
+    # Redis is tried again once retry_after has passed
+    stub.down = False
+    clock[0] += 11
+    await cache.set("b", 2)
+    assert stub.data["t:b"] == (b"2", 60000)
+
+
+async def test_single_flight_runs_again_once_the_call_completes():
+    flights = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        call = len(calls)
+        await asyncio.sleep(0.01)
+        return call
+
+    assert await asyncio.gather(flights.run("k", load), flights.run("k", load), flights.run("other", load)) == [1, 1, 2]
+    assert not flights
+    assert await flights.run("k", load) == 3
+
+
+async def test_disk_cache_loads_its_index_off_the_event_loop(tmp_path, monkeypatch):
+    writer = DiskLRUCache(str(tmp_path), max_bytes=10)
+    writer.set("old", b"1234")
+    writer.set("new", b"5678")
+    # "old" was read most recently, so "new" is evicted first
+    os.utime(writer.get("old"), (2_000_000_000, 2_000_000_000))
+
+    walks = []
+    walk = os.walk
+
+    def recording_walk(*args, **kwargs):
+        walks.append(threading.current_thread() is threading.main_thread())
+        return walk(*args, **kwargs)
+
+    monkeypatch.setattr(disk.os, "walk", recording_walk)
+    cache = DiskLRUCache(str(tmp_path), max_bytes=10)
+    await asyncio.gather(cache.load(), cache.load(), cache.load())
+    assert walks == [False]
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 8
+
+    cache.set("third", b"9")
+    cache.set("fourth", b"00")
+    assert cache.get("new") is None and cache.get("old") is not None
+    await cache.load()
+    assert walks == [False]
@@ -0,0 +1,105 @@
+import csv
+import json
+import pytest
+from sqlalchemy import func, insert, select
+from data.importers.catalog_importer import CatalogImporter
+from data.models.music import Album, Artist, Song
+
+pytestmark = pytest.mark.anyio
+
+RECORDS = [
+    {"title": "Lạc Trôi", "artist": "Sơn Tùng M-TP", "album": "Lạc Trôi", "duration": "233", "file_url": "/media/1.mp3"},
+    # same artist and album under a different case and accents
+    {"title": "Nơi Này Có Anh", "artist": "son tung m-tp", "album": "LAC TROI", "duration": "", "file_url": "/media/2.mp3"},
+    {"title": "Chúng Ta", "artist": "SƠN TÙNG M-TP", "album": None, "duration": "not a number", "file_url": "/media/3.mp3"},
+    {"title": "Hoa Nở Không Màu", "artist": "Hoài Lâm", "album": "Hoa Nở Không Màu", "duration": 300.5, "file_url": "/media/4.mp3"},
+    # no file_url: skipped
+    {"title": "Demo", "artist": "Hoài Lâm", "album": None, "duration": None, "file_url": ""},
+]
+
+
+def _write_csv(path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(RECORDS[0]))
+        writer.writeheader()
+        writer.writerows({key: "" if value is None else value for key, value in record.items()} for record in RECORDS)
+
+
+def _write_jsonl(path):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in RECORDS:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n\n")
+
+
+async def _catalog(db):
+    artists = {name: artist_id for artist_id, name in await db.execute(select(Artist.id, Artist.name))}
+    albums = {(artist_id, title): album_id for album_id, artist_id, title in await db.execute(select(Album.id, Album.artist_id, Album.title))}
+    songs = {file_url: (artist_id, album_id, duration) for file_url, artist_id, album_id, duration in await db.execute(
+        select(Song.file_url, Song.artist_id, Song.album_id, Song.duration)
+    )}
+    return artists, albums, songs
+
+
+@pytest.mark.parametrize("name, write", [("catalog.csv", _write_csv), ("catalog.jsonl", _write_jsonl)])
+async def test_import_dedupes_artists_and_albums_under_folding(session_factory, db, tmp_path, name, write):
+    source = tmp_path / name
+    write(source)
+    checkpoint = tmp_path / "import.checkpoint"
+
+    stats = await CatalogImporter(session_factory, chunk_size=2, checkpoint_path=str(checkpoint)).run(str(source))
+
+    assert (stats.records, stats.songs, stats.skipped) == (5, 4, 1)
+    assert (stats.artists, stats.albums) == (2, 2)
+    artists, albums, songs = await _catalog(db)
+    # the first spelling seen is the one stored
+    assert sorted(artists) == ["Hoài Lâm", "Sơn Tùng M-TP"]
+    son_tung, hoai_lam = artists["Sơn Tùng M-TP"], artists["Hoài Lâm"]
+    assert sorted(albums) == [(son_tung, "Lạc Trôi"), (hoai_lam, "Hoa Nở Không Màu")]
+    lac_troi = albums[(son_tung, "Lạc Trôi")]
+    assert songs == {
+        "/media/1.mp3": (son_tung, lac_troi, 233),
+        "/media/2.mp3": (son_tung, lac_troi, None),
+        "/media/3.mp3": (son_tung, None, None),
+        "/media/4.mp3": (hoai_lam, albums[(hoai_lam, "Hoa Nở Không Màu")], 300),
+    }
+    assert not checkpoint.exists()
+
+
+async def test_existing_artists_and_albums_are_reused(session_factory, db, tmp_path):
+    await db.execute(insert(Artist), [{"id": 7, "name": "Sơn Tùng M-TP"}])
+    await db.execute(insert(Album), [{"id": 9, "title": "lạc trôi", "artist_id": 7}])
+    await db.commit()
+    source = tmp_path / "catalog.jsonl"
+    _write_jsonl(source)
+
+    stats = await CatalogImporter(session_factory).run(str(source))
+
+    assert (stats.artists, stats.albums, stats.songs) == (1, 1, 4)
+    artists, albums, songs = await _catalog(db)
+    assert len(artists) == 2 and len(albums) == 2
+    assert songs["/media/1.mp3"][:2] == songs["/media/2.mp3"][:2] == (7, 9)
+
+
+async def test_rows_added_by_another_import_are_ignored_and_not_counted(session_factory, db, tmp_path):
+    source = tmp_path / "catalog.csv"
+    _write_csv(source)
+    importer = CatalogImporter(session_factory)
+    preload = importer._preload
+
+    async def preload_then_concurrent_insert(session):
+        await preload(session)
+        # committed by someone else after this import loaded its maps
+        async with session_factory() as other:
+            await other.execute(insert(Artist), [{"id": 50, "name": "Hoài Lâm"}])
+            await other.execute(insert(Album), [{"id": 60, "title": "Hoa Nở Không Màu", "artist_id": 50}])
+            await other.commit()
+
+    importer._preload = preload_then_concurrent_insert
+    stats = await importer.run(str(source))
+
+    # INSERT OR IGNORE skipped the two existing rows; only real inserts are counted
+    assert (stats.artists, stats.albums, stats.songs) == (1, 1, 4)
+    assert await db.scalar(select(func.count()).select_from(Artist)) == 2
+    assert await db.scalar(select(func.count()).select_from(Album)) == 2
+    _, _, songs = await _catalog(db)
+    assert songs["/media/4.mp3"][:2] == (50, 60)
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import httpx
+import pytest
+
+cloudinary = pytest.importorskip("cloudinary")
+
+from infrastructure.external.cloudinary_service import CloudinaryService, CloudinaryUploadError, UploadItem
+from infrastructure.external.http_client import http_client
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(cloudinary, "_config", cloudinary.Config())
+    cloudinary.config(cloud_name="demo", api_key="key", api_secret="secret")
+    service = CloudinaryService(base_url="https://cloudinary.test/v1_1", max_attempts=2, state_dir=str(tmp_path / "state"))
+    service.retry_base_delay = 0
+    return service
+
+
+@pytest.fixture
+def origin(monkeypatch):
+    """Answer uploads by file name: {name: (status, headers, body)}."""
+    responses = {}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        for name, (status, headers, body) in responses.items():
+            if f'filename="{name}"'.encode() in request.content:
+                return httpx.Response(status, headers=headers, content=body)
+        return httpx.Response(200, json={"secure_url": "https://res.cloudinary.test/ok"})
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    return responses
+
+
+def _file(tmp_path, name: str):
+    path = tmp_path / name
+    path.write_bytes(b"data")
+    return str(path)
+
+
+async def test_html_error_page_raises_upload_error(service, origin, tmp_path):
+    origin["big.mp3"] = (413, {"Content-Type": "text/html"}, b"<html><body>413 Request Entity Too Large</body></html>")
+
+    with pytest.raises(CloudinaryUploadError, match="413.*Request Entity Too Large"):
+        await service.upload_file(_file(tmp_path, "big.mp3"))
+
+
+async def test_non_json_success_raises_upload_error(service, origin, tmp_path):
+    origin["odd.mp3"] = (200, {"Content-Type": "text/plain"}, b"OK")
+
+    with pytest.raises(CloudinaryUploadError, match="200.*non-JSON"):
+        await service.upload_file(_file(tmp_path, "odd.mp3"))
+
+
+async def test_json_error_message_is_kept(service, origin, tmp_path):
+    origin["bad.mp3"] = (400, {}, b'{"error": {"message": "Invalid image file"}}')
+
+    with pytest.raises(CloudinaryUploadError, match="400: Invalid image file"):
+        await service.upload_file(_file(tmp_path, "bad.mp3"))
+
+
+async def test_upload_many_reports_bad_responses_per_item(service, origin, tmp_path):
+    origin["big.mp3"] = (413, {"Content-Type": "text/html"}, b"<html>Too Large</html>")
+    origin["down.mp3"] = (502, {"Content-Type": "text/html"}, b"<html>Bad Gateway</html>")
+    items = [UploadItem(path=_file(tmp_path, name)) for name in ("a.mp3", "big.mp3", "down.mp3", "b.mp3")]
+
+    results = await service.upload_many(items)
+
+    assert [("error" in result) for result in results] == [False, True, True, False]
+    assert results[0]["result"] == {"secure_url": "https://res.cloudinary.test/ok"}
+    assert "413" in results[1]["error"] and "Bad Gateway" in results[2]["error"]
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """Record every upload request; `fail` maps a Content-Range to the statuses to answer it with first."""
+    recorder = type("Recorder", (), {})()
+    recorder.requests, recorder.fail = [], {}
+    recorder.in_flight = recorder.max_in_flight = 0
+    recorder.delay = 0
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        recorder.requests.append(request)
+        recorder.in_flight += 1
+        recorder.max_in_flight = max(recorder.max_in_flight, recorder.in_flight)
+        try:
+            await asyncio.sleep(recorder.delay)
+        finally:
+            recorder.in_flight -= 1
+        statuses = recorder.fail.get(request.headers.get("Content-Range"))
+        if statuses:
+            return httpx.Response(statuses.pop(0), text="<html>Service Unavailable</html>")
+        return httpx.Response(200, json={"secure_url": "https://res.cloudinary.test/ok"})
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    return recorder
+
+
+def _chunked_file(tmp_path, service, name: str = "song.flac"):
+    # 3 chunks: 4 + 4 + 2 bytes
+    service.chunk_size = 4
+    path = tmp_path / name
+    path.write_bytes(b"0123456789")
+    return str(path)
+
+
+async def test_large_files_are_sent_in_ranged_chunks_of_one_upload(service, recorder, tmp_path):
+    path = _chunked_file(tmp_path, service)
+
+    assert await service.upload_file(path, public_id="songs/1") == {"secure_url": "https://res.cloudinary.test/ok"}
+
+    assert [request.headers["Content-Range"] for request in recorder.requests] == [
+        "bytes 0-3/10", "bytes 4-7/10", "bytes 8-9/10",
+    ]
+    assert len({request.headers["X-Unique-Upload-Id"] for request in recorder.requests}) == 1
+    for request, chunk in zip(recorder.requests, (b"0123", b"4567", b"89")):
+        assert b"\r\n\r\n" + chunk + b"\r\n" in request.content
+        assert b'name="public_id"\r\n\r\nsongs/1' in request.content
+    # the checkpoint goes away once the upload completes
+    assert not list((tmp_path / "state").glob("*.json"))
+
+
+async def test_small_files_are_sent_in_one_request(service, recorder, tmp_path):
+    path = _file(tmp_path, "a.mp3")
+    await service.upload_file(path)
+    assert len(recorder.requests) == 1
+    assert "Content-Range" not in recorder.requests[0].headers
+
+
+async def test_failed_upload_resumes_from_the_checkpoint(service, recorder, tmp_path):
+    path = _chunked_file(tmp_path, service)
+    recorder.fail["bytes 4-7/10"] = [503, 503]
+
+    with pytest.raises(CloudinaryUploadError, match="503"):
+        await service.upload_file(path)
+    [checkpoint] = (tmp_path / "state").glob("*.json")
+    state = json.loads(checkpoint.read_text())
+    assert state["offset"] == 4
+    upload_id = recorder.requests[0].headers["X-Unique-Upload-Id"]
+    assert state["upload_id"] == upload_id
+
+    # a new service instance, as after a restart
+    recorder.requests.clear()
+    resumed = CloudinaryService(base_url=service.base_url, state_dir=service.state_dir)
+    resumed.chunk_size = 4
+    await resumed.upload_file(path)
+    assert [request.headers["Content-Range"] for request in recorder.requests] == ["bytes 4-7/10", "bytes 8-9/10"]
+    assert {request.headers["X-Unique-Upload-Id"] for request in recorder.requests} == {upload_id}
+    assert not checkpoint.exists()
+
+
+async def test_changed_file_starts_a_new_upload(service, recorder, tmp_path):
+    path = _chunked_file(tmp_path, service)
+    recorder.fail["bytes 4-7/10"] = [503, 503]
+    with pytest.raises(CloudinaryUploadError):
+        await service.upload_file(path)
+
+    recorder.requests.clear()
+    (tmp_path / "song.flac").write_bytes(b"abcdefghijk")
+    await service.upload_file(path)
+    assert recorder.requests[0].headers["Content-Range"] == "bytes 0-3/11"
+
+
+@pytest.mark.parametrize("concurrency, expected", [(None, 3), (2, 2)])
+async def test_upload_many_bounds_concurrent_uploads(service, recorder, tmp_path, concurrency, expected):
+    service.max_concurrency = 3
+    recorder.delay = 0.02
+    items = [UploadItem(path=_file(tmp_path, f"{i}.mp3")) for i in range(8)]
+
+    results = await service.upload_many(items, concurrency=concurrency)
+
+    assert [result["path"] for result in results] == [item.path for item in items]
+    assert len(recorder.requests) == 8
+    assert recorder.max_in_flight == expected
@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import insert, select
+import business.services.counter_service as counter_service
+from business.services.counter_service import reconcile_counters
+from business.utils.counter_aggregator import CounterAggregator
+from data.models.interaction import Comment, Like
+from data.models.music import Song
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def songs(db):
+    # ids start past 1 and have a gap, like a table with deleted rows
+    await db.execute(insert(Song), [
+        {"id": song_id, "title": f"Song {song_id}", "file_url": f"/media/{song_id}.mp3"}
+        for song_id in (5, 6, 7, 20, 21)
+    ])
+    await db.commit()
+
+
+@pytest.fixture
+def aggregator(session_factory, monkeypatch):
+    aggregator = CounterAggregator(session_factory, flush_interval=60)
+    monkeypatch.setattr(counter_service, "song_counters", aggregator)
+    return aggregator
+
+
+async def _counts(db, song_id):
+    db.expire_all()
+    row = (await db.execute(select(Song.like_count, Song.comment_count, Song.play_count).where(Song.id == song_id))).one()
+    return tuple(row)
+
+
+async def _like(session_factory, user_id, song_id, commit=True):
+    async with session_factory() as session:
+        session.add(Like(user_id=user_id, song_id=song_id))
+        await session.flush()
+        await (session.commit() if commit else session.rollback())
+
+
+async def test_only_committed_writes_are_counted(songs, db, session_factory, aggregator):
+    await _like(session_factory, 1, 5)
+    await _like(session_factory, 2, 5, commit=False)
+    counter_service.record_play(5)
+    counter_service.record_play(5)
+
+    assert await aggregator.flush() == 1
+    assert await _counts(db, 5) == (1, 0, 2)
+    # nothing left to write
+    assert await aggregator.flush() == 0
+
+
+async def test_failed_flush_puts_the_deltas_back(songs, db, session_factory, aggregator):
+    aggregator.add(6, "like_count")
+    aggregator.add(6, "play_count", 3)
+
+    def broken_session():
+        raise ConnectionError("database went away")
+
+    aggregator.session_factory = broken_session
+    with pytest.raises(ConnectionError):
+        await aggregator.flush()
+    aggregator.add(6, "play_count")
+
+    aggregator.session_factory = session_factory
+    assert await aggregator.flush() == 1
+    assert await _counts(db, 6) == (1, 0, 4)
+
+
+async def test_reconcile_drops_deltas_it_already_counted(songs, db, session_factory, aggregator):
+    # committed, but still buffered when the recount runs
+    await _like(session_factory, 1, 7)
+    await _like(session_factory, 2, 21)
+
+    assert await reconcile_counters(db, batch_size=2, aggregator=aggregator) == 21
+    batches = aggregator._reconciled["batches"]
+    # batches follow the ids reconcile_counters walked, from the lowest id
+    assert [start for start, _ in batches] == list(range(5, 22, 2))
+    assert aggregator._recounted_at(7) == batches[1][1] and aggregator._recounted_at(21) == batches[8][1]
+    assert aggregator._recounted_at(4) == 0.0 and aggregator._recounted_at(23) == 0.0
+    assert await _counts(db, 7) == (1, 0, 0) and await _counts(db, 21) == (1, 0, 0)
+
+    # a like after the recount is still added
+    await _like(session_factory, 3, 7)
+    await aggregator.flush()
+    assert await _counts(db, 7) == (2, 0, 0)
+    assert await _counts(db, 21) == (1, 0, 0)
+
+
+async def test_reconciling_twice_keeps_exact_counts(songs, db, session_factory, aggregator):
+    await db.execute(insert(Comment), [{"user_id": 1, "song_id": 20, "content": "nice"}])
+    await db.execute(insert(Like), [{"user_id": user_id, "song_id": 20} for user_id in (1, 2, 3)])
+    await db.commit()
+    # bulk inserts bypass the hooks, so only the recount sees them
+    assert await _counts(db, 20) == (0, 0, 0)
+
+    for _ in range(2):
+        await reconcile_counters(db, batch_size=3, aggregator=aggregator)
+        await aggregator.flush()
+        assert await _counts(db, 20) == (3, 1, 0)
+
+
+class _DownRedis:
+    enabled = True
+
+    def get(self):
+        return None
+
+
+async def test_reconcile_is_skipped_while_redis_is_down(songs, db, session_factory):
+    await db.execute(insert(Like), [{"user_id": 1, "song_id": 5}])
+    await db.commit()
+    aggregator = CounterAggregator(session_factory, redis=_DownRedis())
+
+    # other workers could not learn the recount times
+    assert await reconcile_counters(db, aggregator=aggregator) == 0
+    assert await _counts(db, 5) == (0, 0, 0)
@@ -0,0 +1,125 @@
+import asyncio
+import socket
+import pytest
+
+pytest.importorskip("aiosmtplib")
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller
+from infrastructure.external.email_servive import EmailService
+
+pytestmark = pytest.mark.anyio
+
+
+class Mailbox:
+    """aiosmtpd handler that keeps what it accepts and can fail DATA on demand."""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+        self.fail_next = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_next:
+            self.fail_next -= 1
+            return "451 4.3.0 Try again later"
+        self.peers.add(session.peer)
+        self.messages.append((envelope.rcpt_tos[0], envelope.content.decode()))
+        return "250 OK"
+
+    def recipients(self):
+        return sorted(to for to, _ in self.messages)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mailbox():
+    handler = Mailbox()
+    handler.port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=handler.port)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+async def service(mailbox, monkeypatch):
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(mailbox.port))
+    monkeypatch.setenv("SMTP_USER", "noreply@example.com")
+    monkeypatch.delenv("SMTP_PASS", raising=False)
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    monkeypatch.setenv("EMAIL_RETRY_BASE_DELAY", "0.05")
+    service = EmailService()
+    yield service
+    await service.close(timeout=2)
+
+
+async def _wait_for(condition, timeout=5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_queued_mail_is_sent_in_batches_over_one_connection(service, mailbox):
+    service.batch_size = 5
+    for i in range(12):
+        assert await service.send_mail(f"user{i:02d}@example.com", "Hi", f"message {i}")
+
+    await _wait_for(lambda: len(mailbox.messages) == 12)
+    assert mailbox.recipients() == [f"user{i:02d}@example.com" for i in range(12)]
+    # the connection is reused between batches while there is traffic
+    assert len(mailbox.peers) == 1
+    assert "Subject: Hi" in mailbox.messages[0][1]
+
+
+async def test_transient_smtp_error_is_retried(service, mailbox):
+    mailbox.fail_next = 2
+    await service.send_mail("a@example.com", "Hi", "first")
+    await service.send_mail("b@example.com", "Hi", "second")
+
+    await _wait_for(lambda: len(mailbox.messages) == 2)
+    assert mailbox.recipients() == ["a@example.com", "b@example.com"]
+
+
+async def test_unexpected_error_does_not_drop_the_rest_of_the_batch(service, mailbox, monkeypatch):
+    connect = service._connect
+    calls = []
+
+    async def flaky_connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("bug")
+        return await connect()
+
+    monkeypatch.setattr(service, "_connect", flaky_connect)
+    for to in ("a@example.com", "b@example.com", "c@example.com"):
+        await service.send_mail(to, "Hi", "body")
+
+    # b and c go out in the same batch, a after its backoff
+    await _wait_for(lambda: len(mailbox.messages) == 3)
+    assert [to for to, _ in mailbox.messages] == ["b@example.com", "c@example.com", "a@example.com"]
+
+
+async def test_close_sends_mail_waiting_on_a_backoff(service, mailbox):
+    service.retry_base_delay = 60
+    mailbox.fail_next = 1
+    await service.send_mail("a@example.com", "Hi", "body")
+    await _wait_for(lambda: service._retries)
+
+    await service.close(timeout=2)
+    assert mailbox.recipients() == ["a@example.com"]
+    assert not service._retries
+
+
+async def test_full_outbox_rejects_mail(service):
+    service.outbox_size = 2
+    # nothing is sent until the worker gets to run
+    results = [await service.send_mail(f"user{i}@example.com", "Hi", "body") for i in range(3)]
+    assert results == [True, True, False]
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import business.utils.image_processor as image_processor
+from business.services.image_service import ImageService, ResizedImage, image_cache
+from business.utils.image_processor import ImageProcessingError, resize_image
+
+pytestmark = pytest.mark.anyio
+
+
+def _image_bytes(size, fmt: str = "JPEG") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_resize_valid_image():
+    output = resize_image(_image_bytes((400, 300)), 96, 96, "webp")
+    assert Image.open(io.BytesIO(output)).size == (96, 96)
+
+
+def test_pixel_limit_is_enforced_below_pillows_bomb_error(monkeypatch):
+    # Pillow would only warn here (over the limit, under twice the limit)
+    monkeypatch.setattr(image_processor, "MAX_PIXELS", 100 * 100)
+    with pytest.raises(ImageProcessingError, match="too large"):
+        resize_image(_image_bytes((150, 100), "PNG"), 48, 48, "webp")
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+def test_truncated_image_is_a_bad_image(fmt):
+    data = _image_bytes((400, 300), fmt)
+    with pytest.raises(ImageProcessingError):
+        resize_image(data[:len(data) // 2], 96, 96, "webp")
+
+
+def test_garbage_is_a_bad_image():
+    with pytest.raises(ImageProcessingError):
+        resize_image(b"not an image", 96, 96, "webp")
+
+
+def _resized(key: str) -> ResizedImage:
+    return ResizedImage(src="/media/a.jpg", width=96, height=96, format="webp", key=key, etag='"x"', media_type="image/webp")
+
+
+async def test_concurrent_renders_share_one_render(monkeypatch):
+    calls = []
+
+    async def render(self, image):
+        calls.append(image.key)
+        await asyncio.sleep(0.01)
+        return f"/cache/{image.key}"
+
+    monkeypatch.setattr(ImageService, "_render", render)
+    monkeypatch.setattr(image_cache, "get", lambda key: None)
+
+    service = ImageService()
+    results = await asyncio.gather(*(service.render(_resized("a")) for _ in range(5)))
+
+    assert calls == ["a"]
+    assert [image.path for image in results] == ["/cache/a"] * 5
+
+    # the path is not kept anywhere but the disk cache: the next miss renders again
+    await service.render(_resized("a"))
+    assert calls == ["a", "a"]
+
+
+async def test_failed_render_reaches_every_waiter(monkeypatch):
+    calls = []
+
+    async def render(self, image):
+        calls.append(image.key)
+        await asyncio.sleep(0.01)
+        raise ImageProcessingError("broken")
+
+    monkeypatch.setattr(ImageService, "_render", render)
+    monkeypatch.setattr(image_cache, "get", lambda key: None)
+
+    service = ImageService()
+    results = await asyncio.gather(*(service.render(_resized("b")) for _ in range(3)), return_exceptions=True)
+
+    assert calls == ["b"]
+    assert all(isinstance(result, ImageProcessingError) for result in results)
@@ -0,0 +1,70 @@
+import os
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from data.models import Base
+from data.models.interaction import Comment, Like
+from data.models.music import Song
+
+pytestmark = pytest.mark.anyio
+
+# query -> index it must use
+HOT_QUERIES = {
+    "likes per song": (select(func.count()).select_from(Like).where(Like.song_id == 1), "ix_likes_song_id_created_at"),
+    "a user's likes by recency": (
+        select(Like.song_id).where(Like.user_id == 1).order_by(Like.created_at.desc()).limit(20),
+        "ix_likes_user_id_created_at",
+    ),
+    "comments per song by time": (
+        select(Comment.id, Comment.content).where(Comment.song_id == 1).order_by(Comment.created_at.desc()).limit(20),
+        "ix_comments_song_id_created_at",
+    ),
+    "songs by artist": (select(Song.id).where(Song.artist_id == 1, Song.id > 0).order_by(Song.id).limit(50), "ix_songs_artist_id"),
+    "songs by album": (select(Song.id).where(Song.album_id == 1, Song.id > 0).order_by(Song.id).limit(50), "ix_songs_album_id"),
+}
+
+
+def _indexes(table: str):
+    table = Base.metadata.tables[table]
+    names = {index.name: [column.name for column in index.columns] for index in table.indexes}
+    names.update({constraint.name: [column.name for column in constraint.columns] for constraint in table.constraints if constraint.name})
+    return names
+
+
+def test_indexes_are_declared_on_the_models():
+    assert _indexes("likes")["uq_likes_user_id_song_id"] == ["user_id", "song_id"]
+    assert _indexes("likes")["ix_likes_song_id_created_at"] == ["song_id", "created_at"]
+    assert _indexes("likes")["ix_likes_user_id_created_at"] == ["user_id", "created_at"]
+    assert _indexes("comments")["ix_comments_song_id_created_at"] == ["song_id", "created_at"]
+    assert _indexes("songs")["ix_songs_artist_id"] == ["artist_id"]
+    assert _indexes("songs")["ix_songs_album_id"] == ["album_id"]
+    assert _indexes("albums")["ix_albums_artist_id"] == ["artist_id"]
+
+
+async def _plan(conn, query) -> str:
+    sql = str(query.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "mysql":
+        rows = (await conn.execute(text(f"EXPLAIN {sql}"))).mappings().all()
+        return " ".join(str(row["key"]) for row in rows)
+    rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_queries_use_their_index(engine, name):
+    query, index = HOT_QUERIES[name]
+    async with engine.connect() as conn:
+        assert index in await _plan(conn, query)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_MYSQL_URL"), reason="set TEST_MYSQL_URL to EXPLAIN against MySQL")
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_queries_use_their_index_on_mysql(name):
+    # expects a migrated schema (alembic upgrade head) in the TEST_MYSQL_URL database
+    query, index = HOT_QUERIES[name]
+    engine = create_async_engine(os.environ["TEST_MYSQL_URL"])
+    try:
+        async with engine.connect() as conn:
+            assert index in await _plan(conn, query)
+    finally:
+        await engine.dispose()
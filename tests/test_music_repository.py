@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import insert
+from data.models.music import Album, Artist, Song
+from data.repositories.music_repository import MusicRepository
+
+pytestmark = pytest.mark.anyio
+
+SONGS = 500
+ARTISTS = 25
+ALBUMS_PER_ARTIST = 4
+
+
+@pytest.fixture
+async def catalog(db):
+    await db.execute(insert(Artist), [{"id": i, "name": f"Artist {i}"} for i in range(1, ARTISTS + 1)])
+    await db.execute(insert(Album), [
+        {"id": (artist - 1) * ALBUMS_PER_ARTIST + n, "title": f"Album {artist}-{n}", "artist_id": artist}
+        for artist in range(1, ARTISTS + 1)
+        for n in range(1, ALBUMS_PER_ARTIST + 1)
+    ])
+    await db.execute(insert(Song), [
+        {
+            "id": i,
+            "title": f"Song {i}",
+            "file_url": f"/media/{i}.mp3",
+            "artist_id": i % ARTISTS + 1,
+            "album_id": i % (ARTISTS * ALBUMS_PER_ARTIST) + 1,
+        }
+        for i in range(1, SONGS + 1)
+    ])
+    await db.commit()
+    db.expunge_all()
+    return MusicRepository(db)
+
+
+async def test_list_songs_page_is_one_query(catalog, count_queries):
+    with count_queries() as statements:
+        songs, cursor = await catalog.list_songs(limit=SONGS)
+        names = [(song.artist.name, song.album.title) for song in songs]
+    assert len(songs) == SONGS and cursor is None
+    assert all(artist and album for artist, album in names)
+    assert len(statements) == 1
+
+
+async def test_list_song_rows_page_is_one_query(catalog, count_queries):
+    with count_queries() as statements:
+        rows, _ = await catalog.list_song_rows(limit=SONGS)
+    assert len(rows) == SONGS
+    assert all(row["artist_name"] and row["album_title"] for row in rows)
+    assert len(statements) == 1
+
+
+async def test_songs_by_artist_and_album_are_one_query_each(catalog, count_queries):
+    with count_queries() as statements:
+        by_artist, _ = await catalog.get_songs_by_artist(1, limit=SONGS)
+        by_album, _ = await catalog.get_songs_by_album(1, limit=SONGS)
+    assert by_artist and all(row["artist_id"] == 1 for row in by_artist)
+    assert by_album and all(row["album_id"] == 1 for row in by_album)
+    assert len(statements) == 2
+
+
+async def test_artist_with_songs_is_two_queries(catalog, count_queries):
+    with count_queries() as statements:
+        artist = await catalog.get_artist(1, with_songs=True)
+        titles = [song.title for song in artist.songs]
+    assert len(titles) == SONGS // ARTISTS
+    assert len(statements) == 2
+
+
+async def test_album_with_songs_and_artists_is_two_queries(catalog, count_queries):
+    with count_queries() as statements:
+        album = await catalog.get_album(1, with_songs=True)
+        names = [song.artist.name for song in album.songs]
+    assert len(names) == SONGS // (ARTISTS * ALBUMS_PER_ARTIST)
+    assert len(statements) == 2
+
+
+async def test_get_songs_by_ids_is_one_query(catalog, count_queries):
+    with count_queries() as statements:
+        songs = await catalog.get_songs(list(range(1, SONGS + 1)))
+        names = [song.artist.name for song in songs]
+    assert len(names) == SONGS
+    assert len(statements) == 1
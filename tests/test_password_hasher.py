@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from business.utils.password_hasher import PasswordHasher, pwd_context
+from shared.exceptions import ServiceUnavailableError
+
+pytestmark = pytest.mark.anyio
+
+
+def _bcrypt_works() -> bool:
+    # passlib 1.7 cannot drive bcrypt >= 4.1 (requirements.txt pins 4.0.1)
+    try:
+        return pwd_context.verify("x", pwd_context.hash("x"))
+    except (ValueError, AttributeError):
+        return False
+
+
+needs_bcrypt = pytest.mark.skipif(not _bcrypt_works(), reason="bcrypt backend unusable with this passlib")
+
+
+@pytest.fixture
+def hasher():
+    hashers = []
+
+    def make(**kwargs) -> PasswordHasher:
+        hashers.append(PasswordHasher(**kwargs))
+        return hashers[-1]
+
+    yield make
+    for hasher in hashers:
+        hasher.shutdown()
+
+
+@needs_bcrypt
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+async def test_hash_and_verify_round_trip(hasher, executor_type):
+    hasher = hasher(max_workers=2, executor_type=executor_type)
+    hashed, other = await asyncio.gather(hasher.hash("s3cret pässword"), hasher.hash("s3cret pässword"))
+
+    assert hashed.startswith("$2b$") and hashed != other
+    assert await hasher.verify("s3cret pässword", hashed)
+    assert not await hasher.verify("wrong", other)
+    assert hasher.pending == 0
+
+
+async def test_calls_past_max_pending_are_rejected(hasher, monkeypatch):
+    release = asyncio.Event()
+    hasher = hasher(max_workers=1, max_pending=2)
+    loop = asyncio.get_running_loop()
+
+    async def slow(executor, func, *args):
+        await release.wait()
+        return func.__name__
+
+    monkeypatch.setattr(loop, "run_in_executor", slow)
+    queued = [asyncio.create_task(hasher.hash("a")), asyncio.create_task(hasher.verify("a", "b"))]
+    await asyncio.sleep(0)
+    assert hasher.pending == 2
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        await hasher.hash("c")
+    assert error.value.status_code == 503
+
+    release.set()
+    assert await asyncio.gather(*queued) == ["_hash", "_verify"]
+    # capacity comes back once the queued calls finish
+    assert hasher.pending == 0
+    assert await hasher.hash("d") == "_hash"
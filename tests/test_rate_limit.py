@@ -0,0 +1,161 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from presentation.middleware.rate_limit_middleware import (
+    TOKEN_BUCKET,
+    MemoryRateLimitStore,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RedisRateLimitStore,
+)
+
+pytestmark = pytest.mark.anyio
+
+LOGIN = RateLimitPolicy("login", limit=5, window=60)
+BUCKET = RateLimitPolicy("api", limit=60, window=60, algorithm=TOKEN_BUCKET, burst=3)
+
+
+async def _hits(store, policy, times, key="k"):
+    return [await store.hit(key, policy, now) for now in times]
+
+
+# -- sliding window ----------------------------------------------------------------
+
+async def test_sliding_window_denies_past_the_limit():
+    store = MemoryRateLimitStore()
+    results = await _hits(store, LOGIN, [600 + i for i in range(6)])
+
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results] == [4, 3, 2, 1, 0, 0]
+    # nothing from the previous window, so the wait is the rest of this one
+    assert results[-1].retry_after == pytest.approx(60 - 5)
+    assert results[-1].reset_after == pytest.approx(60 - 5)
+
+
+async def test_sliding_window_weights_the_previous_window():
+    store = MemoryRateLimitStore()
+    await _hits(store, LOGIN, [600] * 5)
+
+    # halfway into the next window 5 * 0.5 = 2.5 requests still count
+    results = await _hits(store, LOGIN, [690] * 3)
+    assert [r.allowed for r in results] == [True, True, False]
+    # with 2 in this window, one more fits once the old window weighs <= 2,
+    # i.e. 36s into the window: 6s from now
+    assert results[-1].retry_after == pytest.approx(6)
+    assert not (await store.hit("k", LOGIN, 695.9)).allowed
+
+    later = await store.hit("k", LOGIN, 690 + results[-1].retry_after + 0.01)
+    assert later.allowed
+
+
+async def test_sliding_window_forgets_after_two_windows():
+    store = MemoryRateLimitStore()
+    await _hits(store, LOGIN, [600] * 5)
+    assert (await store.hit("k", LOGIN, 720)).allowed
+    assert (await store.hit("other", LOGIN, 600)).allowed
+
+
+# -- token bucket ------------------------------------------------------------------
+
+async def test_token_bucket_allows_a_burst_then_the_refill_rate():
+    store = MemoryRateLimitStore()
+    results = await _hits(store, BUCKET, [100, 100, 100, 100])
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[-1].limit == 3 and results[-1].remaining == 0
+    assert results[-1].retry_after == pytest.approx(1.0)
+
+    # one token per second at 60/min
+    assert (await store.hit("k", BUCKET, 100.5)).allowed is False
+    assert (await store.hit("k", BUCKET, 101.0)).allowed is True
+    # never refills past the burst
+    refilled = await store.hit("k", BUCKET, 1000)
+    assert refilled.allowed and refilled.remaining == 2
+
+
+# -- Redis scripts (fakeredis runs the Lua with lupa) --------------------------------
+
+class _Redis:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self):
+        return self.client
+
+    def mark_down(self, exc):
+        raise AssertionError(f"unexpected Redis error: {exc}")
+
+
+@pytest.fixture
+async def redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis()
+    yield RedisRateLimitStore(redis=_Redis(client))
+    await client.aclose()
+
+
+@pytest.mark.parametrize("policy", [LOGIN, BUCKET], ids=["sliding_window", "token_bucket"])
+async def test_redis_scripts_match_the_memory_store(redis_store, policy):
+    times = [600, 600.2, 601, 601, 602, 603, 630, 655, 661, 689.5, 690, 700, 745, 800]
+    times += [800] * 6 + [801.5] * 2
+    memory = await _hits(MemoryRateLimitStore(), policy, times)
+    redis = await _hits(redis_store, policy, times)
+
+    assert [r.allowed for r in redis] == [r.allowed for r in memory]
+    assert [r.remaining for r in redis] == [r.remaining for r in memory]
+
+
+# -- middleware ----------------------------------------------------------------------
+
+def _client(**kwargs):
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    policies = {("POST", "/api/v1/auth/login"): RateLimitPolicy("login", limit=2, window=60)}
+    app.add_middleware(RateLimitMiddleware, policies=policies, default_policy=None, store=MemoryRateLimitStore(), **kwargs)
+    return TestClient(app)
+
+
+def test_429_carries_rate_limit_headers():
+    client = _client()
+    ok = client.post("/api/v1/auth/login")
+    assert ok.status_code == 200
+    assert ok.headers["x-ratelimit-limit"] == "2"
+    assert ok.headers["x-ratelimit-remaining"] == "1"
+
+    client.post("/api/v1/auth/login")
+    denied = client.post("/api/v1/auth/login")
+    assert denied.status_code == 429
+    assert denied.json()["code"] == 429
+    assert denied.headers["x-ratelimit-remaining"] == "0"
+    assert 1 <= int(denied.headers["retry-after"]) <= 60
+    assert 1 <= int(denied.headers["x-ratelimit-reset"]) <= 60
+
+    # routes without a policy are not limited
+    assert client.get("/ping").status_code == 200
+
+
+def test_spoofed_forwarded_for_does_not_escape_the_limit():
+    client = _client(trusted_proxies=1)
+    statuses = [
+        client.post("/api/v1/auth/login", headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"}).status_code
+        for i in range(4)
+    ]
+    # the proxy appended the real peer; the forged left entries are ignored
+    assert statuses == [200, 200, 429, 429]
+
+
+def test_forwarded_for_hops_are_counted_from_the_right():
+    scope = {"headers": [(b"x-forwarded-for", b"1.1.1.1, 203.0.113.7"), (b"x-forwarded-for", b"10.0.0.2")], "client": ("10.0.0.3", 1)}
+    assert RateLimitMiddleware(None, trusted_proxies=0)._client_ip(scope) == "10.0.0.3"
+    assert RateLimitMiddleware(None, trusted_proxies=1)._client_ip(scope) == "10.0.0.2"
+    assert RateLimitMiddleware(None, trusted_proxies=2)._client_ip(scope) == "203.0.113.7"
+    assert RateLimitMiddleware(None, trusted_proxies=5)._client_ip(scope) == "1.1.1.1"
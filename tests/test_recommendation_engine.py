@@ -0,0 +1,140 @@
+import os
+import numpy as np
+import pytest
+from business.utils.recommendation_engine import ItemSimilarityEngine, RecommendationStore
+
+# users 1 and 2 share songs 10 and 20, user 2 bridges to 30, user 3 likes 30 and 40
+LIKES = ([1, 1, 2, 2, 2, 3, 3], [10, 20, 10, 20, 30, 30, 40])
+
+
+def _as_dict(pairs):
+    return {song_id: pytest.approx(score, abs=1e-6) for song_id, score in pairs}
+
+
+@pytest.fixture
+def engine():
+    return ItemSimilarityEngine(top_n=5).fit(LIKES)
+
+
+def test_neighbors_are_cosine_similarities(engine):
+    assert engine.similar_songs(10) == [(20, pytest.approx(1.0)), (30, pytest.approx(0.5))]
+    # 30: {2, 3}, 40: {3} -> 1 / (sqrt(2) * 1)
+    assert _as_dict(engine.similar_songs(30)) == {40: np.sqrt(0.5), 10: 0.5, 20: 0.5}
+    assert engine.similar_songs(30)[0][0] == 40
+    assert engine.similar_songs(40) == [(30, pytest.approx(np.sqrt(0.5)))]
+    assert engine.similar_songs(99) == []
+
+
+def test_top_n_keeps_the_best_neighbors():
+    engine = ItemSimilarityEngine(top_n=1).fit(LIKES)
+    assert engine.similar_songs(10) == [(20, pytest.approx(1.0))]
+    assert engine.similar_songs(30) == [(40, pytest.approx(np.sqrt(0.5)))]
+
+
+def test_playlists_add_down_weighted_co_occurrence():
+    engine = ItemSimilarityEngine(top_n=5, playlist_weight=0.5).fit(LIKES, ([7, 7], [10, 40]))
+    # song 10: likes from users 1, 2 and 0.5 from playlist 7; song 40: user 3 and playlist 7
+    expected = 0.25 / (np.sqrt(2.25) * np.sqrt(1.25))
+    assert _as_dict(engine.similar_songs(40))[10] == pytest.approx(expected)
+
+
+def test_recommendations_sum_neighbor_scores_and_skip_liked_songs(engine):
+    assert engine.recommend_for_user(1) == [(30, pytest.approx(1.0))]
+    assert _as_dict(engine.recommend_for_user(3)) == {10: 0.5, 20: 0.5}
+    assert engine.recommend_for_user(2) == [(40, pytest.approx(np.sqrt(0.5)))]
+    assert engine.recommend_for_user(99) == []
+    assert engine.recommend_for_songs([40], n=1) == [(30, pytest.approx(np.sqrt(0.5)))]
+
+
+def test_materialize_matches_the_live_queries(engine):
+    arrays = engine.materialize(3)
+    assert arrays["song_neighbors"].shape == (41, 3)
+    assert arrays["song_neighbors"][10].tolist() == [20, 30, -1]
+    assert arrays["song_neighbors"][15].tolist() == [-1, -1, -1]
+    for user_id in (1, 2, 3):
+        recs = [(song, score) for song, score in zip(arrays["user_recs"][user_id], arrays["user_scores"][user_id]) if song >= 0]
+        assert _as_dict(recs) == _as_dict(engine.recommend_for_user(user_id, 3))
+
+
+def _neighbor_map(engine, song_ids):
+    return {song_id: _as_dict(engine.similar_songs(song_id, engine.top_n)) for song_id in song_ids}
+
+
+def _score_lists(engine, song_ids):
+    return {song_id: [round(score, 5) for _, score in engine.similar_songs(song_id, engine.top_n)] for song_id in song_ids}
+
+
+@pytest.mark.parametrize("playlists", [False, True])
+@pytest.mark.parametrize("top_n", [100, 4])
+def test_add_likes_then_refresh_matches_a_full_recompute(playlists, top_n):
+    rng = np.random.default_rng(5)
+    users = rng.integers(1, 60, 600)
+    songs = rng.integers(1, 80, 600)
+    playlist_songs = (rng.integers(1, 10, 100), rng.integers(1, 90, 100)) if playlists else None
+    incremental = ItemSimilarityEngine(top_n=top_n, batch_size=16).fit((users[:500], songs[:500]), playlist_songs)
+    incremental.add_likes(users[500:550], songs[500:550])
+    # new users and new songs too
+    incremental.add_likes([1000, 1000, 3], [500, 5, 500])
+    incremental.add_likes(users[550:], songs[550:])
+    assert incremental.refresh_dirty() > 0 and incremental.refresh_dirty() == 0
+
+    all_users = np.concatenate([users, [1000, 1000, 3]])
+    all_songs = np.concatenate([songs, [500, 5, 500]])
+    full = ItemSimilarityEngine(top_n=top_n).fit((all_users, all_songs), playlist_songs)
+
+    song_ids = full.song_ids.tolist()
+    assert sorted(incremental.song_ids.tolist()) == song_ids
+    # which of several equal scores makes the cut is arbitrary, the scores are not
+    assert _score_lists(incremental, song_ids) == _score_lists(full, song_ids)
+    if top_n > len(song_ids):
+        assert _neighbor_map(incremental, song_ids) == _neighbor_map(full, song_ids)
+        for user_id in (3, 1000, int(users[0])):
+            assert _as_dict(incremental.recommend_for_user(user_id)) == _as_dict(full.recommend_for_user(user_id))
+
+
+def _store_arrays(likes=LIKES, popular=(10, 20, 30)):
+    arrays = ItemSimilarityEngine(top_n=5).fit(likes).materialize(3)
+    arrays["popular"] = np.asarray(popular, dtype=np.int32)
+    return arrays
+
+
+def test_store_publishes_versions_that_readers_reload(tmp_path):
+    writer = RecommendationStore(str(tmp_path))
+    reader = RecommendationStore(str(tmp_path), reload_interval=0)
+    assert not reader.ready and reader.for_user(1) == [] and reader.popular() == []
+
+    first = writer.write(_store_arrays())
+    assert (tmp_path / "CURRENT").read_text() == first
+    assert reader.ready and reader.similar_songs(10, 2) == writer.similar_songs(10, 2)
+    assert reader.popular(2) == [10, 20]
+
+    # user 1 now also likes 40, so it drops out of their recommendations
+    second = writer.write(_store_arrays(([1, *LIKES[0]], [40, *LIKES[1]]), popular=(30,)))
+    assert second > first and (tmp_path / "CURRENT").read_text() == second
+    assert 40 not in dict(reader.for_user(1)) and reader.popular() == [30]
+
+
+def test_store_prunes_old_versions_and_keeps_serving_the_mapped_one(tmp_path):
+    writer = RecommendationStore(str(tmp_path), keep_versions=2)
+    reader = RecommendationStore(str(tmp_path), reload_interval=0)
+    versions = [writer.write(_store_arrays(popular=(i,))) for i in range(1, 4)]
+    assert sorted(path.name for path in tmp_path.glob("v*")) == versions[1:]
+    assert reader.popular() == [3]
+
+    # CURRENT points at a version that cannot be opened
+    (tmp_path / "CURRENT").write_text("v0")
+    assert reader.popular() == [3]
+
+
+def test_store_has_a_single_writer(tmp_path):
+    writer = RecommendationStore(str(tmp_path))
+    other = RecommendationStore(str(tmp_path))
+    assert writer.acquire_writer() and writer.acquire_writer()
+    assert not other.acquire_writer()
+    with pytest.raises(RuntimeError):
+        other.write(_store_arrays())
+
+    # the lock goes with the writer's file descriptor, e.g. when its process exits
+    os.close(writer._writer_fd)
+    assert other.acquire_writer()
+    other.write(_store_arrays())
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import insert
+from business.services.recommendation_service import RecommendationService
+from business.utils.recommendation_engine import RecommendationStore
+from data.models.interaction import Like
+from data.models.music import Artist, Song
+from data.models.playlist import playlist_song_table
+
+pytestmark = pytest.mark.anyio
+
+
+async def _like(db, pairs):
+    await db.execute(insert(Like), [{"user_id": user_id, "song_id": song_id} for user_id, song_id in pairs])
+    await db.commit()
+
+
+async def test_incremental_refresh_matches_a_full_one(db, tmp_path):
+    await _like(db, [(1, 10), (1, 20), (2, 10), (2, 20), (2, 30), (3, 30), (3, 40)])
+    await db.execute(insert(playlist_song_table), [{"playlist_id": 1, "song_id": 10}, {"playlist_id": 1, "song_id": 40}])
+    await db.commit()
+
+    service = RecommendationService(RecommendationStore(str(tmp_path / "incremental")))
+    await service.refresh(db, top_n=5)
+    engine = service.engine
+    assert service.like_watermark == 7
+
+    await _like(db, [(3, 10), (4, 50), (4, 20)])
+    await service.refresh(db, top_n=5, full=False)
+    assert service.engine is engine and service.like_watermark == 10
+
+    full = RecommendationService(RecommendationStore(str(tmp_path / "full")))
+    await full.refresh(db, top_n=5)
+
+    for user_id in range(1, 5):
+        assert dict(service.store.for_user(user_id)) == pytest.approx(dict(full.store.for_user(user_id)))
+    for song_id in (10, 20, 30, 40, 50):
+        assert dict(service.store.similar_songs(song_id)) == pytest.approx(dict(full.store.similar_songs(song_id)))
+    assert service.store.popular() == full.store.popular() == [10, 20, 30, 40, 50]
+
+
+async def test_popular_songs_come_from_like_counts_until_a_store_exists(db, tmp_path):
+    await db.execute(insert(Artist), [{"id": 1, "name": "Artist"}])
+    await db.execute(insert(Song), [
+        {"id": i, "title": f"Song {i}", "file_url": f"/media/{i}.mp3", "artist_id": 1, "like_count": likes}
+        for i, likes in ((1, 3), (2, 9), (3, 0), (4, 9))
+    ])
+    await db.commit()
+    service = RecommendationService(RecommendationStore(str(tmp_path)))
+
+    for kwargs in ({}, {"user_id": 7}, {"song_id": 1}):
+        result = await service.get_recommendations(db, limit=3, **kwargs)
+        assert result["source"] == "popular"
+        assert [item["id"] for item in result["items"]] == [2, 4, 1]
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import JSONResponse
+from data.models.music import Song
+from data.models.user import User
+from shared.responses import CREATED, OK
+
+
+def _isoformat(row):
+    # what to_dict returned before responses went through orjson
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+
+def _payload():
+    user = User(
+        id=1, username="sontung", email="st@example.com", full_name="Sơn Tùng M-TP", bio=None, is_active=True,
+        role="user", created_at=datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+        updated_at=datetime(2024, 5, 2, 9, 0, tzinfo=timezone(timedelta(hours=7))),
+    )
+    songs = [
+        Song(id=i, title=f"Lạc Trôi “{i}”", duration=233, file_url=f"/media/{i}.mp3", like_count=i, created_at=datetime(2024, 1, i))
+        for i in range(1, 4)
+    ]
+    return user.to_dict(), [song.to_dict() for song in songs]
+
+
+def test_orjson_body_is_byte_identical_to_the_old_json_response():
+    user, songs = _payload()
+    old = JSONResponse(status_code=200, content={
+        "status": "success", "code": 200, "message": "OK",
+        "metadata": {"user": _isoformat(user), "songs": [_isoformat(song) for song in songs]},
+    })
+    new = OK(metadata={"user": user, "songs": songs}).send()
+
+    assert new.body == old.body
+    assert new.headers["content-type"] == old.headers["content-type"] == "application/json"
+    assert "password" not in user
+
+
+def test_status_code_is_kept():
+    response = CREATED(metadata={"id": 1}).send()
+    assert response.status_code == 201
+    assert response.body == b'{"status":"success","code":201,"message":"Created","metadata":{"id":1}}'
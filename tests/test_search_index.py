@@ -0,0 +1,97 @@
+import pytest
+from business.utils.search_index import SearchIndex, bounded_levenshtein, tokenize
+from shared.text import normalize
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.load(
+        artists=[(1, "Sơn Tùng M-TP"), (2, "Queen"), (3, "Hello Band")],
+        albums=[(10, "A Night at the Opera"), (11, "World Tour")],
+        songs=[
+            {"song_id": 1, "title": "Lạc Trôi", "artist_id": 1, "album_id": None},
+            {"song_id": 2, "title": "Bohemian Rhapsody", "artist_id": 2, "album_id": 10},
+            {"song_id": 3, "title": "Hello World", "artist_id": 2, "album_id": None},
+            {"song_id": 4, "title": "Goodbye", "artist_id": 3, "album_id": None},
+            {"song_id": 5, "title": "Travelling", "artist_id": 2, "album_id": 11},
+            {"song_id": 6, "title": "Worldwide", "artist_id": 2, "album_id": None},
+        ],
+    )
+    return index
+
+
+def _ids(index, query, **kwargs):
+    return [item["id"] for item in index.search(query, **kwargs)[0]]
+
+
+def test_normalize_folds_accents_and_punctuation():
+    assert normalize("Sơn Tùng M-TP") == "son tung m tp"
+    assert tokenize("Đen Vâu!") == ["den", "vau"]
+
+
+def test_accent_insensitive_match(index):
+    assert _ids(index, "lac troi") == [1]
+    assert _ids(index, "son tung") == [1]
+
+
+def test_title_outranks_artist_outranks_album(index):
+    # "hello": title of 3, artist of 4; "world": title of 3 and 6, album of 5
+    assert _ids(index, "hello")[:2] == [3, 4]
+    results = _ids(index, "world")
+    assert results.index(3) < results.index(5)
+
+
+def test_documents_matching_more_terms_rank_first(index):
+    # song 3 matches both terms; song 2 only "queen" (artist) but "queen" is rarer
+    assert _ids(index, "queen hello")[0] == 3
+
+
+def test_only_the_last_term_is_prefix_expanded(index):
+    assert "hello" in index._expand("hel", allow_prefix=True)
+    assert index._expand("hel", allow_prefix=False) == {}
+    # "wor" is expanded as the last term and reaches "world" and "worldwide"
+    assert set(_ids(index, "wor")) == {3, 5, 6}
+    assert _ids(index, "wor hello") == [3, 4]
+
+
+def test_typo_tolerance_scales_with_term_length(index):
+    # 5 letters: one edit
+    assert _ids(index, "worle")[0] in (3, 6)
+    # 8+ letters: two edits
+    assert _ids(index, "bohemain") == [2]
+    # under 4 letters: exact or prefix only
+    assert index._fuzzy_tokens("gne") == []
+
+
+def test_fuzzy_tokens_come_from_shared_trigrams(index):
+    assert index._fuzzy_tokens("quen") == ["queen"]
+    assert "world" not in index._fuzzy_tokens("world")
+    assert index._fuzzy_tokens("zzzzzz") == []
+
+
+def test_bounded_levenshtein_gives_up_past_the_bound():
+    assert bounded_levenshtein("world", "worle", 1) == 1
+    assert bounded_levenshtein("bohemian", "bohemain", 2) == 2
+    assert bounded_levenshtein("abcdef", "uvwxyz", 2) == 3
+
+
+def test_pagination_reports_the_full_total(index):
+    first, total = index.search("wor", offset=0, limit=2)
+    second, _ = index.search("wor", offset=2, limit=2)
+    assert total == 3 and len(first) == 2 and len(second) == 1
+    assert {item["id"] for item in first + second} == {3, 5, 6}
+
+
+def test_writes_update_postings_and_vocabulary(index):
+    index.upsert_artist(2, "Queen Live")
+    assert 2 in _ids(index, "live")
+
+    index.upsert_song(3, "Hello Again", artist_id=2)
+    assert "world" in index.postings and 3 not in index.postings["world"]
+
+    index.remove_song(6)
+    index.remove_song(3)
+    assert "worldwide" not in index.postings and "worldwide" not in index.vocabulary
+    assert _ids(index, "worldwide") == []
+    assert index.vocabulary == sorted(index.vocabulary)
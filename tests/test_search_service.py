@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import insert
+from business.services.search_service import SearchService
+from business.utils.search_index import SearchIndex, search_index
+from business.utils.suggest_index import SuggestIndex, suggest_index
+from data.models.interaction import Like
+from data.models.music import Artist, Song
+from data.repositories.music_repository import MusicRepository
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def catalog(db):
+    await db.execute(insert(Artist), [{"id": 1, "name": "Sơn Tùng"}])
+    await db.execute(insert(Song), [
+        {"id": i, "title": f"Song {i}", "file_url": f"/media/{i}.mp3", "artist_id": 1}
+        for i in range(1, 11)
+    ])
+    await db.commit()
+    yield
+    search_index.swap(SearchIndex())
+    suggest_index.swap(SuggestIndex())
+
+
+async def test_rebuild_keeps_writes_committed_during_the_build(catalog, db, session_factory, monkeypatch):
+    paginate_rows = MusicRepository.paginate_rows
+
+    async def paginate_with_concurrent_writes(self, *args, **kwargs):
+        page = await paginate_rows(self, *args, **kwargs)
+        # another request commits after the snapshot of songs was read
+        async with session_factory() as other:
+            other.add(Song(id=11, title="Lạc Trôi", file_url="/media/11.mp3", artist_id=1))
+            await other.delete(await other.get(Song, 3))
+            (await other.get(Artist, 1)).name = "Son Tung M-TP"
+            await other.commit()
+        return page
+
+    monkeypatch.setattr(MusicRepository, "paginate_rows", paginate_with_concurrent_writes)
+
+    assert await SearchService().rebuild_index(db) == 10
+
+    assert search_index.ready and search_index.pending is None
+    assert set(search_index.songs) == set(range(1, 12)) - {3}
+    assert search_index.artists[1] == "Son Tung M-TP"
+    items, total = search_index.search("lac troi")
+    assert total == 1 and items[0]["id"] == 11
+    assert search_index.search("m-tp")[1] == 10
+
+
+async def test_failed_rebuild_stops_buffering(catalog, db, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(MusicRepository, "paginate_rows", fail)
+
+    with pytest.raises(RuntimeError):
+        await SearchService().rebuild_index(db)
+    assert search_index.pending is None
+
+
+async def test_suggest_rebuild_keeps_writes_committed_during_the_build(catalog, db, session_factory, monkeypatch):
+    await db.execute(insert(Song).values(id=12, title="Lạc Trôi Remix", file_url="/media/12.mp3", artist_id=1, like_count=1))
+    await db.commit()
+    paginate_rows = MusicRepository.paginate_rows
+
+    async def paginate_with_concurrent_writes(self, *args, **kwargs):
+        page = await paginate_rows(self, *args, **kwargs)
+        async with session_factory() as other:
+            other.add(Song(id=11, title="Lạc Trôi", file_url="/media/11.mp3", artist_id=1))
+            other.add_all([Like(user_id=user_id, song_id=11) for user_id in (1, 2)])
+            await other.commit()
+        return page
+
+    monkeypatch.setattr(MusicRepository, "paginate_rows", paginate_with_concurrent_writes)
+
+    assert await SearchService().rebuild_suggestions(db) == 12
+
+    assert suggest_index.ready and suggest_index.pending is None
+    items = suggest_index.suggest("lac", kind="song")
+    # the new song and both of its likes survived the swap
+    assert [(item["id"], item["score"]) for item in items] == [(11, 2.0), (12, 1.0)]
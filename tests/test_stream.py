@@ -0,0 +1,151 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import business.services.music_service as music_service
+from data.models import Base
+from data.models.music import Song
+from infrastructure.cache import cache
+from infrastructure.config.database import get_read_db
+from infrastructure.external.http_client import http_client
+import presentation.controllers.music_controller as music_controller
+from presentation.controllers.music_controller import router
+
+AUDIO = bytes(range(256)) * 40
+REMOTE_URL = "https://cdn.example.com/audio/3.mp3"
+
+
+class OriginStream(httpx.AsyncByteStream):
+    """Unread body, like a real origin response (content= would be pre-read)."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "song.mp3").write_bytes(AUDIO)
+    (tmp_path / "secret.mp3").write_bytes(b"outside the media root")
+    monkeypatch.setattr(music_service, "MEDIA_ROOT", str(media.resolve()))
+    cache.local.clear()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def seed():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(Song), [
+                {"id": 1, "title": "Local", "file_url": "/media/song.mp3"},
+                {"id": 2, "title": "Escape", "file_url": "../secret.mp3"},
+                {"id": 3, "title": "Remote", "file_url": REMOTE_URL},
+            ])
+
+    async def read_db():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_read_db] = read_db
+    with TestClient(app) as test_client:
+        test_client.portal.call(seed)
+        yield test_client
+        test_client.portal.call(engine.dispose)
+    cache.local.clear()
+
+
+def test_full_file(client):
+    response = client.get("/api/v1/songs/1/stream")
+    assert response.status_code == 200
+    assert response.content == AUDIO
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["cache-control"] == "private, max-age=3600"
+    assert response.headers["etag"]
+
+
+def test_range_request(client):
+    response = client.get("/api/v1/songs/1/stream", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(AUDIO)}"
+    assert response.content == AUDIO[100:200]
+
+
+def test_conditional_request(client):
+    etag = client.get("/api/v1/songs/1/stream").headers["etag"]
+    response = client.get("/api/v1/songs/1/stream", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/api/v1/songs/1/stream", headers={"Range": f"bytes={len(AUDIO)}-"})
+    assert response.status_code == 416
+
+
+def test_path_outside_media_root_is_rejected(client):
+    assert client.get("/api/v1/songs/2/stream").status_code == 404
+
+
+def test_unknown_song(client):
+    assert client.get("/api/v1/songs/999/stream").status_code == 404
+
+
+def test_remote_proxy_forwards_only_allowed_headers(client, monkeypatch):
+    seen = {}
+
+    def origin(request: httpx.Request) -> httpx.Response:
+        seen["url"] = str(request.url)
+        seen["headers"] = dict(request.headers)
+        return httpx.Response(
+            206,
+            headers={
+                "Content-Type": "audio/mpeg",
+                "Content-Range": f"bytes 0-9/{len(AUDIO)}",
+                "ETag": '"origin-etag"',
+                "Set-Cookie": "origin=1",
+                "X-Origin-Internal": "1",
+            },
+            stream=OriginStream(AUDIO[:10]),
+        )
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(origin)))
+    response = client.get(
+        "/api/v1/songs/3/stream",
+        headers={"Range": "bytes=0-9", "If-None-Match": '"old"', "Authorization": "Bearer token", "Cookie": "session=1"},
+    )
+
+    assert seen["url"] == REMOTE_URL
+    assert seen["headers"]["range"] == "bytes=0-9"
+    assert seen["headers"]["if-none-match"] == '"old"'
+    assert "authorization" not in seen["headers"] and "cookie" not in seen["headers"]
+
+    assert response.status_code == 206
+    assert response.content == AUDIO[:10]
+    assert response.headers["content-range"] == f"bytes 0-9/{len(AUDIO)}"
+    assert response.headers["etag"] == '"origin-etag"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["cache-control"] == "private, max-age=3600"
+    assert "set-cookie" not in response.headers and "x-origin-internal" not in response.headers
+
+
+def test_only_responses_with_audio_count_as_plays(client, monkeypatch):
+    plays = []
+    monkeypatch.setattr(music_controller, "record_play", plays.append)
+
+    etag = client.get("/api/v1/songs/1/stream").headers["etag"]
+    assert client.get("/api/v1/songs/1/stream", headers={"Range": "bytes=0-"}).status_code == 206
+    # seeks and revalidations are not new plays
+    client.get("/api/v1/songs/1/stream", headers={"Range": "bytes=100-"})
+    assert client.get("/api/v1/songs/1/stream", headers={"If-None-Match": etag}).status_code == 304
+    client.head("/api/v1/songs/1/stream")
+
+    assert plays == [1, 1]
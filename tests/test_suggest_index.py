@@ -0,0 +1,96 @@
+import pytest
+from business.utils.suggest_index import SuggestIndex
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex(top_k=5, precompute_depth=2)
+    index.build([
+        ("song", 1, "Hello World", 10, "Adele"),
+        ("song", 2, "Hello", 50, "Adele"),
+        ("song", 3, "Help!", 30, "The Beatles"),
+        ("artist", 1, "Adele", 100, None),
+        ("artist", 2, "Hello Band", 5, None),
+        ("album", 1, "Help", 20, None),
+    ])
+    return index
+
+
+def _refs(index, prefix, **kwargs):
+    return [(item["type"], item["id"]) for item in index.suggest(prefix, **kwargs)]
+
+
+def test_build_ranks_every_match_by_weight(index):
+    assert index.ready and len(index) == 6
+    assert _refs(index, "hel") == [("song", 2), ("song", 3), ("album", 1), ("song", 1), ("artist", 2)]
+    assert index.suggest("he")[0] == {"type": "song", "id": 2, "text": "Hello", "subtitle": "Adele", "score": 50}
+    assert index.suggest("") == [] and index.suggest("zz") == []
+
+
+def test_words_inside_the_text_are_prefixes_too(index):
+    assert _refs(index, "wor") == [("song", 1)]
+    assert _refs(index, "band") == [("artist", 2)]
+    # accents and punctuation are folded like the search index does
+    assert _refs(index, "HÉLP!") == [("song", 3), ("album", 1)]
+
+
+def test_rank_per_kind(index):
+    assert _refs(index, "he", kind="artist") == [("artist", 2)]
+    assert _refs(index, "hel", kind="album") == [("album", 1)]
+    assert _refs(index, "help", kind="song") == [("song", 3)]
+    assert _refs(index, "a", kind="song") == []
+
+
+def test_limit_is_capped_by_top_k(index):
+    assert len(index.suggest("h", limit=2)) == 2
+    assert len(index.suggest("h", limit=50)) == 5
+
+
+def test_add_reaches_precomputed_and_scanned_prefixes(index):
+    index.add("song", 4, "Helium", 40, "Foo")
+    assert _refs(index, "he")[:2] == [("song", 2), ("song", 4)]
+    assert _refs(index, "heli") == [("song", 4)]
+    assert _refs(index, "he", kind="song")[1] == ("song", 4)
+
+    # adding an existing entry again is a no-op
+    index.add("song", 4, "Something Else", 999)
+    assert _refs(index, "some") == []
+
+
+def test_bump_reranks_without_a_rebuild(index):
+    index.bump("song", 1, 45)
+    assert _refs(index, "hel")[:2] == [("song", 1), ("song", 2)]
+    assert _refs(index, "hello w")[0] == ("song", 1)
+    index.bump("song", 99)  # unknown entries are ignored
+
+
+def test_ranges_larger_than_max_scan_are_precomputed():
+    index = SuggestIndex(top_k=3, precompute_depth=1, max_scan=4)
+    index.build([("song", i, f"abc{i:02d}", i, None) for i in range(10)] + [("song", 10, "abd", 100, None)])
+
+    # "abc" is past the precompute depth but covers 10 keys
+    assert ("abc", None) in index.top and ("abc0", None) in index.top
+    assert ("abd", None) not in index.top
+    assert _refs(index, "abc") == [("song", 9), ("song", 8), ("song", 7)]
+    assert _refs(index, "abc0") == [("song", 9), ("song", 8), ("song", 7)]
+    assert _refs(index, "abd") == [("song", 10)]
+
+    # adds keep the deeper precomputed prefixes current
+    index.add("song", 11, "abc11", 50)
+    assert _refs(index, "abc")[0] == ("song", 11)
+
+
+def test_short_keys_do_not_hide_longer_ones():
+    index = SuggestIndex(precompute_depth=3)
+    index.build([("artist", 1, "AB", 1, None), ("song", 1, "abc", 2, None), ("song", 2, "abcd", 3, None)])
+    assert _refs(index, "abc") == [("song", 2), ("song", 1)]
+    assert _refs(index, "ab") == [("song", 2), ("song", 1), ("artist", 1)]
+
+
+def test_swap_takes_over_and_ends_buffering(index):
+    index.pending = [("bump", ("song", 1))]
+    fresh = SuggestIndex(top_k=5)
+    fresh.build([("song", 7, "Yesterday", 1, None)])
+    index.swap(fresh)
+    assert index.pending is None
+    assert _refs(index, "yes") == [("song", 7)] and _refs(index, "hel") == []
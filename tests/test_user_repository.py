@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import instance_state
+from data.models.user import User
+from data.repositories.user_repository import UserRepository
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def users(db):
+    await db.execute(insert(User), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "hash", "is_active": i % 3 != 0}
+        for i in range(1, 11)
+    ])
+    await db.commit()
+    db.expunge_all()
+
+
+async def test_get_all_pages_active_users_by_cursor(db, users):
+    repository = UserRepository(db)
+    first, cursor = await repository.get_all(limit=4)
+    second, end = await repository.get_all(limit=4, after=cursor)
+
+    assert [user.id for user in first] == [1, 2, 4, 5]
+    assert [user.id for user in second] == [7, 8, 10]
+    assert end is None
+    # the password hash is never loaded for listings
+    assert "password" in instance_state(first[0]).unloaded
+
+
+@pytest.mark.parametrize("per_model", [False, True])
+async def test_update_is_one_statement_with_returning(engine, users, count_queries, per_model):
+    bind = {"binds": {User: engine}} if per_model else {"bind": engine}
+    async with AsyncSession(expire_on_commit=False, **bind) as db:
+        repository = UserRepository(db)
+        assert repository._supports_update_returning()
+
+        with count_queries() as statements:
+            user = await repository.update(1, {"full_name": "Renamed"})
+    assert user.full_name == "Renamed"
+    assert len(statements) == 1 and "RETURNING" in statements[0]